@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Cópia de segurança do site (banco + PDFs) e exportação dos PDFs em ZIP
+
+Uso:
+  python backup.py export [-o backup.zip]
+  python backup.py pdfs [-o pdfs.zip] [--portfolio 1,2] [--standalone 3]
+  python backup.py restore backup.zip [--replace]
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.main import app
+from src.routes.backup import EXPORTS
+from src.utils.backup import BackupError, iter_backup, iter_pdf_export, restore, write_archive
+from src.utils.bootstrap import bootstrap
+
+def parse_ids(value):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+def default_output(prefix):
+    return f"{prefix}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.zip"
+
+def backup():
+    parser = argparse.ArgumentParser(description='Cópia de segurança e exportação do portfólio')
+    commands = parser.add_subparsers(dest='command', required=True)
+    export = commands.add_parser('export', help='cópia completa: todas as tabelas e todos os PDFs')
+    export.add_argument('-o', '--output')
+    pdfs = commands.add_parser('pdfs', help='só os PDFs, com nomes legíveis (sem filtro, todos)')
+    pdfs.add_argument('-o', '--output')
+    for param in EXPORTS:
+        pdfs.add_argument(f'--{param}', type=parse_ids, metavar='IDS', help='ids separados por vírgula')
+    load = commands.add_parser('restore', help='carrega uma cópia feita com "export"')
+    load.add_argument('path')
+    load.add_argument('--replace', action='store_true', help='substitui os dados que já estão no banco')
+    args = parser.parse_args()
+
+    # Scripts avulsos não passam pelo gunicorn: garantem o schema por conta própria
+    bootstrap(app, verbose=False)
+    with app.app_context():
+        if args.command == 'export':
+            output = args.output or default_output('backup')
+            size = write_archive(iter_backup(), output)
+            print(f"✅ Cópia gravada em {output} ({size / 1024 / 1024:.1f} MB)")
+        elif args.command == 'pdfs':
+            selection = [(folder, model, getattr(args, param)) for param, (folder, model) in EXPORTS.items()
+                         if getattr(args, param) is not None]
+            if not selection:
+                selection = [(folder, model, None) for folder, model in EXPORTS.values()]
+            output = args.output or default_output('pdfs')
+            size = write_archive(iter_pdf_export(selection), output)
+            print(f"✅ PDFs exportados em {output} ({size / 1024 / 1024:.1f} MB)")
+        else:
+            try:
+                report = restore(args.path, replace=args.replace, progress=lambda message: print(f"📦 {message}"))
+            except BackupError as e:
+                print(f"❌ {e}")
+                sys.exit(1)
+            total = sum(report['tables'].values())
+            print(f"✅ Restauradas {total} linha(s) em {len(report['tables'])} tabela(s) em {report['seconds']}s")
+
+if __name__ == '__main__':
+    backup()
@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""
+Benchmark / teste de carga da API
+
+Sobe o app num processo separado, com banco SQLite, blobs e caches numa
+pasta temporária, semeado com N links e PDFs, e um servidor HTTP local com
+páginas sintéticas para a extração de metadados. Depois exercita as listas
+públicas, os arquivos estáticos, o download de PDFs e os três uploads com a
+concorrência pedida e grava um JSON com vazão, p50/p95/p99 e pico de RSS.
+Antes disso mede o cold start de um worker (import do app, bootstrap e
+primeiras requisições) em processos Python novos.
+
+Uso:
+    python benchmark.py [--links 500] [--pdfs 50] [--concurrency 8] [--duration 5]
+                        [--server werkzeug|gunicorn] [--workers 2] [--only links_list,pdf_download]
+    python benchmark.py --compare resultado-antigo.json resultado-novo.json [--threshold 20]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmark-results')
+ADMIN = {'username': 'diego', 'password': 'diego123'}
+
+
+def make_pdf(seed, size):
+    """PDF válido de uma página com ``size`` bytes aproximados (conteúdo único por seed)"""
+    padding = (f'% bench {seed} ' * (size // 12 + 1)).encode()[:max(0, size - 400)]
+    content = b'BT /F1 12 Tf 72 720 Td (Benchmark ' + str(seed).encode() + b') Tj ET\n' + padding
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R >>',
+        b'<< /Length ' + str(len(content)).encode() + b' >>\nstream\n' + content + b'\nendstream',
+        b'<< /Title (Benchmark ' + str(seed).encode() + b') >>',
+    ]
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f'{number} 0 obj\n'.encode() + body + b'\nendobj\n'
+    xref = len(out)
+    out += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f\r\n'.encode()
+    for offset in offsets:
+        out += f'{offset:010d} 00000 n\r\n'.encode()
+    out += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R /Info 5 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return bytes(out)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+# ---------------------------------------------------------------------------
+# Processo do servidor
+# ---------------------------------------------------------------------------
+
+def isolate(workdir):
+    """Aponta banco, blobs, caches e métricas para ``workdir`` antes de subir o app"""
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'app.db')}"
+    os.environ['METRICS_DIR'] = os.path.join(workdir, 'metrics')
+
+    from src.utils import blob_store, response_cache
+    blob_store.BLOB_DIR = os.path.join(workdir, 'blobs')
+    blob_store.LEGACY_PDF_DIR = os.path.join(workdir, 'legacy-pdfs')
+    blob_store.LEGACY_PORTFOLIO_DIR = os.path.join(workdir, 'legacy-portfolio-pdfs')
+    response_cache.CACHE_DIR = os.path.join(workdir, 'cache')
+
+
+def seed(app, workdir, links, pdfs, pdf_size):
+    from src.models.portfolio import PortfolioLink, db
+    from src.routes.pdf_standalone import StandalonePDF
+    from src.routes.portfolio_pdfs import PortfolioPDF
+    from src.utils import blob_store, response_cache
+
+    with app.app_context():
+        for i in range(links):
+            db.session.add(PortfolioLink(
+                title=f'Link {i}', url=f'https://example.com/{i}', description=f'Descrição {i}',
+                image_url=f'https://example.com/{i}.png', is_active=i % 10 != 0))
+        db.session.commit()
+
+        for i in range(pdfs):
+            path = os.path.join(workdir, f'seed-{i}.pdf')
+            with open(path, 'wb') as f:
+                f.write(make_pdf(f'seed-{i}', pdf_size))
+            sha256, size = blob_store.put_file(path)
+            model = PortfolioPDF if i % 2 == 0 else StandalonePDF
+            pdf = model(title=f'PDF {i}', filename=f'seed-{i}.pdf', original_name=f'seed-{i}.pdf', size=size, sha256=sha256)
+            if model is PortfolioPDF:
+                pdf.order_index = i
+            pdf.inspect_blob()
+            db.session.add(pdf)
+        db.session.commit()
+        response_cache.invalidate(response_cache.PORTFOLIO_LINKS, response_cache.PORTFOLIO_PDFS)
+
+
+def serve(args):
+    isolate(args.workdir)
+    from src.main import app
+    from src.utils.bootstrap import bootstrap
+    bootstrap(app, verbose=False)
+    seed(app, args.workdir, args.links, args.pdfs, args.pdf_size)
+
+    if args.server == 'gunicorn':
+        from gunicorn.app.base import BaseApplication
+
+        class BenchApplication(BaseApplication):
+            def load_config(self):
+                self.cfg.set('bind', f'127.0.0.1:{args.port}')
+                self.cfg.set('workers', args.workers)
+                self.cfg.set('threads', args.threads)
+                self.cfg.set('loglevel', 'warning')
+
+            def load(self):
+                return app
+
+        BenchApplication().run()
+    else:
+        from werkzeug.serving import make_server
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        make_server('127.0.0.1', args.port, app, threaded=True).serve_forever()
+
+
+def startup_probe(args):
+    """Mede, num processo novo, o import do app, o bootstrap e as primeiras requisições"""
+    timings = {}
+    start = time.perf_counter()
+    isolate(args.workdir)
+    from src.main import app
+    timings['import_ms'] = (time.perf_counter() - start) * 1000
+
+    from src.utils.bootstrap import bootstrap
+    start = time.perf_counter()
+    bootstrap(app, verbose=False)
+    timings['bootstrap_ms'] = (time.perf_counter() - start) * 1000
+
+    client = app.test_client()
+    for name, path in (('first_api_request_ms', '/api/portfolio/links'), ('first_page_request_ms', '/')):
+        start = time.perf_counter()
+        client.get(path).close()
+        timings[name] = (time.perf_counter() - start) * 1000
+    print(json.dumps(timings))
+
+
+# ---------------------------------------------------------------------------
+# Páginas sintéticas para a extração de metadados
+# ---------------------------------------------------------------------------
+
+class SyntheticPages(BaseHTTPRequestHandler):
+    body_padding = '<p>' + 'conteúdo ' * 2000 + '</p>'
+
+    def do_GET(self):
+        page = (
+            f'<html><head><title>Página {self.path}</title>'
+            f'<meta property="og:title" content="Página {self.path}">'
+            f'<meta property="og:description" content="Descrição sintética de {self.path}">'
+            f'<meta property="og:image" content="http://example.com{self.path}.png">'
+            f'</head><body>{self.body_padding}</body></html>'
+        ).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(page)))
+        self.end_headers()
+        self.wfile.write(page)
+
+    def log_message(self, *args):
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Medição
+# ---------------------------------------------------------------------------
+
+def process_tree_rss(pid):
+    """RSS (bytes) do processo e dos filhos, lido de /proc (Linux)"""
+    total = 0
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    total += int(line.split()[1]) * 1024
+        for task in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{task}/children') as f:
+                for child in f.read().split():
+                    total += process_tree_rss(int(child))
+    except (OSError, ValueError):
+        pass
+    return total
+
+
+class RssSampler(threading.Thread):
+    def __init__(self, pid, interval=0.2):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.peak = max(self.peak, process_tree_rss(self.pid))
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, int(round(fraction * (len(values) - 1)))))
+    return values[index]
+
+
+def summarize(latencies, statuses, errors, elapsed):
+    ok = len(latencies)
+    return {
+        'requests': ok + errors,
+        'errors': errors,
+        'statuses': statuses,
+        'duration_s': round(elapsed, 3),
+        'throughput_rps': round(ok / elapsed, 1) if elapsed else 0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2) if ok else None,
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2) if ok else None,
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2) if ok else None,
+        'max_ms': round(max(latencies) * 1000, 2) if ok else None,
+    }
+
+
+def run_scenario(base_url, scenario, concurrency, duration, cookies):
+    """Dispara ``scenario`` com ``concurrency`` threads durante ``duration`` segundos"""
+    import requests
+
+    lock = threading.Lock()
+    latencies, statuses, errors = [], {}, [0]
+    counter = iter(range(10 ** 9))
+    sessions = []
+    for _ in range(concurrency):
+        session = requests.Session()
+        # O login é feito uma vez, fora da medição (o hash da senha é caro de propósito)
+        if scenario.get('auth'):
+            session.cookies.update(cookies)
+        sessions.append(session)
+    deadline = time.monotonic() + duration
+
+    def worker(session):
+        while time.monotonic() < deadline:
+            with lock:
+                n = next(counter)
+            start = time.perf_counter()
+            try:
+                response = scenario['request'](session, base_url, n)
+                response.content
+                elapsed = time.perf_counter() - start
+                failed = response.status_code >= 400
+                status = str(response.status_code)
+            except requests.RequestException:
+                elapsed, failed, status = time.perf_counter() - start, True, 'exception'
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if failed:
+                    errors[0] += 1
+                else:
+                    latencies.append(elapsed)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(worker, session) for session in sessions]:
+            future.result()
+    return summarize(latencies, statuses, errors[0], time.monotonic() - started)
+
+
+def build_scenarios(base_url, pages_url, upload_size):
+    import requests
+
+    probe = requests.Session()
+    probe.post(f'{base_url}/api/auth/login', json=ADMIN).raise_for_status()
+    pdfs = probe.get(f'{base_url}/api/portfolio/pdfs').json()
+    blob_url = pdfs[0]['blob_url'] if pdfs else None
+    legacy_url = pdfs[0]['url'] if pdfs else None
+    asset = next((name for name in sorted(os.listdir(os.path.join(ROOT, 'src', 'static', 'assets')))
+                  if name.endswith('.js')), None)
+
+    def upload(path, field, extra=None):
+        def send(session, base, n):
+            files = {field: (f'bench-{n}.pdf', make_pdf(f'upload-{time.time_ns()}-{n}', upload_size), 'application/pdf')}
+            return session.post(f'{base}{path}', files=files, data=extra or {})
+        return send
+
+    scenarios = {
+        'links_list': {'request': lambda s, b, n: s.get(f'{b}/api/portfolio/links')},
+        'links_list_revalidate': {'request': lambda s, b, n: s.get(
+            f'{b}/api/portfolio/links', headers={'If-None-Match': s.get(f'{b}/api/portfolio/links').headers.get('ETag', '')})},
+        'links_page': {'request': lambda s, b, n: s.get(f'{b}/api/portfolio/links?limit=20')},
+        'pdfs_list': {'request': lambda s, b, n: s.get(f'{b}/api/portfolio/pdfs')},
+        'index_html': {'request': lambda s, b, n: s.get(f'{b}/', headers={'Accept-Encoding': 'gzip, br'})},
+        'upload_pdf': {'auth': True, 'request': upload('/api/upload/pdf', 'pdf_file')},
+        'upload_standalone_pdf': {'auth': True, 'request': upload('/api/pdfs/standalone', 'pdf', {'title': 'Bench'})},
+        'upload_portfolio_pdf': {'auth': True, 'request': upload('/api/portfolio/pdfs', 'pdf', {'title': 'Bench'})},
+        'add_link_with_metadata': {'auth': True, 'request': lambda s, b, n: s.post(
+            f'{b}/api/portfolio/links', json={'url': f'{pages_url}/page/{time.time_ns()}-{n}'})},
+    }
+    if asset:
+        scenarios['static_asset'] = {'request': lambda s, b, n: s.get(f'{b}/assets/{asset}', headers={'Accept-Encoding': 'gzip, br'})}
+    if blob_url:
+        scenarios['pdf_download'] = {'request': lambda s, b, n: s.get(f'{b}{blob_url}')}
+        scenarios['pdf_range'] = {'request': lambda s, b, n: s.get(f'{b}{blob_url}', headers={'Range': 'bytes=0-16383'})}
+        scenarios['pdf_legacy_url'] = {'request': lambda s, b, n: s.get(f'{b}{legacy_url}')}
+    return scenarios, probe.cookies
+
+
+def measure_startup(runs):
+    """Cold start de um worker: cada rodada é um processo Python novo.
+
+    A primeira rodada encontra o banco vazio (bootstrap completo, com o hash da
+    senha do admin); as seguintes, o banco já pronto, como num restart.
+    """
+    workdir = tempfile.mkdtemp(prefix='benchmark-startup-')
+    samples = []
+    try:
+        for _ in range(runs):
+            start = time.perf_counter()
+            output = subprocess.check_output(
+                [sys.executable, os.path.abspath(__file__), '--startup-probe', '--workdir', workdir], text=True)
+            sample = json.loads(output.strip().splitlines()[-1])
+            sample['process_ms'] = (time.perf_counter() - start) * 1000
+            samples.append(sample)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    warm = samples[1:] or samples
+    result = {name: round(percentile([s[name] for s in warm], 0.5), 1) for name in warm[0]}
+    result['bootstrap_empty_db_ms'] = round(samples[0]['bootstrap_ms'], 1)
+    result['runs'] = runs
+    print(f"Startup: import {result['import_ms']} ms, bootstrap {result['bootstrap_ms']} ms "
+          f"(banco vazio: {result['bootstrap_empty_db_ms']} ms), 1ª requisição API {result['first_api_request_ms']} ms, "
+          f"1ª página {result['first_page_request_ms']} ms, processo {result['process_ms']} ms")
+    return result
+
+
+def wait_for(url, process, timeout=60):
+    import requests
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit('❌ O servidor terminou antes de responder')
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise SystemExit('❌ O servidor não respondeu a tempo')
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark(args):
+    startup = measure_startup(args.startup_runs) if args.startup_runs else None
+
+    workdir = tempfile.mkdtemp(prefix='benchmark-')
+    pages = ThreadingHTTPServer(('127.0.0.1', 0), SyntheticPages)
+    threading.Thread(target=pages.serve_forever, daemon=True).start()
+    pages_url = f'http://127.0.0.1:{pages.server_address[1]}'
+
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    command = [sys.executable, os.path.abspath(__file__), '--serve', '--workdir', workdir, '--port', str(port),
+               '--links', str(args.links), '--pdfs', str(args.pdfs), '--pdf-size', str(args.pdf_size),
+               '--server', args.server, '--workers', str(args.workers), '--threads', str(args.threads)]
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    sampler = RssSampler(server.pid)
+    results = {}
+    try:
+        wait_for(f'{base_url}/api/portfolio/links', server)
+        sampler.start()
+        scenarios, cookies = build_scenarios(base_url, pages_url, args.upload_size)
+        selected = args.only.split(',') if args.only else list(scenarios)
+        for name in selected:
+            if name not in scenarios:
+                print(f"⚠️  Cenário desconhecido: {name}")
+                continue
+            result = run_scenario(base_url, scenarios[name], args.concurrency, args.duration, cookies)
+            results[name] = result
+            print(f"{name:<26} {result['throughput_rps']:>9} req/s  p50 {result['p50_ms']} ms  "
+                  f"p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms  erros {result['errors']}")
+    finally:
+        sampler.stop()
+        server.terminate()
+        server.wait()
+        pages.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    peak_rss = sampler.peak or resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': {k: v for k, v in vars(args).items() if k not in ('serve', 'startup_probe', 'workdir', 'port', 'compare')},
+        },
+        'server': {'peak_rss_mb': round(peak_rss / 1024 / 1024, 1)},
+        'startup': startup,
+        'scenarios': results,
+    }
+    print(f"Pico de RSS do servidor: {report['server']['peak_rss_mb']} MB")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{report['meta']['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Resultado salvo em {output}")
+
+
+def compare(old_path, new_path, threshold):
+    """Compara dois resultados; sai com código 1 se algum p95 (ou o cold start) piorou além do limite"""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    print(f"{'cenário':<26} {'req/s':>18} {'p95 (ms)':>20}")
+    regressions = []
+    for name, result in new['scenarios'].items():
+        before = old['scenarios'].get(name)
+        if not before:
+            print(f"{name:<26} (novo)")
+            continue
+        rps = f"{before['throughput_rps']} → {result['throughput_rps']}"
+        p95 = f"{before['p95_ms']} → {result['p95_ms']}"
+        flag = ''
+        if before['p95_ms'] and result['p95_ms'] and result['p95_ms'] > before['p95_ms'] * (1 + threshold / 100):
+            flag = '  ❌'
+            regressions.append(name)
+        print(f"{name:<26} {rps:>18} {p95:>20}{flag}")
+    print(f"Pico de RSS: {old['server']['peak_rss_mb']} → {new['server']['peak_rss_mb']} MB")
+    if old.get('startup') and new.get('startup'):
+        for name in ('import_ms', 'first_api_request_ms'):
+            before, after = old['startup'][name], new['startup'][name]
+            flag = ''
+            if after > before * (1 + threshold / 100):
+                flag = '  ❌'
+                regressions.append(f'startup.{name}')
+            print(f"Startup {name}: {before} → {after}{flag}")
+
+    if regressions:
+        print(f"❌ Piorou mais de {threshold}% em: {', '.join(regressions)}")
+        sys.exit(1)
+    print("✅ Sem regressões")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark / teste de carga da API')
+    parser.add_argument('--links', type=int, default=500, help='links semeados')
+    parser.add_argument('--pdfs', type=int, default=50, help='PDFs semeados')
+    parser.add_argument('--pdf-size', type=int, default=256 * 1024, help='tamanho (bytes) dos PDFs semeados')
+    parser.add_argument('--upload-size', type=int, default=256 * 1024, help='tamanho (bytes) dos PDFs enviados')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5, help='segundos por cenário')
+    parser.add_argument('--only', help='cenários separados por vírgula')
+    parser.add_argument('--server', choices=('werkzeug', 'gunicorn'), default='werkzeug')
+    parser.add_argument('--workers', type=int, default=2, help='workers do gunicorn')
+    parser.add_argument('--threads', type=int, default=4, help='threads por worker do gunicorn')
+    parser.add_argument('--startup-runs', type=int, default=3, help='processos novos para medir o cold start (0 desliga)')
+    parser.add_argument('--output', help='arquivo JSON do resultado')
+    parser.add_argument('--compare', nargs=2, metavar=('ANTIGO', 'NOVO'))
+    parser.add_argument('--threshold', type=float, default=20, help='piora tolerada no p95 (%%)')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--startup-probe', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare, args.threshold)
+    elif args.serve:
+        serve(args)
+    elif args.startup_probe:
+        startup_probe(args)
+    else:
+        benchmark(args)
+
+
+if __name__ == '__main__':
+    main()
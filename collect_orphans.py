@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Coleta os PDFs que nenhum registro usa: temporários abandonados, uploads avulsos
+sem link e arquivos sem dono vão para a quarentena e são apagados depois do prazo
+
+Uso: python collect_orphans.py [--dry-run] [--release SHA256]
+"""
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.main import app
+from src.utils import orphans
+from src.utils.bootstrap import bootstrap
+
+def megabytes(size):
+    return f"{size / 1024 / 1024:.1f} MB"
+
+def collect_orphans():
+    parser = argparse.ArgumentParser(description='Coleta de PDFs sem dono')
+    parser.add_argument('--dry-run', action='store_true', help='só mede, sem mover ou apagar nada')
+    parser.add_argument('--release', metavar='SHA256', help='devolve um arquivo da quarentena como upload avulso')
+    args = parser.parse_args()
+
+    # Scripts avulsos não passam pelo gunicorn: garantem o schema por conta própria
+    bootstrap(app, verbose=False)
+    with app.app_context():
+        if args.release:
+            upload = orphans.release(args.release)
+            if upload is None:
+                print(f"❌ {args.release} não está na quarentena")
+                sys.exit(1)
+            print(f"✅ Restaurado em /uploads/pdfs/{upload.filename}")
+            return
+        report = orphans.collect_orphans(dry_run=args.dry_run)
+
+    print(f"📦 Armazenamento: {report['files']} arquivo(s), {megabytes(report['bytes'])}")
+    print(f"🗑️  Temporários abandonados: {report['temp_files']} ({megabytes(report['temp_bytes'])})")
+    print(f"🔗 Uploads avulsos sem link: {report['unlinked_uploads']} ({megabytes(report['unlinked_bytes'])})")
+    print(f"🚧 {'Sem dono' if args.dry_run else 'Movidos para a quarentena'}: {report['orphans']} ({megabytes(report['orphan_bytes'])})")
+    print(f"⏳ Na quarentena: {report['quarantined']} ({megabytes(report['quarantined_bytes'])})")
+    print(f"✅ {'Prazo vencido' if args.dry_run else 'Apagados de vez'}: {report['purged']} ({megabytes(report['purged_bytes'])})")
+    print(f"💾 Espaço recuperável: {megabytes(report['reclaimable_bytes'])}")
+
+if __name__ == '__main__':
+    collect_orphans()
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Gera as versões gzip/brotli dos arquivos estáticos (rodar no build)
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.utils.static_files import compress_tree, brotli
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'static')
+
+def compress_static():
+    written = compress_tree(STATIC_FOLDER)
+    for relpath in written:
+        print(f"✅ {relpath}")
+    if brotli is None:
+        print("⚠️  Módulo brotli não instalado: apenas gzip foi gerado")
+
+if __name__ == '__main__':
+    compress_static()
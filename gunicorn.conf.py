@@ -0,0 +1,27 @@
+"""
+Configuração do gunicorn (lida automaticamente de ./gunicorn.conf.py)
+
+O schema, a migração de arquivos e o admin padrão são preparados uma única vez
+no processo mestre, antes do fork; os workers herdam o app já importado e
+começam a atender sem tocar no banco. Cada worker liga, depois do fork, a
+thread que devolve à fila de metadados os links que um worker anterior
+deixou em 'pending'.
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def on_starting(server):
+    from src.main import app
+    from src.utils.bootstrap import bootstrap
+
+    report = bootstrap(app)
+    server.log.info(f"Bootstrap concluído em {report['seconds']}s")
+
+
+def post_fork(server, worker):
+    from src.main import app
+    from src.routes.portfolio import start_metadata_sweeper
+
+    start_metadata_sweeper(app)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Importa links em massa para o portfólio a partir de um arquivo JSON, CSV ou
+favoritos HTML exportado do navegador
+
+Uso: python import_links.py favoritos.html [--format html] [--include-existing] [--timeout 60]
+"""
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.main import app
+from src.utils.bootstrap import bootstrap
+from src.routes.link_import import IMPORT_TIMEOUT, iter_import, summarize
+from src.utils.link_import import FORMATS, guess_format, parse_entries
+
+def import_links():
+    parser = argparse.ArgumentParser(description='Importa links em massa para o portfólio')
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=FORMATS)
+    parser.add_argument('--include-existing', action='store_true', help='importa também URLs que já estão no portfólio')
+    parser.add_argument('--timeout', type=float, default=max(IMPORT_TIMEOUT, 60), help='tempo máximo (s) para buscar os metadados (sem o limite do gunicorn)')
+    args = parser.parse_args()
+
+    # Scripts avulsos não passam pelo gunicorn: garantem o schema por conta própria
+    bootstrap(app, verbose=False)
+
+    with open(args.path, encoding='utf-8', errors='replace') as f:
+        text = f.read()
+    entries = parse_entries(text, args.format or guess_format(args.path, text=text))
+    print(f"🔗 {len(entries)} link(s) encontrados")
+
+    results = []
+    with app.app_context():
+        for result in iter_import(entries, skip_existing=not args.include_existing, timeout=args.timeout):
+            results.append(result)
+            icon = '✅' if result['status'] == 'created' and not result['error'] else '⚠️' if result['status'] != 'invalid' else '❌'
+            detail = f" ({result['error']})" if result['error'] else ''
+            print(f"[{len(results)}/{len(entries)}] {icon} {result['url']}{detail}")
+
+    summary = summarize(results)
+    print(f"✅ Criados: {summary['created']} (sem metadados: {summary['metadata_failed']})")
+    print(f"⏭️  Já existentes: {summary['skipped']}")
+    print(f"❌ Inválidos: {summary['invalid']}")
+
+if __name__ == '__main__':
+    import_links()
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Reconstrói o catálogo de PDFs (pdf_uploads/blobs) a partir dos arquivos em disco
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.main import app
+from src.utils.bootstrap import bootstrap
+from src.utils.catalog import reconcile_catalog
+
+def reconcile_uploads():
+    # Scripts avulsos não passam pelo gunicorn: garantem o schema por conta própria
+    bootstrap(app, verbose=False)
+    adopt = '--no-adopt' not in sys.argv[1:]
+    with app.app_context():
+        report = reconcile_catalog(adopt_orphans=adopt)
+
+    print(f"✅ Arquivos importados das pastas antigas: {report['imported_legacy']}")
+    print(f"✅ Arquivos sem dono adicionados ao catálogo: {report['adopted']}")
+    print(f"✅ Entradas sem arquivo removidas: {report['missing_removed']}")
+    print(f"✅ Contagens de referência corrigidas: {report['refcounts_fixed']}")
+    print(f"✅ PDFs inspecionados: {report['inspected']}")
+
+if __name__ == '__main__':
+    reconcile_uploads()
@@ -6,8 +6,11 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from src.models.user import db
 from src.models.admin import Admin
 from src.main import app
+from src.utils.bootstrap import bootstrap
 
 def reset_admin():
+    # Scripts avulsos não passam pelo gunicorn: garantem o schema por conta própria
+    bootstrap(app, verbose=False)
     with app.app_context():
         # Remove todos os admins existentes
         Admin.query.delete()
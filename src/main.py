@@ -3,101 +3,116 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask
 from flask_cors import CORS
-from src.models.user import db
-from src.models.portfolio import PortfolioLink
-from src.models.admin import Admin
+from werkzeug.middleware.proxy_fix import ProxyFix
 from src.routes.user import user_bp
-from src.routes.portfolio import portfolio_bp
+from src.routes.portfolio import portfolio_bp, public_links, start_metadata_sweeper
 from src.routes.auth import auth_bp
 from src.routes.pdf_upload import pdf_upload_bp
 from src.routes.pdf_standalone import pdf_standalone_bp
-from src.routes.portfolio_pdfs import portfolio_pdfs_bp
-
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
-CORS(app, supports_credentials=True)
-
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(portfolio_bp, url_prefix='/api')
-app.register_blueprint(auth_bp, url_prefix='/api')
-app.register_blueprint(pdf_upload_bp, url_prefix='/api')
-app.register_blueprint(pdf_standalone_bp, url_prefix='/api')
-app.register_blueprint(portfolio_pdfs_bp, url_prefix='/api')
-
-# uncomment if you need to use database
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-with app.app_context():
-    db.create_all()
-    
-    # Cria admin padrão se não existir
-    existing_admin = Admin.query.first()
-    if not existing_admin:
-        admin = Admin(username='diego')
-        admin.set_password('diego123')
-        db.session.add(admin)
-        db.session.commit()
-        print("✅ Admin criado: diego / diego123")
-
-@app.route('/admin')
-def admin_panel():
-    """Rota específica para o painel administrativo"""
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-        return "Static folder not configured", 404
-    
-    admin_path = os.path.join(static_folder_path, 'admin-v2.html')
-    if os.path.exists(admin_path):
-        return send_from_directory(static_folder_path, 'admin-v2.html')
-    else:
-        return "admin-v2.html not found", 404
-
-@app.route('/login')
-def login_page():
-    """Rota para página de login"""
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-        return "Static folder not configured", 404
-    
-    admin_path = os.path.join(static_folder_path, 'admin-v2.html')
-    if os.path.exists(admin_path):
-        return send_from_directory(static_folder_path, 'admin-v2.html')
-    else:
-        return "admin-v2.html not found", 404
-
-@app.route('/')
-def home():
-    """Rota para a landing page principal"""
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-        return "Static folder not configured", 404
-    
-    index_path = os.path.join(static_folder_path, 'index.html')
-    if os.path.exists(index_path):
-        return send_from_directory(static_folder_path, 'index.html')
-    else:
-        return "index.html not found", 404
-
-@app.route('/<path:path>')
-def serve_static(path):
-    """Serve arquivos estáticos"""
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-        return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        # Para rotas não encontradas, redireciona para a landing page
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
+from src.routes.portfolio_pdfs import portfolio_pdfs_bp, public_pdfs
+from src.routes.portfolio_batch import portfolio_batch_bp
+from src.routes.link_import import link_import_bp
+from src.routes.pdf_files import pdf_files_bp
+from src.routes.changes import changes_bp
+from src.routes.analytics import analytics_bp
+from src.routes.backup import backup_bp
+from src.routes.storage import storage_bp
+from src.utils import analytics, compression, metrics, orphans, prerender, response_cache
+from src.utils.bootstrap import bootstrap
+from src.utils.database import init_database
+from src.utils.static_files import StaticIndex
+from src.utils.uploads import UploadRequest, MAX_CONTENT_LENGTH
+
+def create_app():
+    """Monta o app (configuração, blueprints e rotas) sem tocar no banco.
+
+    Criar tabelas, migrar arquivos antigos e o admin padrão é feito uma vez
+    por deploy em ``bootstrap`` (gunicorn.conf.py / init_db.py), não em cada
+    worker.
+    """
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
+    # Uploads em streaming: corpos acima do limite são recusados antes de serem lidos
+    app.request_class = UploadRequest
+    app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
+    CORS(app, supports_credentials=True)
+    # Atrás do proxy do Render (TRUSTED_PROXIES=1) o IP do cliente vem do X-Forwarded-For
+    trusted_proxies = int(os.environ.get('TRUSTED_PROXIES', 0))
+    if trusted_proxies:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxies, x_proto=trusted_proxies)
+
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(portfolio_bp, url_prefix='/api')
+    app.register_blueprint(auth_bp, url_prefix='/api')
+    app.register_blueprint(pdf_upload_bp, url_prefix='/api')
+    app.register_blueprint(pdf_standalone_bp, url_prefix='/api')
+    app.register_blueprint(portfolio_pdfs_bp, url_prefix='/api')
+    app.register_blueprint(portfolio_batch_bp, url_prefix='/api')
+    app.register_blueprint(link_import_bp, url_prefix='/api')
+    app.register_blueprint(changes_bp, url_prefix='/api')
+    app.register_blueprint(analytics_bp, url_prefix='/api')
+    app.register_blueprint(backup_bp, url_prefix='/api')
+    app.register_blueprint(storage_bp, url_prefix='/api')
+    app.register_blueprint(pdf_files_bp)
+
+    # Banco: DATABASE_URL ou o SQLite local (em WAL, com busy timeout)
+    init_database(app)
+    # Métricas no formato do Prometheus em /metrics
+    metrics.init_app(app)
+    # Visualizações e downloads somados em memória e gravados em lote
+    analytics.init_app(app)
+    # Coleta periódica de PDFs sem dono (ORPHAN_GC_INTERVAL)
+    orphans.init_app(app)
+    # gzip/brotli nas respostas JSON (registrado depois das métricas: elas medem o corpo comprimido)
+    compression.init_app(app)
+
+    # Índice em memória da pasta static (sem os.path.exists por requisição)
+    static_files = StaticIndex(app.static_folder)
+
+    # Landing page com o portfólio embutido (PRERENDER_INDEX=1): uma requisição até o conteúdo
+    index_page = prerender.PrerenderedIndex(static_files, {
+        '/api/portfolio/links': (response_cache.PORTFOLIO_LINKS, public_links),
+        '/api/portfolio/pdfs': (response_cache.PORTFOLIO_PDFS, public_pdfs),
+    })
+
+    def send_index():
+        if prerender.ENABLED:
+            return index_page.send()
+        return static_files.send('index.html')
+
+    @app.route('/admin')
+    def admin_panel():
+        """Rota específica para o painel administrativo"""
+        return static_files.send('admin-v2.html') or ("admin-v2.html not found", 404)
+
+    @app.route('/login')
+    def login_page():
+        """Rota para página de login"""
+        return static_files.send('admin-v2.html') or ("admin-v2.html not found", 404)
+
+    @app.route('/')
+    def home():
+        """Rota para a landing page principal"""
+        return send_index() or ("index.html not found", 404)
+
+    @app.route('/<path:path>')
+    def serve_static(path):
+        """Serve arquivos estáticos"""
+        response = send_index() if path == 'index.html' else static_files.send(path)
+        if response is None:
+            # Para rotas não encontradas, redireciona para a landing page
+            response = send_index()
+        return response or ("index.html not found", 404)
+
+    return app
+
+# Usado por "gunicorn src.main:app" e pelos scripts da raiz
+app = create_app()
 
 
 if __name__ == '__main__':
+    bootstrap(app)
+    start_metadata_sweeper(app)
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -1,19 +1,28 @@
 from src.models.user import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from src.utils import passwords
 from datetime import datetime
 
 class Admin(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
-    password_hash = db.Column(db.String(120), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = passwords.hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """Confere a senha; se o hash usa um KDF/custo antigo, refaz com o atual (sem commit)"""
+        if not passwords.verify_password(self.password_hash, password):
+            return False
+        if passwords.needs_rehash(self.password_hash):
+            try:
+                self.set_password(password)
+            except passwords.PoolBusy:
+                # A senha está certa: fica o hash antigo, refeito num próximo login
+                pass
+        return True
 
     def __repr__(self):
         return f'<Admin {self.username}>'
@@ -0,0 +1,17 @@
+from src.models.user import db
+
+class DailyCount(db.Model):
+    """Total de acessos de um item num dia (agregado pelo buffer de analytics)"""
+    __tablename__ = 'analytics_daily'
+
+    day = db.Column(db.Date, primary_key=True)
+    entity = db.Column(db.String(30), primary_key=True)  # portfolio_pdf, standalone_pdf, pdf_upload, link
+    item_id = db.Column(db.Integer, primary_key=True)
+    event = db.Column(db.String(20), primary_key=True)  # view, download, visit
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DailyCount {self.day} {self.entity}:{self.item_id} {self.event}={self.count}>'
+
+# Top N e séries por entidade/evento filtram por período
+db.Index('ix_analytics_daily_entity_event_day', DailyCount.entity, DailyCount.event, DailyCount.day)
@@ -0,0 +1,22 @@
+from src.models.user import db
+from datetime import datetime
+
+class Blob(db.Model):
+    """Conteúdo de um PDF armazenado uma única vez, identificado pelo SHA-256"""
+    __tablename__ = 'blobs'
+
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.Integer, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Blob {self.sha256[:12]} refs={self.ref_count}>'
+
+    def to_dict(self):
+        return {
+            'sha256': self.sha256,
+            'size': self.size,
+            'ref_count': self.ref_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -0,0 +1,98 @@
+from src.models.user import db
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import hashlib
+import os
+
+# Validade dos metadados antes de revalidar com o site (segundos)
+METADATA_CACHE_TTL = int(os.environ.get('METADATA_CACHE_TTL', 7 * 24 * 3600))
+# Número máximo de URLs guardadas; as menos usadas saem primeiro
+METADATA_CACHE_SIZE = int(os.environ.get('METADATA_CACHE_SIZE', 1000))
+
+def normalize_url(url):
+    """Normaliza a URL para usar como chave do cache"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    port = parts.port
+    if port and not ((scheme == 'http' and port == 80) or (scheme == 'https' and port == 443)):
+        host = f'{host}:{port}'
+    path = parts.path or '/'
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ''))
+
+class MetadataCache(db.Model):
+    __tablename__ = 'metadata_cache'
+
+    key = db.Column(db.String(64), primary_key=True)
+    url = db.Column(db.Text, nullable=False)
+    title = db.Column(db.Text)
+    description = db.Column(db.Text)
+    image_url = db.Column(db.Text)
+    etag = db.Column(db.String(255))
+    last_modified = db.Column(db.String(64))
+    fetched_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<MetadataCache {self.url}>'
+
+    @staticmethod
+    def key_for(url):
+        return hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+
+    @classmethod
+    def lookup(cls, url):
+        return db.session.get(cls, cls.key_for(url))
+
+    def is_fresh(self):
+        return self.fetched_at is not None and \
+               datetime.utcnow() - self.fetched_at < timedelta(seconds=METADATA_CACHE_TTL)
+
+    def validators(self):
+        """Cabeçalhos para revalidação condicional"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_metadata(self):
+        return {
+            'title': self.title,
+            'description': self.description,
+            'image_url': self.image_url
+        }
+
+    @classmethod
+    def store(cls, url, metadata, etag=None, last_modified=None, evict=True):
+        """Grava (ou atualiza) a entrada e remove as menos usadas além do limite.
+
+        Quem grava várias entradas de uma vez passa ``evict=False`` e chama
+        ``evict`` uma vez no fim.
+        """
+        now = datetime.utcnow()
+        entry = cls.lookup(url)
+        if entry is None:
+            entry = cls(key=cls.key_for(url), url=normalize_url(url))
+            db.session.add(entry)
+        entry.title = metadata['title']
+        entry.description = metadata['description']
+        entry.image_url = metadata['image_url']
+        entry.etag = etag
+        entry.last_modified = last_modified
+        entry.fetched_at = now
+        entry.last_used_at = now
+        db.session.flush()
+        if evict:
+            cls.evict()
+        return entry
+
+    @classmethod
+    def evict(cls):
+        excess = cls.query.count() - METADATA_CACHE_SIZE
+        if excess <= 0:
+            return
+        oldest = db.session.query(cls.key).order_by(cls.last_used_at.asc()).limit(excess).subquery()
+        cls.query.filter(cls.key.in_(db.select(oldest.c.key))).delete(synchronize_session=False)
@@ -0,0 +1,53 @@
+from src.models.user import db
+from src.utils import blob_store
+from src.utils.pdf_inspect import inspect_pdf
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PdfInfoMixin:
+    """Informações lidas do PDF no upload (páginas, versão, título embutido...)"""
+
+    page_count = db.Column(db.Integer)
+    pdf_version = db.Column(db.String(10))
+    pdf_title = db.Column(db.String(500))
+    pdf_author = db.Column(db.String(255))
+    linearized = db.Column(db.Boolean)
+    encrypted = db.Column(db.Boolean)
+    inspected_at = db.Column(db.DateTime)
+    # Motivo da falha na última inspeção (com ``inspected_at`` preenchido: não é refeita a cada boot)
+    inspect_error = db.Column(db.String(255))
+
+    def inspect_blob(self):
+        """Lê o cabeçalho, o trailer e o /Info do blob (poucos KB, não o arquivo todo)"""
+        try:
+            info = inspect_pdf(blob_store.blob_path(self.sha256)) if self.sha256 else {}
+        except Exception as e:
+            # PDF ilegível não impede o upload nem o boot: a tentativa fica
+            # registrada e o inspect_pending não lê o mesmo arquivo de novo
+            logger.warning('Falha ao inspecionar o PDF %s: %s', self.sha256, e)
+            self.inspect_error = (str(e) or type(e).__name__)[:255]
+            self.inspected_at = datetime.utcnow()
+            return
+        self.inspect_error = None
+        self.page_count = info.get('page_count')
+        self.pdf_version = info.get('pdf_version')
+        self.pdf_title = (info.get('pdf_title') or '')[:500] or None
+        self.pdf_author = (info.get('pdf_author') or '')[:255] or None
+        self.linearized = info.get('linearized')
+        self.encrypted = info.get('encrypted')
+        self.inspected_at = datetime.utcnow()
+
+
+def pdf_info_dict(row):
+    """Campos do PdfInfoMixin de um objeto ou de uma linha só com colunas"""
+    return {
+        'page_count': row.page_count,
+        'pdf_version': row.pdf_version,
+        'pdf_title': row.pdf_title,
+        'pdf_author': row.pdf_author,
+        'linearized': row.linearized,
+        'encrypted': row.encrypted,
+        'inspect_error': row.inspect_error
+    }
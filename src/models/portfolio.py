@@ -1,6 +1,12 @@
 from src.models.user import db
+from src.models.tombstone import track_deletions
 from datetime import datetime
 
+# Estados da extração de metadados em segundo plano
+METADATA_PENDING = 'pending'
+METADATA_DONE = 'done'
+METADATA_FAILED = 'failed'
+
 class PortfolioLink(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -9,7 +15,9 @@ class PortfolioLink(db.Model):
     image_url = db.Column(db.String(500), nullable=True)
     pdf_url = db.Column(db.String(500), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
+    metadata_status = db.Column(db.String(20), default=METADATA_DONE, server_default=METADATA_DONE)
 
     def __repr__(self):
         return f'<PortfolioLink {self.title}>'
@@ -23,5 +31,14 @@ class PortfolioLink(db.Model):
             'image_url': self.image_url,
             'pdf_url': self.pdf_url,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'is_active': self.is_active
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'is_active': self.is_active,
+            'metadata_status': self.metadata_status or METADATA_DONE
         }
+
+# Índices na mesma ordem das listagens (pública e administrativa)
+db.Index('ix_portfolio_link_active_created', PortfolioLink.is_active, PortfolioLink.created_at.desc(), PortfolioLink.id.desc())
+db.Index('ix_portfolio_link_created', PortfolioLink.created_at.desc(), PortfolioLink.id.desc())
+# Feed de alterações (/api/changes)
+db.Index('ix_portfolio_link_updated', PortfolioLink.updated_at)
+track_deletions(PortfolioLink, 'links')
@@ -0,0 +1,31 @@
+from src.models.user import db
+from datetime import datetime
+
+# Motivos da quarentena
+UNLINKED_UPLOAD = 'unlinked_upload'  # upload avulso que nenhum link usa mais
+UNREFERENCED = 'unreferenced'        # arquivo sem nenhum registro (ex.: commit que falhou)
+
+class QuarantinedFile(db.Model):
+    """Blob sem dono tirado do armazenamento; apagado de vez depois do prazo de carência"""
+    __tablename__ = 'quarantined_files'
+
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String(30), nullable=False)
+    # Nome público do upload avulso removido, para restaurar com a mesma URL
+    filename = db.Column(db.String(255))
+    original_name = db.Column(db.String(255))
+    quarantined_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<QuarantinedFile {self.sha256[:12]} {self.reason}>'
+
+    def to_dict(self):
+        return {
+            'sha256': self.sha256,
+            'size': self.size,
+            'reason': self.reason,
+            'filename': self.filename,
+            'original_name': self.original_name,
+            'quarantined_at': self.quarantined_at.isoformat() if self.quarantined_at else None
+        }
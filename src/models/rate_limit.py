@@ -0,0 +1,13 @@
+from src.models.user import db
+
+class RateLimitBucket(db.Model):
+    """Balde de tokens de um limite (ex.: "login-ip:1.2.3.4"), compartilhado entre workers"""
+    __tablename__ = 'rate_limit_buckets'
+
+    key = db.Column(db.String(255), primary_key=True)
+    tokens = db.Column(db.Float, nullable=False)
+    # time.time() da última recarga
+    updated_at = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        return f'<RateLimitBucket {self.key} tokens={self.tokens:.2f}>'
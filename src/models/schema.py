@@ -0,0 +1,36 @@
+from sqlalchemy import inspect, text
+from src.models.user import db
+
+
+def _default_sql(column):
+    """Converte o server_default de uma coluna em SQL"""
+    arg = column.server_default.arg
+    if isinstance(arg, str):
+        return "'" + arg.replace("'", "''") + "'"
+    return str(arg.compile(dialect=db.engine.dialect))
+
+
+def upgrade_schema():
+    """Adiciona colunas e índices novos em tabelas que já existem.
+
+    O ``db.create_all()`` só cria tabelas inexistentes; bancos criados por
+    versões anteriores precisam receber as colunas novas via ALTER TABLE.
+    """
+    inspector = inspect(db.engine)
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=db.engine.dialect)}'
+                if column.server_default is not None:
+                    ddl += f' DEFAULT {_default_sql(column)}'
+                conn.execute(text(ddl))
+                print(f"✅ Coluna adicionada: {table.name}.{column.name}")
+
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
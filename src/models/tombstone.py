@@ -0,0 +1,44 @@
+from src.models.user import db
+from sqlalchemy import event
+from datetime import datetime, timedelta
+import os
+
+# Por quanto tempo as remoções continuam visíveis no /api/changes
+TOMBSTONE_DAYS = int(os.environ.get('TOMBSTONE_DAYS', 30))
+# Lápide especial: tokens do /api/changes anteriores a ela recarregam tudo
+RESET_ENTITY = '*'
+
+class Tombstone(db.Model):
+    """Registro de uma linha removida, para o feed de alterações (/api/changes)"""
+    __tablename__ = 'tombstones'
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(50), nullable=False)
+    item_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<Tombstone {self.entity}:{self.item_id}>'
+
+def track_deletions(model, entity):
+    """Grava uma lápide, na mesma transação, sempre que o ORM remove uma linha de ``model``"""
+    def after_delete(mapper, connection, target):
+        connection.execute(Tombstone.__table__.insert().values(
+            entity=entity, item_id=target.id, deleted_at=datetime.utcnow()))
+    event.listen(model, 'after_delete', after_delete)
+
+def mark_reset():
+    """Invalida os tokens do /api/changes emitidos até agora (sem commit).
+
+    Para alterações feitas fora do ORM (restauração de cópia, DELETE em
+    massa), que não passam pelo ``after_delete`` e não deixam lápides.
+    """
+    db.session.execute(Tombstone.__table__.insert().values(
+        entity=RESET_ENTITY, item_id=0, deleted_at=datetime.utcnow()))
+
+def prune_tombstones(days=TOMBSTONE_DAYS):
+    """Apaga lápides mais antigas que ``days`` dias; retorna quantas"""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    deleted = Tombstone.query.filter(Tombstone.deleted_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
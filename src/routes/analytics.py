@@ -0,0 +1,100 @@
+from flask import Blueprint, request, jsonify
+from src.models.analytics import DailyCount
+from src.models.portfolio import PortfolioLink, db
+from src.routes.auth import login_required
+from src.routes.pdf_standalone import StandalonePDF
+from src.routes.pdf_upload import PdfUpload
+from src.routes.portfolio_pdfs import PortfolioPDF
+from src.utils import analytics
+from datetime import datetime, timedelta
+
+analytics_bp = Blueprint('analytics', __name__)
+
+# Entidade -> (modelo, coluna com o nome exibido)
+ENTITIES = {
+    'portfolio_pdf': (PortfolioPDF, PortfolioPDF.title),
+    'standalone_pdf': (StandalonePDF, StandalonePDF.title),
+    'pdf_upload': (PdfUpload, PdfUpload.original_name),
+    'link': (PortfolioLink, PortfolioLink.title),
+}
+EVENTS = ('view', 'download', 'visit')
+MAX_DAYS = 366
+MAX_LIMIT = 100
+
+def period_params():
+    """Valida entity, event e days da query string; retorna (params, erro)"""
+    entity = request.args.get('entity')
+    event = request.args.get('event', 'view')
+    days = request.args.get('days', 30, type=int)
+    if entity is not None and entity not in ENTITIES:
+        return None, (jsonify({'error': f'entity deve ser um de: {", ".join(ENTITIES)}'}), 400)
+    if event not in EVENTS:
+        return None, (jsonify({'error': f'event deve ser um de: {", ".join(EVENTS)}'}), 400)
+    days = max(1, min(days, MAX_DAYS))
+    return (entity, event, datetime.utcnow().date() - timedelta(days=days - 1)), None
+
+@analytics_bp.route('/analytics/top', methods=['GET'])
+@login_required
+def top_items():
+    """Itens mais acessados no período (?entity=&event=view&days=30&limit=10)"""
+    params, error = period_params()
+    if error:
+        return error
+    entity, event, start = params
+    limit = max(1, min(request.args.get('limit', 10, type=int), MAX_LIMIT))
+
+    # O buffer deste worker entra na conta; o dos outros chega na próxima gravação
+    analytics.flush()
+    total = db.func.sum(DailyCount.count).label('total')
+    query = db.session.query(DailyCount.entity, DailyCount.item_id, total).filter(
+        DailyCount.event == event, DailyCount.day >= start)
+    if entity:
+        query = query.filter(DailyCount.entity == entity)
+    rows = query.group_by(DailyCount.entity, DailyCount.item_id).order_by(total.desc(), DailyCount.item_id).limit(limit).all()
+
+    titles = {}
+    for name in {row.entity for row in rows}:
+        model, title_column = ENTITIES[name]
+        ids = [row.item_id for row in rows if row.entity == name]
+        titles.update({(name, item_id): title for item_id, title in db.session.query(model.id, title_column).filter(model.id.in_(ids))})
+
+    return jsonify({
+        'event': event,
+        'since': start.isoformat(),
+        'items': [
+            {'entity': row.entity, 'id': row.item_id, 'title': titles.get((row.entity, row.item_id)), 'count': int(row.total)}
+            for row in rows
+        ]
+    })
+
+@analytics_bp.route('/analytics/series', methods=['GET'])
+@login_required
+def time_series():
+    """Acessos por dia no período (?entity=&id=&event=view&days=30), com zeros nos dias sem acesso"""
+    params, error = period_params()
+    if error:
+        return error
+    entity, event, start = params
+    item_id = request.args.get('id', type=int)
+    if item_id is not None and entity is None:
+        return jsonify({'error': 'id exige entity'}), 400
+
+    analytics.flush()
+    query = db.session.query(DailyCount.day, db.func.sum(DailyCount.count)).filter(
+        DailyCount.event == event, DailyCount.day >= start)
+    if entity:
+        query = query.filter(DailyCount.entity == entity)
+    if item_id is not None:
+        query = query.filter(DailyCount.item_id == item_id)
+    counts = dict(query.group_by(DailyCount.day).all())
+
+    days = (datetime.utcnow().date() - start).days + 1
+    return jsonify({
+        'entity': entity,
+        'id': item_id,
+        'event': event,
+        'series': [
+            {'day': (start + timedelta(days=i)).isoformat(), 'count': int(counts.get(start + timedelta(days=i), 0))}
+            for i in range(days)
+        ]
+    })
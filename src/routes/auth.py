@@ -1,10 +1,28 @@
 from flask import Blueprint, request, jsonify, session
 from src.models.admin import Admin, db
+from src.utils.passwords import PoolBusy, verify_dummy
+from src.utils.throttle import TokenBucket, parse_rate
 from datetime import datetime
 from functools import wraps
+import math
+import os
 
 auth_bp = Blueprint('auth', __name__)
 
+# Tentativas por IP (toda tentativa conta) e por usuário (só as erradas contam)
+ip_attempts = TokenBucket('login-ip', *parse_rate(os.environ.get('LOGIN_RATE_IP', '10/60')))
+failed_logins = TokenBucket('login-user', *parse_rate(os.environ.get('LOGIN_RATE_USER', '5/300')))
+
+def too_many_attempts(wait):
+    response = jsonify({'error': 'Muitas tentativas. Tente novamente mais tarde.', 'retry_after': math.ceil(wait)})
+    response.headers['Retry-After'] = str(math.ceil(wait))
+    return response, 429
+
+def hashing_busy():
+    response = jsonify({'error': 'Servidor ocupado. Tente novamente em instantes.'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -23,19 +41,33 @@ def login():
     
     username = data['username']
     password = data['password']
+    user_key = str(username).strip().lower()
+    
+    # Recusa antes de calcular qualquer hash
+    wait = ip_attempts.take(request.remote_addr) or failed_logins.retry_after(user_key)
+    if wait:
+        return too_many_attempts(wait)
     
     admin = Admin.query.filter_by(username=username).first()
     
-    if admin and admin.check_password(password):
+    try:
+        # Usuário inexistente custa o mesmo hash: o tempo não revela quem existe
+        valid = admin.check_password(password) if admin is not None else verify_dummy(password)
+    except PoolBusy:
+        return hashing_busy()
+    
+    if valid:
         session['admin_id'] = admin.id
         admin.last_login = datetime.utcnow()
         db.session.commit()
+        failed_logins.reset(user_key)
         
         return jsonify({
             'message': 'Login realizado com sucesso',
             'admin': admin.to_dict()
         })
     else:
+        failed_logins.take(user_key)
         return jsonify({'error': 'Usuário ou senha incorretos'}), 401
 
 @auth_bp.route('/auth/logout', methods=['POST'])
@@ -70,11 +102,18 @@ def create_admin():
     if existing_admin:
         return jsonify({'error': 'Administrador já existe'}), 400
     
+    wait = ip_attempts.take(request.remote_addr)
+    if wait:
+        return too_many_attempts(wait)
+    
     username = data['username']
     password = data['password']
     
     admin = Admin(username=username)
-    admin.set_password(password)
+    try:
+        admin.set_password(password)
+    except PoolBusy:
+        return hashing_busy()
     
     try:
         db.session.add(admin)
@@ -96,11 +135,14 @@ def change_password():
         return jsonify({'error': 'Old and new passwords são obrigatórias'}), 400
     # Get the currently logged in admin
     admin = Admin.query.get(session['admin_id'])
-    # Check if the old password matches
-    if not admin or not admin.check_password(data['old_password']):
-        return jsonify({'error': 'Senha antiga incorreta'}), 401
-    # Set the new password
-    admin.set_password(data['new_password'])
+    try:
+        # Check if the old password matches
+        if not admin or not admin.check_password(data['old_password']):
+            return jsonify({'error': 'Senha antiga incorreta'}), 401
+        # Set the new password
+        admin.set_password(data['new_password'])
+    except PoolBusy:
+        return hashing_busy()
     # Commit the change to the database
     db.session.commit()
     return jsonify({'message': 'Senha alterada com sucesso'})
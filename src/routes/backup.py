@@ -0,0 +1,52 @@
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from src.routes.auth import login_required
+from src.routes.pdf_standalone import StandalonePDF
+from src.routes.portfolio_pdfs import PortfolioPDF
+from datetime import datetime
+
+backup_bp = Blueprint('backup', __name__)
+
+# Parâmetro da query string -> (pasta no ZIP, modelo)
+EXPORTS = {
+    'portfolio': ('portfolio-pdfs', PortfolioPDF),
+    'standalone': ('pdfs', StandalonePDF),
+}
+
+def zip_response(chunks, prefix):
+    """ZIP montado durante o envio (sem Content-Length nem arquivo temporário)"""
+    filename = f"{prefix}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.zip"
+    return Response(
+        stream_with_context(chunks),
+        mimetype='application/zip',
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Cache-Control': 'no-store'
+        }
+    )
+
+@backup_bp.route('/backup', methods=['GET'])
+@login_required
+def download_backup():
+    """Cópia completa do site: todas as tabelas em NDJSON e todos os PDFs"""
+    # Só aqui: o zipfile (e o zlib) fica fora do import de cada worker
+    from src.utils.backup import iter_backup
+    return zip_response(iter_backup(), 'backup')
+
+@backup_bp.route('/export/pdfs', methods=['GET'])
+@login_required
+def export_pdfs():
+    """PDFs do portfólio e independentes em ZIP (?portfolio=1,2&standalone=3; sem filtro, todos)"""
+    selection = []
+    for param, (folder, model) in EXPORTS.items():
+        value = request.args.get(param)
+        if value is None:
+            continue
+        try:
+            ids = [int(item) for item in value.split(',') if item.strip()]
+        except ValueError:
+            return jsonify({'error': f'{param} deve ser uma lista de ids separados por vírgula'}), 400
+        selection.append((folder, model, ids))
+    if not selection:
+        selection = [(folder, model, None) for folder, model in EXPORTS.values()]
+    from src.utils.backup import iter_pdf_export
+    return zip_response(iter_pdf_export(selection), 'pdfs')
@@ -0,0 +1,81 @@
+from flask import Blueprint, request, jsonify
+from src.models.portfolio import PortfolioLink, db
+from src.models.tombstone import RESET_ENTITY, TOMBSTONE_DAYS, Tombstone
+from src.routes.auth import login_required
+from src.routes.pdf_standalone import StandalonePDF
+from src.routes.portfolio_pdfs import PortfolioPDF
+from src.utils.pagination import InvalidCursor, column_query, decode_cursor, encode_cursor
+from datetime import datetime, timedelta
+import os
+
+changes_bp = Blueprint('changes', __name__)
+
+ENTITIES = {
+    'links': PortfolioLink,
+    'portfolio_pdfs': PortfolioPDF,
+    'standalone_pdfs': StandalonePDF,
+}
+# O token marca até onde tudo já foi entregue. Alterações dos últimos
+# OVERLAP segundos podem ser de transações ainda sem commit, então o token
+# nunca passa de agora - OVERLAP e essas linhas podem vir de novo (o cliente
+# aplica por id, repetir não tem efeito)
+OVERLAP = timedelta(seconds=float(os.environ.get('CHANGES_OVERLAP', 5)))
+# Acima disso é mais barato o cliente recarregar as listas inteiras
+MAX_CHANGES = int(os.environ.get('CHANGES_MAX', 1000))
+
+def reset_response():
+    """Sem token (ou com um velho demais): o cliente carrega as listas e sincroniza a partir daqui"""
+    return jsonify({
+        'reset': True,
+        'next': encode_cursor([datetime.utcnow() - OVERLAP]),
+        'changed': {name: [] for name in ENTITIES},
+        'deleted': {name: [] for name in ENTITIES}
+    })
+
+@changes_bp.route('/changes', methods=['GET'])
+@login_required
+def get_changes():
+    """Alterações em links, PDFs do portfólio e PDFs independentes desde ``since``.
+
+    ``changed`` traz as linhas criadas ou alteradas (como nas listagens
+    administrativas) e ``deleted`` os ids removidos. ``next`` é o ``since``
+    da próxima consulta. Com ``reset: true`` o cliente deve recarregar tudo.
+    """
+    token = request.args.get('since')
+    if not token:
+        return reset_response()
+    try:
+        since, = decode_cursor(token, 1)
+    except InvalidCursor:
+        return jsonify({'error': 'Token inválido'}), 400
+    if not isinstance(since, datetime) or since < datetime.utcnow() - timedelta(days=TOMBSTONE_DAYS):
+        return reset_response()
+
+    # Calculado antes das consultas: o que for gravado depois cai na próxima
+    next_since = max(since, datetime.utcnow() - OVERLAP)
+    changed, deleted = {}, {}
+    for name, model in ENTITIES.items():
+        query = column_query(model.query.filter(model.updated_at > since)).order_by(model.updated_at, model.id)
+        rows = query.limit(MAX_CHANGES + 1).all()
+        if len(rows) > MAX_CHANGES:
+            return reset_response()
+        changed[name] = [model.to_dict(row) for row in rows]
+
+    tombstones = db.session.query(Tombstone.entity, Tombstone.item_id, Tombstone.deleted_at).filter(
+        Tombstone.deleted_at > since).order_by(Tombstone.deleted_at).limit(MAX_CHANGES + 1).all()
+    # Restauração de cópia depois da emissão do token (since + OVERLAP): as
+    # lápides não contam o que sumiu
+    restored = any(t.entity == RESET_ENTITY and t.deleted_at > since + OVERLAP for t in tombstones)
+    if len(tombstones) > MAX_CHANGES or restored:
+        return reset_response()
+    for name in ENTITIES:
+        # Um id que voltou a existir (SQLite reaproveita ids) vale pelo estado atual
+        alive = {item['id'] for item in changed[name]}
+        deleted[name] = sorted({t.item_id for t in tombstones if t.entity == name} - alive)
+
+    return jsonify({
+        'reset': False,
+        'next': encode_cursor([next_since]),
+        'changed': changed,
+        'deleted': deleted
+    })
@@ -0,0 +1,273 @@
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from src.models.metadata_cache import MetadataCache
+from src.models.portfolio import PortfolioLink, db, METADATA_DONE, METADATA_FAILED
+from src.routes.auth import login_required
+from src.routes.portfolio import build_link, download_metadata, needs_metadata, remember_metadata
+from src.utils import response_cache
+from src.utils.link_import import guess_format, is_valid_url, normalize_entries, parse_entries, url_key
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlsplit
+import json
+import os
+import socket
+import threading
+import time
+
+link_import_bp = Blueprint('link_import', __name__)
+
+# Limites da importação em massa
+IMPORT_WORKERS = int(os.environ.get('IMPORT_WORKERS', 16))
+IMPORT_PER_HOST = int(os.environ.get('IMPORT_PER_HOST', 2))
+# A importação roda dentro da requisição: precisa terminar antes do --timeout do
+# gunicorn (30s por padrão), com folga para gravar os lotes
+IMPORT_TIMEOUT = float(os.environ.get('IMPORT_TIMEOUT', 20))
+IMPORT_MAX_URLS = int(os.environ.get('IMPORT_MAX_URLS', 2000))
+# Timeout de cada conexão/leitura, limitado ao que resta do IMPORT_TIMEOUT
+FETCH_TIMEOUT = 10
+BATCH_SIZE = 100
+
+class HostLimiter:
+    """No máximo ``per_host`` requisições simultâneas para o mesmo host"""
+
+    def __init__(self, per_host=IMPORT_PER_HOST):
+        self.per_host = per_host
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            semaphore = self._slots.setdefault(host, threading.BoundedSemaphore(self.per_host))
+        with semaphore:
+            yield
+
+class OpenResponses:
+    """Respostas sendo lidas pelas threads, para cortar quando o tempo acaba"""
+
+    def __init__(self):
+        self.cancelled = False
+        self._responses = []
+        self._lock = threading.Lock()
+
+    def track(self, response):
+        with self._lock:
+            if not self.cancelled:
+                self._responses.append(response)
+                return
+        response.close()
+        raise TimeoutError('Tempo esgotado')
+
+    def cancel(self):
+        """Interrompe as leituras em andamento (o shutdown acorda um recv bloqueado)"""
+        with self._lock:
+            self.cancelled = True
+            responses, self._responses = self._responses, []
+        for response in responses:
+            # close() daqui esperaria a leitura da outra thread: o shutdown a acorda
+            # e a própria thread fecha a resposta ao sair do ``with``
+            sock = _socket_of(response)
+            try:
+                if sock is not None:
+                    sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+def _socket_of(response):
+    """Socket de onde a resposta do ``requests`` está lendo"""
+    sock = getattr(getattr(response.raw, 'connection', None), 'sock', None)
+    if sock is None:
+        # Conexão sem keep-alive: o http.client já soltou a conexão e só o
+        # arquivo da resposta (SocketIO) guarda o socket
+        fp = getattr(getattr(response.raw, '_fp', None), 'fp', None)
+        sock = getattr(getattr(fp, 'raw', None), '_sock', None)
+    return sock
+
+def _fetch(limiter, responses, url, headers, deadline):
+    # Nas threads do pool só há rede: o cache é gravado pela thread da requisição
+    with limiter.slot(url):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or responses.cancelled:
+            raise TimeoutError('Tempo esgotado')
+        return download_metadata(url, headers, timeout=min(FETCH_TIMEOUT, remaining), opened=responses.track)
+
+def _cached_entries(urls):
+    """Entradas do cache de metadados das URLs, por chave"""
+    keys = list({MetadataCache.key_for(url) for url in urls})
+    entries = {}
+    for start in range(0, len(keys), BATCH_SIZE):
+        entries.update((entry.key, entry) for entry in
+                       MetadataCache.query.filter(MetadataCache.key.in_(keys[start:start + BATCH_SIZE])))
+    return entries
+
+def _remember(downloads):
+    """Grava no cache, numa transação, o que as threads baixaram"""
+    if not downloads:
+        return
+    try:
+        for url, cached, downloaded in downloads:
+            remember_metadata(url, cached, downloaded, evict=False)
+        MetadataCache.evict()
+        db.session.commit()
+    except Exception:
+        # Falha no cache não impede a importação
+        db.session.rollback()
+
+def _new_link(entry, metadata, status):
+    """Link pronto para inserir, com os metadados nos campos em branco"""
+    link = build_link(entry)
+    link.metadata_status = status
+    if metadata:
+        if not entry['title']:
+            link.title = metadata['title'] or entry['url']
+        link.description = link.description or metadata['description']
+        link.image_url = link.image_url or metadata['image_url']
+    return link
+
+def _insert(rows):
+    """Insere um lote numa única transação e devolve um resultado por URL"""
+    links = [_new_link(entry, metadata, METADATA_FAILED if error else METADATA_DONE)
+             for entry, metadata, error in rows]
+    db.session.add_all(links)
+    db.session.commit()
+    response_cache.invalidate(response_cache.PORTFOLIO_LINKS)
+    return [
+        {'url': entry['url'], 'status': 'created', 'id': link.id, 'error': error}
+        for (entry, _, error), link in zip(rows, links)
+    ]
+
+def iter_import(entries, skip_existing=True, timeout=IMPORT_TIMEOUT):
+    """Importa os links e gera um resultado por URL à medida que terminam.
+
+    Os metadados são buscados em paralelo (``IMPORT_WORKERS`` threads, no
+    máximo ``IMPORT_PER_HOST`` por host) e tudo que não terminar em
+    ``timeout`` segundos entra sem metadados; as buscas ainda abertas são
+    interrompidas antes de retornar. Só a thread da requisição usa o banco:
+    o cache de metadados e os links são gravados em lotes de ``BATCH_SIZE``.
+    """
+    deadline = time.monotonic() + timeout
+    existing = {url_key(url) for (url,) in db.session.query(PortfolioLink.url)} if skip_existing else set()
+
+    ready = []
+    to_fetch = []
+    for entry in entries:
+        if not is_valid_url(entry['url']):
+            yield {'url': entry['url'], 'status': 'invalid', 'error': 'URL inválida'}
+        elif url_key(entry['url']) in existing:
+            yield {'url': entry['url'], 'status': 'skipped', 'error': 'Link já existe'}
+        elif needs_metadata(entry):
+            to_fetch.append(entry)
+        else:
+            ready.append((entry, None, None))
+
+    cache = _cached_entries([entry['url'] for entry in to_fetch]) if to_fetch else {}
+    downloads = []
+    stale = []
+    for entry in to_fetch:
+        cached = cache.get(MetadataCache.key_for(entry['url']))
+        if cached is not None and cached.is_fresh():
+            cached.last_used_at = datetime.utcnow()
+            ready.append((entry, cached.to_metadata(), None))
+        else:
+            stale.append((entry, cached))
+
+    if stale:
+        limiter = HostLimiter()
+        responses = OpenResponses()
+        executor = ThreadPoolExecutor(max_workers=IMPORT_WORKERS, thread_name_prefix='link-import')
+        try:
+            futures = {
+                executor.submit(_fetch, limiter, responses, entry['url'],
+                                cached.validators() if cached is not None else None, deadline): (entry, cached)
+                for entry, cached in stale
+            }
+            try:
+                for future in as_completed(futures, timeout=max(deadline - time.monotonic(), 0)):
+                    entry, cached = futures.pop(future)
+                    try:
+                        downloaded = future.result()
+                    except Exception as e:
+                        ready.append((entry, None, str(e)))
+                    else:
+                        downloads.append((entry['url'], cached, downloaded))
+                        ready.append((entry, cached.to_metadata() if downloaded is None else downloaded[0], None))
+                    if len(ready) >= BATCH_SIZE:
+                        _remember(downloads)
+                        downloads = []
+                        yield from _insert(ready)
+                        ready = []
+            except FuturesTimeout:
+                # Estourou o tempo total: o que faltou entra sem metadados
+                for entry, _ in futures.values():
+                    ready.append((entry, None, 'Tempo esgotado'))
+        finally:
+            # Nenhuma busca continua depois da resposta
+            responses.cancel()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    _remember(downloads)
+    for start in range(0, len(ready), BATCH_SIZE):
+        yield from _insert(ready[start:start + BATCH_SIZE])
+
+def summarize(results):
+    summary = {'total': len(results), 'created': 0, 'skipped': 0, 'invalid': 0, 'metadata_failed': 0}
+    for result in results:
+        summary[result['status']] += 1
+        if result['status'] == 'created' and result['error']:
+            summary['metadata_failed'] += 1
+    return summary
+
+def read_entries():
+    """Links enviados como arquivo (JSON, CSV ou favoritos HTML) ou em JSON"""
+    if 'file' in request.files:
+        file = request.files['file']
+        text = file.read().decode('utf-8', errors='replace')
+        fmt = request.form.get('format') or guess_format(file.filename, file.mimetype, text)
+        return parse_entries(text, fmt)
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('links') or data.get('urls')
+    if not isinstance(data, list):
+        raise ValueError('Envie um arquivo ou uma lista de links')
+    return normalize_entries(data)
+
+@link_import_bp.route('/portfolio/links/import', methods=['POST'])
+@login_required
+def import_links():
+    """Importa links em massa.
+
+    Com ``Accept: application/x-ndjson`` o progresso é enviado linha a linha
+    (um resultado por URL e o resumo no fim); senão a resposta é um JSON
+    único com o resumo e os resultados.
+    """
+    try:
+        entries = read_entries()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if not entries:
+        return jsonify({'error': 'Nenhum link encontrado'}), 400
+    if len(entries) > IMPORT_MAX_URLS:
+        return jsonify({'error': f'Máximo de {IMPORT_MAX_URLS} links por importação'}), 400
+
+    skip_existing = request.args.get('skip_existing', '1') != '0'
+
+    if request.accept_mimetypes.best == 'application/x-ndjson':
+        def generate():
+            results = []
+            for result in iter_import(entries, skip_existing):
+                results.append(result)
+                yield json.dumps(result) + '\n'
+            yield json.dumps({'summary': summarize(results)}) + '\n'
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    try:
+        results = list(iter_import(entries, skip_existing))
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify({'summary': summarize(results), 'results': results})
@@ -0,0 +1,58 @@
+from flask import Blueprint
+from src.routes.pdf_upload import PdfUpload
+from src.routes.pdf_standalone import StandalonePDF
+from src.routes.portfolio_pdfs import PortfolioPDF
+from src.utils import analytics
+from src.utils.pdf_delivery import send_pdf
+import re
+
+# Entrega dos PDFs pelos nomes públicos antigos; o arquivo em si vem do
+# armazenamento por conteúdo
+pdf_files_bp = Blueprint('pdf_files', __name__)
+
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+def find_pdf(filename):
+    """Resolve o nome de um PDF da pasta 'pdfs' (avulso ou independente).
+
+    Retorna (entidade para o analytics, id, sha256).
+    """
+    upload = PdfUpload.query.filter_by(filename=filename).first()
+    if upload:
+        return 'pdf_upload', upload.id, upload.sha256
+    pdf = StandalonePDF.query.filter_by(filename=filename).first()
+    if pdf:
+        return 'standalone_pdf', pdf.id, pdf.sha256
+    return None, None, None
+
+@pdf_files_bp.route('/static/uploads/blobs/<prefix>/<sha256>.pdf')
+def serve_blob(prefix, sha256):
+    """Serve um PDF pelo nome endereçado por conteúdo (cache imutável)"""
+    if not SHA256_RE.match(sha256) or prefix != sha256[:2]:
+        return "Arquivo não encontrado", 404
+    return analytics.record_response(send_pdf(sha256, immutable=True), 'blob', sha256)
+
+@pdf_files_bp.route('/api/uploads/pdfs/<filename>')
+def serve_pdf(filename):
+    """Serve arquivos PDF"""
+    entity, pdf_id, sha256 = find_pdf(filename)
+    return analytics.record_response(send_pdf(sha256, filename=filename), entity, pdf_id)
+
+@pdf_files_bp.route('/uploads/pdfs/<filename>')
+@pdf_files_bp.route('/static/uploads/pdfs/<filename>')
+def serve_static_pdf(filename):
+    """Serve PDFs avulsos e independentes pelos caminhos antigos.
+
+    ``/uploads/pdfs/<nome>`` é a URL que o upload avulso devolve e que fica
+    gravada nos ``pdf_url`` dos links.
+    """
+    entity, pdf_id, sha256 = find_pdf(filename)
+    return analytics.record_response(send_pdf(sha256, filename=filename), entity, pdf_id)
+
+@pdf_files_bp.route('/static/uploads/portfolio-pdfs/<filename>')
+def serve_portfolio_pdf(filename):
+    """Serve PDFs do portfólio pelo caminho estático antigo"""
+    pdf = PortfolioPDF.query.filter_by(filename=filename).first()
+    if pdf is None:
+        return send_pdf(None)
+    return analytics.record_response(send_pdf(pdf.sha256, filename=filename), 'portfolio_pdf', pdf.id)
@@ -1,6 +1,12 @@
 from flask import Blueprint, request, jsonify
 from src.models.user import db
+from src.models.pdf_info import PdfInfoMixin, pdf_info_dict
+from src.models.tombstone import track_deletions
 from src.routes.auth import login_required
+from src.utils import analytics, blob_store
+from src.utils.pagination import list_response
+from src.utils.pdf_delivery import send_pdf
+from src.utils.uploads import receive_upload
 import os
 import uuid
 from datetime import datetime
@@ -9,16 +15,18 @@ from werkzeug.utils import secure_filename
 pdf_standalone_bp = Blueprint('pdf_standalone', __name__)
 
 # Modelo para PDFs independentes
-class StandalonePDF(db.Model):
+class StandalonePDF(PdfInfoMixin, db.Model):
     __tablename__ = 'standalone_pdfs'
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=True)
-    filename = db.Column(db.String(255), nullable=False)
+    filename = db.Column(db.String(255), nullable=False, index=True)
     original_name = db.Column(db.String(255), nullable=False)
     size = db.Column(db.Integer, nullable=False)
+    sha256 = db.Column(db.String(64), index=True)  # Blob no armazenamento por conteúdo
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def __repr__(self):
         return f'<StandalonePDF {self.title}>'
@@ -31,20 +39,33 @@ class StandalonePDF(db.Model):
             'filename': self.filename,
             'original_name': self.original_name,
             'size': self.size,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'sha256': self.sha256,
+            'blob_url': blob_store.blob_url(self.sha256),
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            **pdf_info_dict(self)
         }
 
+db.Index('ix_standalone_pdfs_created', StandalonePDF.created_at.desc(), StandalonePDF.id.desc())
+# Feed de alterações (/api/changes)
+db.Index('ix_standalone_pdfs_updated', StandalonePDF.updated_at)
+track_deletions(StandalonePDF, 'standalone_pdfs')
+
 @pdf_standalone_bp.route('/pdfs/standalone', methods=['GET'])
 @login_required
 def get_standalone_pdfs():
     """Retorna todos os PDFs independentes"""
-    pdfs = StandalonePDF.query.order_by(StandalonePDF.created_at.desc()).all()
-    return jsonify([pdf.to_dict() for pdf in pdfs])
+    return list_response(StandalonePDF.query, [(StandalonePDF.created_at, 'desc'), (StandalonePDF.id, 'desc')])
 
 @pdf_standalone_bp.route('/pdfs/standalone', methods=['POST'])
 @login_required
 def upload_standalone_pdf():
     """Upload de PDF independente com título e descrição"""
+    # Recebe o arquivo em streaming, já com limite de tamanho (16MB)
+    error = receive_upload(blob_store.BLOB_DIR)
+    if error:
+        return error
+    
     if 'pdf' not in request.files:
         return jsonify({'error': 'Nenhum arquivo enviado'}), 400
     
@@ -61,14 +82,6 @@ def upload_standalone_pdf():
     if not file.filename.lower().endswith('.pdf'):
         return jsonify({'error': 'Apenas arquivos PDF são permitidos'}), 400
     
-    # Verificar tamanho do arquivo (16MB máximo)
-    file.seek(0, os.SEEK_END)
-    file_size = file.tell()
-    file.seek(0)
-    
-    if file_size > 16 * 1024 * 1024:  # 16MB
-        return jsonify({'error': 'Arquivo muito grande. Máximo 16MB'}), 400
-    
     try:
         # Gerar nome único para o arquivo
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -77,13 +90,8 @@ def upload_standalone_pdf():
         name_without_ext = os.path.splitext(original_name)[0]
         filename = f"{timestamp}_{unique_id}_{name_without_ext}.pdf"
         
-        # Criar diretório se não existir
-        upload_dir = os.path.join(os.path.dirname(__file__), '..', 'static', 'uploads', 'pdfs')
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # Salvar arquivo
-        file_path = os.path.join(upload_dir, filename)
-        file.save(file_path)
+        # Salvar arquivo (conteúdo repetido reaproveita o blob existente)
+        sha256, file_size = blob_store.put(file)
         
         # Salvar no banco de dados
         new_pdf = StandalonePDF(
@@ -91,8 +99,10 @@ def upload_standalone_pdf():
             description=description if description else None,
             filename=filename,
             original_name=original_name,
-            size=file_size
+            size=file_size,
+            sha256=sha256
         )
+        new_pdf.inspect_blob()
         
         db.session.add(new_pdf)
         db.session.commit()
@@ -133,14 +143,12 @@ def delete_standalone_pdf(pdf_id):
     pdf = StandalonePDF.query.get_or_404(pdf_id)
     
     try:
-        # Remover arquivo físico
-        file_path = os.path.join(os.path.dirname(__file__), '..', 'static', 'uploads', 'pdfs', pdf.filename)
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        
-        # Remover do banco de dados
+        # Remover do banco de dados e liberar o blob
+        sha256 = pdf.sha256
         db.session.delete(pdf)
+        blob_store.release(sha256)
         db.session.commit()
+        blob_store.collect(sha256)
         
         return jsonify({'message': 'PDF removido com sucesso'})
         
@@ -154,11 +162,8 @@ def download_standalone_pdf(pdf_id):
     """Download de um PDF independente"""
     pdf = StandalonePDF.query.get_or_404(pdf_id)
     
-    file_path = os.path.join(os.path.dirname(__file__), '..', 'static', 'uploads', 'pdfs', pdf.filename)
-    
-    if not os.path.exists(file_path):
+    if not pdf.sha256 or not os.path.exists(blob_store.blob_path(pdf.sha256)):
         return jsonify({'error': 'Arquivo não encontrado'}), 404
     
-    from flask import send_file
-    return send_file(file_path, as_attachment=True, download_name=pdf.original_name)
-
+    response = send_pdf(pdf.sha256, filename=pdf.original_name, as_attachment=True, public=False)
+    return analytics.record_response(response, 'standalone_pdf', pdf.id, 'download')
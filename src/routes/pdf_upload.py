@@ -1,32 +1,64 @@
-from flask import Blueprint, request, jsonify, send_from_directory
+from flask import Blueprint, request, jsonify
 from werkzeug.utils import secure_filename
+from src.models.user import db
 from src.routes.auth import login_required
-import os
+from src.utils import blob_store
+from src.utils.pagination import list_response
+from src.utils.uploads import receive_upload
+import re
 import uuid
 from datetime import datetime
 
 pdf_upload_bp = Blueprint('pdf_upload', __name__)
 
 # Configurações de upload
-UPLOAD_FOLDER = 'src/static/uploads/pdfs'
 ALLOWED_EXTENSIONS = {'pdf'}
-MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
+
+# Uploads avulsos: o arquivo fica no armazenamento por conteúdo e este
+# registro guarda o nome público e a referência para o blob
+class PdfUpload(db.Model):
+    __tablename__ = 'pdf_uploads'
+    __table_args__ = (
+        # Listagem mais recente primeiro sem ordenar em memória
+        db.Index('ix_pdf_uploads_created_at_id', 'created_at', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String(255), nullable=False, unique=True)
+    original_name = db.Column(db.String(255), nullable=False)
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    size = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<PdfUpload {self.filename}>'
+    
+    def to_dict(self):
+        return {
+            'filename': self.filename,
+            'url': f"/uploads/pdfs/{self.filename}",
+            'size': self.size,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
 
 def allowed_file(filename):
     """Verifica se o arquivo tem extensão permitida"""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def create_upload_folder():
-    """Cria a pasta de upload se não existir"""
-    if not os.path.exists(UPLOAD_FOLDER):
-        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+def original_name_from(filename):
+    """Recupera o nome original de um arquivo salvo como <data>_<hora>_<id>_<nome>"""
+    match = re.match(r'^\d{8}_\d{6}_[0-9a-f]{8}_(.+)$', filename)
+    return match.group(1) if match else filename
 
 @pdf_upload_bp.route('/upload/pdf', methods=['POST'])
 @login_required
 def upload_pdf():
     """Upload de arquivo PDF"""
-    create_upload_folder()
+    # Recebe o arquivo em streaming, já com limite de tamanho
+    error = receive_upload(blob_store.BLOB_DIR)
+    if error:
+        return error
     
     if 'pdf_file' not in request.files:
         return jsonify({'error': 'Nenhum arquivo enviado'}), 400
@@ -39,71 +71,44 @@ def upload_pdf():
     if not allowed_file(file.filename):
         return jsonify({'error': 'Apenas arquivos PDF são permitidos'}), 400
     
-    # Verificar tamanho do arquivo
-    file.seek(0, os.SEEK_END)
-    file_size = file.tell()
-    file.seek(0)
+    # Gerar nome único para o arquivo
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    unique_id = str(uuid.uuid4())[:8]
+    original_name = secure_filename(file.filename)
+    filename = f"{timestamp}_{unique_id}_{original_name}"
     
-    if file_size > MAX_FILE_SIZE:
-        return jsonify({'error': 'Arquivo muito grande. Máximo 16MB'}), 400
-    
-    if file and allowed_file(file.filename):
-        # Gerar nome único para o arquivo
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        unique_id = str(uuid.uuid4())[:8]
-        original_name = secure_filename(file.filename)
-        filename = f"{timestamp}_{unique_id}_{original_name}"
+    try:
+        sha256, file_size = blob_store.put(file)
+        db.session.add(PdfUpload(
+            filename=filename,
+            original_name=original_name,
+            sha256=sha256,
+            size=file_size
+        ))
+        db.session.commit()
         
-        file_path = os.path.join(UPLOAD_FOLDER, filename)
+        # Retornar URL relativa para o arquivo
+        pdf_url = f"/uploads/pdfs/{filename}"
         
-        try:
-            file.save(file_path)
-            
-            # Retornar URL relativa para o arquivo
-            pdf_url = f"/uploads/pdfs/{filename}"
-            
-            return jsonify({
-                'message': 'PDF enviado com sucesso',
-                'pdf_url': pdf_url,
-                'filename': filename,
-                'original_name': original_name
-            }), 200
-            
-        except Exception as e:
-            return jsonify({'error': f'Erro ao salvar arquivo: {str(e)}'}), 500
+        return jsonify({
+            'message': 'PDF enviado com sucesso',
+            'pdf_url': pdf_url,
+            'filename': filename,
+            'original_name': original_name
+        }), 200
     
-    return jsonify({'error': 'Erro no upload do arquivo'}), 400
-
-@pdf_upload_bp.route('/uploads/pdfs/<filename>')
-def serve_pdf(filename):
-    """Serve arquivos PDF"""
-    return send_from_directory(UPLOAD_FOLDER, filename)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro ao salvar arquivo: {str(e)}'}), 500
 
 @pdf_upload_bp.route('/uploads/pdfs', methods=['GET'])
 @login_required
 def list_pdfs():
     """Lista todos os PDFs enviados"""
-    create_upload_folder()
-    
     try:
-        files = []
-        for filename in os.listdir(UPLOAD_FOLDER):
-            if filename.lower().endswith('.pdf'):
-                file_path = os.path.join(UPLOAD_FOLDER, filename)
-                file_stat = os.stat(file_path)
-                
-                files.append({
-                    'filename': filename,
-                    'url': f"/uploads/pdfs/{filename}",
-                    'size': file_stat.st_size,
-                    'created_at': datetime.fromtimestamp(file_stat.st_ctime).isoformat()
-                })
-        
-        # Ordenar por data de criação (mais recente primeiro)
-        files.sort(key=lambda x: x['created_at'], reverse=True)
-        
-        return jsonify(files), 200
-        
+        # ?limit=&cursor= para paginar; sem eles, a lista completa
+        return list_response(PdfUpload.query, [(PdfUpload.created_at, 'desc'), (PdfUpload.id, 'desc')])
+    
     except Exception as e:
         return jsonify({'error': f'Erro ao listar arquivos: {str(e)}'}), 500
 
@@ -111,15 +116,19 @@ def list_pdfs():
 @login_required
 def delete_pdf(filename):
     """Remove um arquivo PDF"""
-    file_path = os.path.join(UPLOAD_FOLDER, secure_filename(filename))
+    upload = PdfUpload.query.filter_by(filename=secure_filename(filename)).first()
     
     try:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        if upload:
+            sha256 = upload.sha256
+            db.session.delete(upload)
+            blob_store.release(sha256)
+            db.session.commit()
+            blob_store.collect(sha256)
             return jsonify({'message': 'PDF removido com sucesso'}), 200
         else:
             return jsonify({'error': 'Arquivo não encontrado'}), 404
-            
+    
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': f'Erro ao remover arquivo: {str(e)}'}), 500
-
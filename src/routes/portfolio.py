@@ -1,62 +1,223 @@
-from flask import Blueprint, request, jsonify
-from src.models.portfolio import PortfolioLink, db
+from flask import Blueprint, request, jsonify, current_app, url_for, redirect
+from src.models.portfolio import PortfolioLink, db, METADATA_PENDING, METADATA_DONE, METADATA_FAILED
+from src.models.metadata_cache import MetadataCache
 from src.routes.auth import login_required
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from src.utils import analytics, http, response_cache
+from src.utils.html_metadata import read_metadata
+from src.utils.jobs import JobQueue
+from src.utils.pagination import column_query, list_response, order_by, page_params, wants_ndjson
+from datetime import datetime, timedelta
+import logging
+import os
+import threading
+import time
 
 portfolio_bp = Blueprint('portfolio', __name__)
+logger = logging.getLogger(__name__)
+
+# Fila de extração de metadados em segundo plano
+metadata_jobs = JobQueue(
+    'metadata',
+    workers=int(os.environ.get('METADATA_WORKERS', 2)),
+    max_size=int(os.environ.get('METADATA_QUEUE_SIZE', 50)),
+    retries=int(os.environ.get('METADATA_RETRIES', 2)),
+)
+# A fila só existe na memória do worker: links 'pending' há mais que isso
+# perderam o job (worker reiniciado, Render dormiu) e voltam para a fila
+METADATA_STALE_SECONDS = int(os.environ.get('METADATA_STALE_SECONDS', 900))
+METADATA_SWEEP_INTERVAL = 60
+_sweeper = {'pid': None}
+_sweeper_lock = threading.Lock()
+
+def _save_cache(action):
+    """Grava no cache sem deixar uma falha de escrita derrubar a extração"""
+    try:
+        action()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+
+def download_metadata(url, headers=None, timeout=10, opened=None):
+    """Busca os metadados de ``url`` na rede, sem tocar no banco.
+
+    Retorna (metadados, etag, last_modified), ou None se o site respondeu 304
+    aos cabeçalhos de revalidação ``headers``. ``opened(response)`` recebe a
+    resposta assim que ela abre, para quem precisar fechá-la de outra thread.
+    """
+    # stream=True: só o <head> é lido, com limite de bytes
+    with http.get_session().get(url, headers=headers or {}, timeout=timeout, stream=True) as response:
+        if opened is not None:
+            opened(response)
+        if response.status_code == 304 and headers:
+            return None
+        response.raise_for_status()
+        metadata = read_metadata(response, url)
+        return metadata, response.headers.get('ETag'), response.headers.get('Last-Modified')
+
+def remember_metadata(url, cached, downloaded, evict=True):
+    """Grava no cache (sem commit) o resultado de ``download_metadata``"""
+    if downloaded is None:
+        cached.fetched_at = cached.last_used_at = datetime.utcnow()
+        return
+    metadata, etag, last_modified = downloaded
+    MetadataCache.store(url, metadata, etag=etag, last_modified=last_modified, evict=evict)
+
+def fetch_metadata(url):
+    """Busca os metadados de uma URL, levantando exceção em caso de erro.
+
+    Usa o cache persistente: entradas dentro do TTL não geram requisição e
+    entradas vencidas são revalidadas com ETag/Last-Modified.
+    """
+    cached = MetadataCache.lookup(url)
+    if cached is not None and cached.is_fresh():
+        metadata = cached.to_metadata()
+        _save_cache(lambda: setattr(cached, 'last_used_at', datetime.utcnow()))
+        return metadata
+    
+    downloaded = download_metadata(url, cached.validators() if cached is not None else None)
+    metadata = cached.to_metadata() if downloaded is None else downloaded[0]
+    _save_cache(lambda: remember_metadata(url, cached, downloaded))
+    return metadata
+
+def metadata_error(error):
+    """Metadados usados quando não foi possível carregar a URL"""
+    return {
+        'title': 'Erro ao carregar',
+        'description': f'Não foi possível carregar o conteúdo: {str(error)}',
+        'image_url': None
+    }
 
 def extract_metadata(url):
     """Extrai metadados de uma URL"""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Extrair título
-        title = None
-        if soup.find('meta', property='og:title'):
-            title = soup.find('meta', property='og:title')['content']
-        elif soup.find('title'):
-            title = soup.find('title').text.strip()
-        
-        # Extrair descrição
-        description = None
-        if soup.find('meta', property='og:description'):
-            description = soup.find('meta', property='og:description')['content']
-        elif soup.find('meta', attrs={'name': 'description'}):
-            description = soup.find('meta', attrs={'name': 'description'})['content']
-        
-        # Extrair imagem
-        image_url = None
-        if soup.find('meta', property='og:image'):
-            image_url = soup.find('meta', property='og:image')['content']
-            # Converter URL relativa para absoluta
-            if image_url and not image_url.startswith('http'):
-                image_url = urljoin(url, image_url)
-        
-        return {
-            'title': title or 'Sem título',
-            'description': description or 'Sem descrição',
-            'image_url': image_url
-        }
+        return fetch_metadata(url)
     except Exception as e:
-        return {
-            'title': 'Erro ao carregar',
-            'description': f'Não foi possível carregar o conteúdo: {str(e)}',
-            'image_url': None
-        }
+        return metadata_error(e)
+
+def apply_metadata(link_id, metadata, status):
+    """Preenche os campos que o administrador não informou"""
+    link = db.session.get(PortfolioLink, link_id)
+    if link is None:
+        return
+    
+    # O título provisório é a própria URL
+    if not link.title or link.title == link.url:
+        link.title = metadata['title']
+    if not link.description:
+        link.description = metadata['description']
+    if not link.image_url:
+        link.image_url = metadata['image_url']
+    link.metadata_status = status
+    
+    db.session.commit()
+    response_cache.invalidate(response_cache.PORTFOLIO_LINKS)
+
+def _metadata_job(app, link_id, url):
+    with app.app_context():
+        apply_metadata(link_id, fetch_metadata(url), METADATA_DONE)
+
+def _metadata_job_failed(app, link_id, url, error):
+    with app.app_context():
+        apply_metadata(link_id, metadata_error(error), METADATA_FAILED)
+
+# Campos que o administrador pode alterar em um link
+EDITABLE_FIELDS = ('title', 'url', 'description', 'image_url', 'pdf_url', 'is_active')
+
+def needs_metadata(data):
+    """Metadados só são buscados se algum campo ficou em branco"""
+    return not (data.get('title') and data.get('description') and data.get('image_url'))
+
+def build_link(data):
+    """Novo link (ainda fora da sessão); os metadados vêm depois, em segundo plano"""
+    return PortfolioLink(
+        title=data.get('title') or data['url'],
+        url=data['url'],
+        description=data.get('description'),
+        image_url=data.get('image_url'),
+        pdf_url=data.get('pdf_url'),  # Adicionar suporte ao PDF
+        metadata_status=METADATA_PENDING if needs_metadata(data) else METADATA_DONE
+    )
+
+def apply_link_changes(link, data):
+    """Aplica os campos editáveis presentes em ``data``"""
+    for field in EDITABLE_FIELDS:
+        if field in data:
+            setattr(link, field, data[field])
+
+def queue_metadata(link):
+    """Agenda a extração de metadados de um link já salvo"""
+    app = current_app._get_current_object()
+    if not metadata_jobs.submit(_metadata_job, app, link.id, link.url, on_failure=_metadata_job_failed):
+        apply_metadata(link.id, metadata_error('fila de extração cheia'), METADATA_FAILED)
+
+def requeue_stale_metadata():
+    """Reenfileira os links parados em 'pending'; retorna quantos"""
+    cutoff = datetime.utcnow() - timedelta(seconds=METADATA_STALE_SECONDS)
+    stale = db.and_(
+        PortfolioLink.metadata_status == METADATA_PENDING,
+        db.or_(PortfolioLink.updated_at < cutoff, PortfolioLink.updated_at.is_(None))
+    )
+    room = metadata_jobs.max_size - metadata_jobs.pending()
+    rows = db.session.query(PortfolioLink.id, PortfolioLink.url).filter(stale) \
+        .order_by(PortfolioLink.id).limit(max(room, 0)).all()
+    app = current_app._get_current_object()
+    queued = 0
+    for link_id, url in rows:
+        # Renova o prazo antes de enfileirar: outro worker não pega o mesmo link
+        claimed = PortfolioLink.query.filter(PortfolioLink.id == link_id, stale) \
+            .update({PortfolioLink.updated_at: datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
+        if claimed and metadata_jobs.submit(_metadata_job, app, link_id, url, on_failure=_metadata_job_failed):
+            queued += 1
+    return queued
+
+def sweep_stale_metadata():
+    """Uma varredura, sem deixar uma falha derrubar a thread"""
+    try:
+        queued = requeue_stale_metadata()
+        if queued:
+            logger.info('%d link(s) pendentes voltaram para a fila de metadados', queued)
+    except Exception as e:
+        db.session.rollback()
+        logger.warning('Falha ao reenfileirar metadados pendentes: %s', e)
+    finally:
+        db.session.remove()
+
+def _run_sweeper(app):
+    # A primeira varredura é logo ao subir: é quando os jobs perdidos aparecem
+    while True:
+        with app.app_context():
+            sweep_stale_metadata()
+        time.sleep(METADATA_SWEEP_INTERVAL)
+
+def start_metadata_sweeper(app):
+    """Liga a varredura dos links parados em 'pending' neste processo (uma thread por worker).
+
+    Chamada depois do fork (``post_fork`` do gunicorn); as requisições nunca
+    esperam por ela.
+    """
+    with _sweeper_lock:
+        if _sweeper['pid'] == os.getpid():
+            return
+        _sweeper['pid'] = os.getpid()
+        threading.Thread(target=_run_sweeper, args=(app,), name='metadata-sweeper', daemon=True).start()
+
+# Ordem das listagens: mais recentes primeiro
+LIST_ORDER = [(PortfolioLink.created_at, 'desc'), (PortfolioLink.id, 'desc')]
+
+def public_links():
+    """Lista pública completa (conteúdo da chave PORTFOLIO_LINKS do cache)"""
+    query = column_query(PortfolioLink.query.filter_by(is_active=True)).order_by(*order_by(LIST_ORDER))
+    return [PortfolioLink.to_dict(row) for row in query]
 
 @portfolio_bp.route('/portfolio/links', methods=['GET'])
 def get_portfolio_links():
     """Retorna todos os links ativos do portfólio"""
-    links = PortfolioLink.query.filter_by(is_active=True).order_by(PortfolioLink.created_at.desc()).all()
-    return jsonify([link.to_dict() for link in links])
+    # Páginas (?limit=&cursor=) e NDJSON saem direto do índice; a lista completa vem do cache
+    if page_params() is not None or wants_ndjson():
+        return list_response(PortfolioLink.query.filter_by(is_active=True), LIST_ORDER)
+    
+    return response_cache.cached_json_response(response_cache.PORTFOLIO_LINKS, public_links)
 
 @portfolio_bp.route('/portfolio/links', methods=['POST'])
 @login_required
@@ -67,27 +228,50 @@ def add_portfolio_link():
     if not data or 'url' not in data:
         return jsonify({'error': 'URL é obrigatória'}), 400
     
-    url = data['url']
-    
-    # Extrair metadados da URL
-    metadata = extract_metadata(url)
+    pending = needs_metadata(data)
+    if pending and metadata_jobs.is_full():
+        return jsonify({'error': 'Muitas extrações em andamento, tente novamente em instantes'}), 503
     
-    # Criar novo link
-    new_link = PortfolioLink(
-        title=data.get('title') or metadata['title'],
-        url=url,
-        description=data.get('description') or metadata['description'],
-        image_url=data.get('image_url') or metadata['image_url'],
-        pdf_url=data.get('pdf_url')  # Adicionar suporte ao PDF
-    )
+    # Criar novo link; os metadados são preenchidos em segundo plano
+    new_link = build_link(data)
     
     try:
         db.session.add(new_link)
         db.session.commit()
-        return jsonify(new_link.to_dict()), 201
+        response_cache.invalidate(response_cache.PORTFOLIO_LINKS)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
+    
+    if not pending:
+        return jsonify(new_link.to_dict()), 201
+    
+    queue_metadata(new_link)
+    
+    response = jsonify(new_link.to_dict())
+    response.status_code = 202
+    response.headers['Location'] = url_for('portfolio.get_link_metadata_status', link_id=new_link.id)
+    return response
+
+@portfolio_bp.route('/portfolio/links/<int:link_id>/metadata', methods=['GET'])
+@login_required
+def get_link_metadata_status(link_id):
+    """Consulta o andamento da extração de metadados de um link"""
+    link = PortfolioLink.query.get_or_404(link_id)
+    return jsonify({
+        'id': link.id,
+        'metadata_status': link.metadata_status or METADATA_DONE,
+        'link': link.to_dict()
+    })
+
+@portfolio_bp.route('/portfolio/links/<int:link_id>/visit', methods=['GET'])
+def visit_portfolio_link(link_id):
+    """Redireciona para a URL do link, contando a visita no analytics"""
+    link = PortfolioLink.query.filter_by(id=link_id, is_active=True).first_or_404()
+    analytics.record('link', link.id, 'visit')
+    response = redirect(link.url)
+    response.cache_control.no_store = True
+    return response
 
 @portfolio_bp.route('/portfolio/links/<int:link_id>', methods=['PUT'])
 @login_required
@@ -96,21 +280,11 @@ def update_portfolio_link(link_id):
     link = PortfolioLink.query.get_or_404(link_id)
     data = request.get_json()
     
-    if 'title' in data:
-        link.title = data['title']
-    if 'url' in data:
-        link.url = data['url']
-    if 'description' in data:
-        link.description = data['description']
-    if 'image_url' in data:
-        link.image_url = data['image_url']
-    if 'pdf_url' in data:
-        link.pdf_url = data['pdf_url']
-    if 'is_active' in data:
-        link.is_active = data['is_active']
+    apply_link_changes(link, data)
     
     try:
         db.session.commit()
+        response_cache.invalidate(response_cache.PORTFOLIO_LINKS)
         return jsonify(link.to_dict())
     except Exception as e:
         db.session.rollback()
@@ -125,6 +299,7 @@ def delete_portfolio_link(link_id):
     try:
         db.session.delete(link)
         db.session.commit()
+        response_cache.invalidate(response_cache.PORTFOLIO_LINKS)
         return jsonify({'message': 'Link removido com sucesso'})
     except Exception as e:
         db.session.rollback()
@@ -134,5 +309,4 @@ def delete_portfolio_link(link_id):
 @login_required
 def get_all_portfolio_links():
     """Retorna todos os links (incluindo inativos) para administração"""
-    links = PortfolioLink.query.order_by(PortfolioLink.created_at.desc()).all()
-    return jsonify([link.to_dict() for link in links])
+    return list_response(PortfolioLink.query, LIST_ORDER)
@@ -0,0 +1,174 @@
+from flask import Blueprint, request, jsonify
+from src.models.portfolio import PortfolioLink, db
+from src.routes.auth import login_required
+from src.routes.portfolio import apply_link_changes, build_link, needs_metadata, queue_metadata
+from src.routes.portfolio_pdfs import PortfolioPDF, apply_pdf_changes, next_order_index, renumber_pdfs
+from src.utils import blob_store, response_cache
+import uuid
+
+portfolio_batch_bp = Blueprint('portfolio_batch', __name__)
+
+MAX_OPERATIONS = 500
+OPERATIONS = ('create', 'update', 'delete', 'toggle', 'reorder')
+MODELS = {'pdf': PortfolioPDF, 'link': PortfolioLink}
+CACHE_KEYS = {'pdf': response_cache.PORTFOLIO_PDFS, 'link': response_cache.PORTFOLIO_LINKS}
+
+class BatchError(Exception):
+    """Operação inválida; desfaz o lote inteiro"""
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+class Batch:
+    """Aplica as operações na sessão atual, sem commit"""
+
+    def __init__(self):
+        self.touched = set()
+        self.released = []
+        self.new_links = []
+
+    def get(self, kind, item_id):
+        item = db.session.get(MODELS[kind], item_id) if isinstance(item_id, int) else None
+        if item is None:
+            raise BatchError(f'{kind} {item_id} não encontrado', 404)
+        return item
+
+    def apply(self, operation):
+        if not isinstance(operation, dict):
+            raise BatchError('Operação deve ser um objeto')
+        op, kind = operation.get('op'), operation.get('type')
+        if op not in OPERATIONS:
+            raise BatchError(f'Operação desconhecida: {op}')
+        if kind not in MODELS:
+            raise BatchError(f'Tipo desconhecido: {kind}')
+        data = operation.get('data') or {}
+        if not isinstance(data, dict):
+            raise BatchError('data deve ser um objeto')
+
+        self.touched.add(kind)
+        return getattr(self, op)(kind, operation, data)
+
+    def create(self, kind, operation, data):
+        if kind == 'link':
+            if not data.get('url'):
+                raise BatchError('URL é obrigatória')
+            link = build_link(data)
+            db.session.add(link)
+            db.session.flush()
+            if needs_metadata(data):
+                self.new_links.append(link)
+            return link
+
+        # PDFs novos reaproveitam um blob já enviado (o upload continua em POST /portfolio/pdfs)
+        title = (data.get('title') or '').strip()
+        if not title:
+            raise BatchError('Título é obrigatório')
+        sha256 = data.get('sha256')
+        size = blob_store.retain(sha256)
+        if size is None:
+            raise BatchError('Blob não encontrado', 404)
+        pdf = PortfolioPDF(
+            title=title,
+            description=(data.get('description') or '').strip() or None,
+            filename=f"{uuid.uuid4().hex}.pdf",
+            original_name=data.get('original_name') or f'{sha256[:8]}.pdf',
+            size=size,
+            sha256=sha256,
+            is_active=bool(data.get('is_active', True)),
+            order_index=next_order_index()
+        )
+        pdf.inspect_blob()
+        db.session.add(pdf)
+        # Um INSERT por vez: cada um enxerga o order_index do anterior
+        db.session.flush()
+        return pdf
+
+    def update(self, kind, operation, data):
+        item = self.get(kind, operation.get('id'))
+        if kind == 'link':
+            apply_link_changes(item, data)
+        else:
+            try:
+                apply_pdf_changes(item, data)
+            except ValueError as e:
+                raise BatchError(str(e))
+        return item
+
+    def delete(self, kind, operation, data):
+        item = self.get(kind, operation.get('id'))
+        if kind == 'pdf':
+            blob_store.release(item.sha256)
+            self.released.append(item.sha256)
+        db.session.delete(item)
+        return None
+
+    def toggle(self, kind, operation, data):
+        item = self.get(kind, operation.get('id'))
+        item.is_active = not item.is_active
+        return item
+
+    def reorder(self, kind, operation, data):
+        """Põe ``ids`` à frente, nessa ordem, e renumera o resto dos PDFs.
+
+        Só vale para PDFs: links não têm ``order_index`` e saem sempre por
+        ``created_at``, então ``reorder`` com ``type: link`` falha o lote.
+        """
+        if kind != 'pdf':
+            raise BatchError('Só PDFs têm ordenação')
+        ids = operation.get('ids')
+        if not isinstance(ids, list) or not all(isinstance(pdf_id, int) for pdf_id in ids):
+            raise BatchError('ids deve ser uma lista de inteiros')
+        for pdf_id in ids:
+            self.get(kind, pdf_id)
+        renumber_pdfs(ids)
+        return None
+
+@portfolio_batch_bp.route('/portfolio/batch', methods=['POST'])
+@login_required
+def apply_batch():
+    """Aplica várias operações em PDFs e links do portfólio numa única transação.
+
+    Corpo: {"operations": [{"op": "reorder", "type": "pdf", "ids": [3, 1, 2]},
+    {"op": "toggle", "type": "link", "id": 7}, ...]}. Se uma operação falha,
+    nada é gravado e a resposta traz o ``index`` dela. ``reorder`` só existe
+    para PDFs.
+    """
+    data = request.get_json(silent=True) or {}
+    operations = data.get('operations')
+
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': 'operations deve ser uma lista não vazia'}), 400
+    if len(operations) > MAX_OPERATIONS:
+        return jsonify({'error': f'Máximo de {MAX_OPERATIONS} operações por lote'}), 400
+
+    batch = Batch()
+    results = []
+    try:
+        for index, operation in enumerate(operations):
+            try:
+                results.append(batch.apply(operation))
+            except BatchError as e:
+                db.session.rollback()
+                return jsonify({'error': str(e), 'index': index}), e.status
+
+        # order_index sempre denso depois de criar, remover ou mover PDFs
+        if 'pdf' in batch.touched:
+            renumber_pdfs()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+    response_cache.invalidate(*(CACHE_KEYS[kind] for kind in batch.touched))
+    for sha256 in batch.released:
+        blob_store.collect(sha256)
+    for link in batch.new_links:
+        queue_metadata(link)
+
+    return jsonify({
+        'results': [
+            {'index': index, 'op': operation['op'], 'type': operation['type'],
+             'item': item.to_dict() if item is not None else None}
+            for index, (operation, item) in enumerate(zip(operations, results))
+        ]
+    })
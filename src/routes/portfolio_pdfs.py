@@ -1,23 +1,29 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify
 from werkzeug.utils import secure_filename
 from src.models.user import db
+from src.models.pdf_info import PdfInfoMixin, pdf_info_dict
+from src.models.tombstone import track_deletions
 from src.routes.auth import login_required
-import os
+from src.utils import blob_store, response_cache
+from src.utils.pagination import column_query, list_response, order_by, page_params, wants_ndjson
+from src.utils.uploads import receive_upload
 import uuid
 from datetime import datetime
 
 portfolio_pdfs_bp = Blueprint('portfolio_pdfs', __name__)
 
-class PortfolioPDF(db.Model):
+class PortfolioPDF(PdfInfoMixin, db.Model):
     __tablename__ = 'portfolio_pdfs'
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
-    filename = db.Column(db.String(255), nullable=False)
+    filename = db.Column(db.String(255), nullable=False, index=True)
     original_name = db.Column(db.String(255), nullable=False)
     size = db.Column(db.Integer, nullable=False)
+    sha256 = db.Column(db.String(64), index=True)  # Blob no armazenamento por conteúdo
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
     order_index = db.Column(db.Integer, default=0)
     
@@ -29,17 +35,65 @@ class PortfolioPDF(db.Model):
             'filename': self.filename,
             'original_name': self.original_name,
             'size': self.size,
+            'sha256': self.sha256,
             'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'is_active': self.is_active,
             'order_index': self.order_index,
-            'url': f'/static/uploads/portfolio-pdfs/{self.filename}'
+            'url': f'/static/uploads/portfolio-pdfs/{self.filename}',
+            'blob_url': blob_store.blob_url(self.sha256),
+            **pdf_info_dict(self)
         }
 
+# Índices na mesma ordem das listagens (pública e administrativa)
+db.Index('ix_portfolio_pdfs_active_order', PortfolioPDF.is_active, PortfolioPDF.order_index, PortfolioPDF.created_at.desc(), PortfolioPDF.id.desc())
+db.Index('ix_portfolio_pdfs_order', PortfolioPDF.order_index, PortfolioPDF.created_at.desc(), PortfolioPDF.id.desc())
+# Feed de alterações (/api/changes)
+db.Index('ix_portfolio_pdfs_updated', PortfolioPDF.updated_at)
+track_deletions(PortfolioPDF, 'portfolio_pdfs')
+
+# Ordem das listagens: order_index, depois os mais recentes
+LIST_ORDER = [(PortfolioPDF.order_index, 'asc'), (PortfolioPDF.created_at, 'desc'), (PortfolioPDF.id, 'desc')]
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() == 'pdf'
 
+def next_order_index():
+    """Próximo order_index, calculado no próprio INSERT (sem corrida entre workers)"""
+    return db.select(db.func.coalesce(db.func.max(PortfolioPDF.order_index), 0) + 1).scalar_subquery()
+
+def renumber_pdfs(first_ids=()):
+    """Deixa o order_index denso (1..n), com ``first_ids`` à frente nessa ordem"""
+    pdfs = PortfolioPDF.query.order_by(*order_by(LIST_ORDER)).all()
+    by_id = {pdf.id: pdf for pdf in pdfs}
+    first = [by_id.pop(pdf_id) for pdf_id in dict.fromkeys(first_ids) if pdf_id in by_id]
+    rest = [pdf for pdf in pdfs if pdf.id in by_id]
+    for position, pdf in enumerate(first + rest, 1):
+        if pdf.order_index != position:
+            pdf.order_index = position
+
+def apply_pdf_changes(pdf, data):
+    """Aplica os campos editáveis de ``data``; ValueError se algum for inválido"""
+    if 'title' in data:
+        title = (data['title'] or '').strip()
+        if not title:
+            raise ValueError('Título é obrigatório')
+        pdf.title = title
+    
+    if 'description' in data:
+        pdf.description = data['description'].strip() if data['description'] else None
+    
+    if 'is_active' in data:
+        pdf.is_active = bool(data['is_active'])
+    
+    if 'order_index' in data:
+        try:
+            pdf.order_index = int(data['order_index'])
+        except (TypeError, ValueError):
+            raise ValueError('order_index deve ser um número inteiro')
+
 def save_pdf_file(file):
-    """Salva o arquivo PDF e retorna o nome do arquivo salvo"""
+    """Salva o arquivo PDF e retorna (nome do arquivo, tamanho, sha256)"""
     if not file or not allowed_file(file.filename):
         raise ValueError("Arquivo deve ser um PDF")
     
@@ -47,22 +101,24 @@ def save_pdf_file(file):
     file_extension = file.filename.rsplit('.', 1)[1].lower()
     unique_filename = f"{uuid.uuid4().hex}.{file_extension}"
     
-    # Criar diretório se não existir
-    upload_dir = os.path.join(current_app.static_folder, 'uploads', 'portfolio-pdfs')
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Salvar arquivo
-    file_path = os.path.join(upload_dir, unique_filename)
-    file.save(file_path)
+    # Salvar arquivo (conteúdo repetido reaproveita o blob existente)
+    sha256, file_size = blob_store.put(file)
     
-    return unique_filename
+    return unique_filename, file_size, sha256
+
+def public_pdfs():
+    """Lista pública completa (conteúdo da chave PORTFOLIO_PDFS do cache)"""
+    query = column_query(PortfolioPDF.query.filter_by(is_active=True)).order_by(*order_by(LIST_ORDER))
+    return [PortfolioPDF.to_dict(row) for row in query]
 
 @portfolio_pdfs_bp.route('/portfolio/pdfs', methods=['GET'])
 def get_portfolio_pdfs():
     """Listar PDFs do portfólio (público)"""
     try:
-        pdfs = PortfolioPDF.query.filter_by(is_active=True).order_by(PortfolioPDF.order_index.asc(), PortfolioPDF.created_at.desc()).all()
-        return jsonify([pdf.to_dict() for pdf in pdfs])
+        # Páginas (?limit=&cursor=) e NDJSON saem direto do índice; a lista completa vem do cache
+        if page_params() is not None or wants_ndjson():
+            return list_response(PortfolioPDF.query.filter_by(is_active=True), LIST_ORDER)
+        return response_cache.cached_json_response(response_cache.PORTFOLIO_PDFS, public_pdfs)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -71,8 +127,7 @@ def get_portfolio_pdfs():
 def get_portfolio_pdfs_admin():
     """Listar PDFs do portfólio (admin)"""
     try:
-        pdfs = PortfolioPDF.query.order_by(PortfolioPDF.order_index.asc(), PortfolioPDF.created_at.desc()).all()
-        return jsonify([pdf.to_dict() for pdf in pdfs])
+        return list_response(PortfolioPDF.query, LIST_ORDER)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -81,6 +136,11 @@ def get_portfolio_pdfs_admin():
 def add_portfolio_pdf():
     """Adicionar PDF ao portfólio"""
     try:
+        # Recebe o arquivo em streaming, já com limite de tamanho (16MB)
+        error = receive_upload(blob_store.BLOB_DIR)
+        if error:
+            return error
+        
         # Validar dados
         title = request.form.get('title', '').strip()
         description = request.form.get('description', '').strip()
@@ -96,23 +156,12 @@ def add_portfolio_pdf():
         if file.filename == '':
             return jsonify({'error': 'Nenhum arquivo selecionado'}), 400
         
-        # Verificar tamanho (16MB)
-        file.seek(0, 2)  # Ir para o final do arquivo
-        file_size = file.tell()
-        file.seek(0)  # Voltar para o início
-        
-        if file_size > 16 * 1024 * 1024:  # 16MB
-            return jsonify({'error': 'Arquivo muito grande. Máximo 16MB'}), 400
-        
         # Salvar arquivo
         try:
-            filename = save_pdf_file(file)
+            filename, file_size, sha256 = save_pdf_file(file)
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
         
-        # Obter próximo order_index
-        max_order = db.session.query(db.func.max(PortfolioPDF.order_index)).scalar() or 0
-        
         # Criar registro no banco
         pdf = PortfolioPDF(
             title=title,
@@ -120,11 +169,14 @@ def add_portfolio_pdf():
             filename=filename,
             original_name=file.filename,
             size=file_size,
-            order_index=max_order + 1
+            sha256=sha256,
+            order_index=next_order_index()
         )
+        pdf.inspect_blob()
         
         db.session.add(pdf)
         db.session.commit()
+        response_cache.invalidate(response_cache.PORTFOLIO_PDFS)
         
         return jsonify(pdf.to_dict()), 201
         
@@ -141,22 +193,13 @@ def update_portfolio_pdf(pdf_id):
         
         data = request.get_json()
         
-        if 'title' in data:
-            title = data['title'].strip()
-            if not title:
-                return jsonify({'error': 'Título é obrigatório'}), 400
-            pdf.title = title
-        
-        if 'description' in data:
-            pdf.description = data['description'].strip() if data['description'] else None
-        
-        if 'is_active' in data:
-            pdf.is_active = bool(data['is_active'])
-        
-        if 'order_index' in data:
-            pdf.order_index = int(data['order_index'])
+        try:
+            apply_pdf_changes(pdf, data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         db.session.commit()
+        response_cache.invalidate(response_cache.PORTFOLIO_PDFS)
         return jsonify(pdf.to_dict())
         
     except Exception as e:
@@ -170,14 +213,14 @@ def delete_portfolio_pdf(pdf_id):
     try:
         pdf = PortfolioPDF.query.get_or_404(pdf_id)
         
-        # Remover arquivo físico
-        file_path = os.path.join(current_app.static_folder, 'uploads', 'portfolio-pdfs', pdf.filename)
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        
-        # Remover do banco
+        # Remover do banco e liberar o blob
+        sha256 = pdf.sha256
         db.session.delete(pdf)
+        blob_store.release(sha256)
+        renumber_pdfs()
         db.session.commit()
+        response_cache.invalidate(response_cache.PORTFOLIO_PDFS)
+        blob_store.collect(sha256)
         
         return jsonify({'message': 'PDF removido com sucesso'})
         
@@ -193,6 +236,7 @@ def toggle_portfolio_pdf(pdf_id):
         pdf = PortfolioPDF.query.get_or_404(pdf_id)
         pdf.is_active = not pdf.is_active
         db.session.commit()
+        response_cache.invalidate(response_cache.PORTFOLIO_PDFS)
         
         return jsonify(pdf.to_dict())
         
@@ -0,0 +1,30 @@
+from flask import Blueprint, current_app, jsonify
+from src.models.quarantine import QuarantinedFile
+from src.routes.auth import login_required, too_many_attempts
+from src.utils import orphans
+
+storage_bp = Blueprint('storage', __name__)
+
+@storage_bp.route('/storage', methods=['GET'])
+@login_required
+def storage_report():
+    """Relatório da última passada da coleta de órfãos (não varre o disco; ``POST /storage/rescan`` refaz)"""
+    return jsonify({
+        'report': orphans.last_report(),
+        'scanning': orphans.scanning(),
+        'quarantine': [entry.to_dict() for entry in
+                       QuarantinedFile.query.order_by(QuarantinedFile.quarantined_at.desc()).limit(100)],
+        'grace_days': orphans.GRACE_DAYS
+    })
+
+@storage_bp.route('/storage/rescan', methods=['POST'])
+@login_required
+def storage_rescan():
+    """Mede o armazenamento de novo em segundo plano (só mede, não apaga)"""
+    if orphans.scanning():
+        return jsonify({'message': 'Medição já em andamento'}), 202
+    wait = orphans.rescans.take('rescan')
+    if wait:
+        return too_many_attempts(wait)
+    orphans.start_rescan(current_app._get_current_object())
+    return jsonify({'message': 'Medição iniciada'}), 202
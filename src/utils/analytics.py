@@ -0,0 +1,169 @@
+"""Contagem de visualizações e downloads sem escrever no banco a cada acesso.
+
+Cada worker soma os acessos num dicionário em memória, por
+(dia, entidade, item, evento). Uma thread do próprio worker grava os totais
+na tabela ``analytics_daily``, numa única transação. Isso acontece a cada
+``ANALYTICS_FLUSH_INTERVAL`` segundos ou assim que o buffer passa de
+``ANALYTICS_FLUSH_SIZE`` acessos. As requisições públicas nunca esperam pelo
+lock de escrita do SQLite.
+
+Acessos pela URL do blob (``/static/uploads/blobs/...``) só conhecem o
+SHA-256. Eles são atribuídos ao PDF do portfólio (ou independente) com esse
+conteúdo na hora da gravação, com uma consulta por lote.
+"""
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime
+
+from flask import request
+from sqlalchemy.exc import IntegrityError
+
+from src.models.analytics import DailyCount
+from src.models.user import db
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = float(os.environ.get('ANALYTICS_FLUSH_INTERVAL', 30))
+FLUSH_SIZE = int(os.environ.get('ANALYTICS_FLUSH_SIZE', 500))
+# Se o banco ficar fora do ar, o buffer não cresce além disso (o excedente é descartado)
+MAX_KEYS = int(os.environ.get('ANALYTICS_MAX_KEYS', 50000))
+
+_lock = threading.Lock()
+_counts = {}
+_state = {'app': None, 'pid': None, 'hits': 0, 'thread': None, 'wake': threading.Event()}
+
+
+def is_new_view(status):
+    """Só um GET que entrega o começo do arquivo conta.
+
+    304 (revalidação do cache do navegador) e HEAD não entregam nada; os
+    visualizadores de PDF fazem vários pedidos com Range e só o que começa no
+    byte 0 é uma visualização nova.
+    """
+    if request.method != 'GET':
+        return False
+    if status == 200:
+        return True
+    if status == 206:
+        return (request.headers.get('Range') or '').replace(' ', '').startswith('bytes=0-')
+    return False
+
+
+def record(entity, item_id, event):
+    """Soma um acesso no buffer do worker (``item_id`` pode ser o SHA-256 de um blob)"""
+    if item_id is None:
+        return
+    key = (datetime.utcnow().date(), entity, item_id, event)
+    with _lock:
+        if key not in _counts and len(_counts) >= MAX_KEYS:
+            return
+        _counts[key] = _counts.get(key, 0) + 1
+        _state['hits'] += 1
+        full = _state['hits'] >= FLUSH_SIZE
+    _ensure_thread()
+    if full:
+        _state['wake'].set()
+
+
+def record_response(response, entity, item_id, event='view'):
+    """Conta o acesso se a resposta entregou o arquivo; devolve a resposta"""
+    status = response[1] if isinstance(response, tuple) else getattr(response, 'status_code', 200)
+    if is_new_view(status):
+        record(entity, item_id, event)
+    return response
+
+
+def _ensure_thread():
+    # Recriada depois do fork: cada worker tem a sua
+    if _state['pid'] == os.getpid():
+        return
+    with _lock:
+        if _state['pid'] == os.getpid():
+            return
+        _state['pid'] = os.getpid()
+        _state['wake'] = threading.Event()
+        thread = threading.Thread(target=_run, name='analytics-flush', daemon=True)
+        thread.start()
+        _state['thread'] = thread
+
+
+def _run():
+    while True:
+        _state['wake'].wait(FLUSH_INTERVAL)
+        _state['wake'].clear()
+        flush()
+
+
+def _resolve_blobs(counts):
+    """Troca as chaves ('blob', sha256) pelo PDF que tem esse conteúdo"""
+    from src.routes.pdf_standalone import StandalonePDF
+    from src.routes.portfolio_pdfs import PortfolioPDF
+
+    hashes = {key[2] for key in counts if key[1] == 'blob'}
+    if not hashes:
+        return counts
+    owners = {}
+    # Um PDF do portfólio tem preferência sobre o independente com o mesmo conteúdo
+    for entity, model in (('standalone_pdf', StandalonePDF), ('portfolio_pdf', PortfolioPDF)):
+        for item_id, sha256 in db.session.query(model.id, model.sha256).filter(model.sha256.in_(hashes)):
+            owners[sha256] = (entity, item_id)
+
+    resolved = {}
+    for (day, entity, item_id, event), count in counts.items():
+        if entity == 'blob':
+            if item_id not in owners:
+                continue
+            entity, item_id = owners[item_id]
+        key = (day, entity, item_id, event)
+        resolved[key] = resolved.get(key, 0) + count
+    return resolved
+
+
+def _write(counts):
+    table = DailyCount.__table__
+    for (day, entity, item_id, event), count in counts.items():
+        where = (table.c.day == day) & (table.c.entity == entity) & (table.c.item_id == item_id) & (table.c.event == event)
+        result = db.session.execute(table.update().where(where).values(count=table.c.count + count))
+        if not result.rowcount:
+            db.session.execute(table.insert().values(day=day, entity=entity, item_id=item_id, event=event, count=count))
+
+
+def flush():
+    """Grava o buffer do worker numa transação; em caso de erro os totais voltam para o buffer"""
+    with _lock:
+        counts = dict(_counts)
+        _counts.clear()
+        _state['hits'] = 0
+    if not counts or _state['app'] is None:
+        return 0
+
+    with _state['app'].app_context():
+        try:
+            counts = _resolve_blobs(counts)
+            for attempt in range(2):
+                try:
+                    _write(counts)
+                    db.session.commit()
+                    return sum(counts.values())
+                except IntegrityError:
+                    # Outro worker criou a mesma linha ao mesmo tempo: agora o UPDATE acha
+                    db.session.rollback()
+                    if attempt:
+                        raise
+        except Exception as e:
+            db.session.rollback()
+            logger.warning('Falha ao gravar analytics: %s', e)
+            with _lock:
+                for key, count in counts.items():
+                    if key in _counts or len(_counts) < MAX_KEYS:
+                        _counts[key] = _counts.get(key, 0) + count
+                        _state['hits'] += count
+    return 0
+
+
+def init_app(app):
+    """Guarda o app para a thread de gravação e grava o que restar ao sair"""
+    _state['app'] = app
+    atexit.register(flush)
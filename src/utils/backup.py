@@ -0,0 +1,355 @@
+"""Exportação do portfólio e cópia de segurança do site em ZIP, em streaming.
+
+O arquivo é montado enquanto é enviado: o ``ZipFile`` escreve num destino
+sem ``seek`` (os tamanhos e o CRC vão no descritor depois de cada entrada) e
+cada pedaço escrito sai do gerador na hora. Os PDFs entram sem recompressão
+(``ZIP_STORED``), lidos em blocos de ``CHUNK_SIZE``; as tabelas vão em NDJSON
+comprimido, uma linha por registro. Memória constante e nenhum arquivo
+temporário, qualquer que seja o tamanho do acervo.
+
+Layout da cópia completa (``iter_backup``), lida de volta por ``restore``::
+
+    tables/<tabela>.ndjson        todas as tabelas, exceto as efêmeras
+    blobs/<aa>/<sha256>.pdf       cada conteúdo guardado, uma única vez
+    manifest.json                 formato, data, linhas por tabela
+"""
+import json
+import os
+import time
+import zipfile
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, Integer, func, select, text
+from sqlalchemy.orm import Session
+from werkzeug.utils import secure_filename
+
+from src.models.blob import Blob
+from src.models.tombstone import mark_reset
+from src.models.user import db
+from src.utils import blob_store, response_cache
+from src.utils.uploads import HashingFile
+
+FORMAT = 'portfolio-backup'
+VERSION = 1
+CHUNK_SIZE = 64 * 1024
+# Linhas por lote, tanto na leitura das tabelas quanto em cada transação do restore
+BATCH_SIZE = int(os.environ.get('BACKUP_BATCH_SIZE', 1000))
+# Estado que não vale a pena guardar (limites de login) e a quarentena, cujos arquivos não vão no ZIP
+SKIP_TABLES = {'rate_limit_buckets', 'quarantined_files'}
+
+
+class BackupError(Exception):
+    pass
+
+
+class _ZipStream:
+    """Destino sem ``seek`` do ZipFile: acumula o que foi escrito até o próximo ``drain``"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _date_time(value=None):
+    value = value or datetime.utcnow()
+    return max(value, datetime(1980, 1, 1)).timetuple()[:6]
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _tables():
+    # Ordem das chaves estrangeiras: o restore insere nessa mesma ordem
+    return [table for table in db.metadata.sorted_tables if table.name not in SKIP_TABLES]
+
+
+@contextmanager
+def _snapshot():
+    """Conexão de leitura com a mesma visão do banco do começo ao fim do arquivo"""
+    with db.engine.connect() as conn:
+        if conn.dialect.name == 'sqlite':
+            # O pysqlite não abre transação para SELECT: sem o BEGIN cada consulta veria um momento diferente
+            conn.exec_driver_sql('BEGIN')
+        else:
+            conn = conn.execution_options(isolation_level='REPEATABLE READ')
+        try:
+            yield conn
+        finally:
+            conn.rollback()
+
+
+class ArchiveWriter:
+    """Gera o ZIP em pedaços: cada método é um gerador de bytes"""
+
+    def __init__(self):
+        self._out = _ZipStream()
+        self._zip = zipfile.ZipFile(self._out, 'w', allowZip64=True)
+
+    def write_rows(self, name, rows, serialize):
+        """Entrada NDJSON (comprimida); retorna o número de linhas em ``self.count``"""
+        info = zipfile.ZipInfo(name, date_time=_date_time())
+        info.compress_type = zipfile.ZIP_DEFLATED
+        self.count = 0
+        with self._zip.open(info, 'w') as dest:
+            batch = []
+            for row in rows:
+                batch.append(json.dumps(serialize(row), ensure_ascii=False, separators=(',', ':')))
+                if len(batch) >= BATCH_SIZE:
+                    dest.write(('\n'.join(batch) + '\n').encode('utf-8'))
+                    self.count += len(batch)
+                    batch = []
+                    yield self._out.drain()
+            if batch:
+                dest.write(('\n'.join(batch) + '\n').encode('utf-8'))
+                self.count += len(batch)
+        yield self._out.drain()
+
+    def write_file(self, name, path, size, modified=None):
+        """Entrada sem recompressão; retorna False se o arquivo não existe mais"""
+        try:
+            source = open(path, 'rb')
+        except FileNotFoundError:
+            return False
+        with source:
+            info = zipfile.ZipInfo(name, date_time=_date_time(modified))
+            info.compress_type = zipfile.ZIP_STORED
+            info.file_size = size
+            with self._zip.open(info, 'w') as dest:
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                    dest.write(chunk)
+                    yield self._out.drain()
+        yield self._out.drain()
+        return True
+
+    def write_json(self, name, data):
+        info = zipfile.ZipInfo(name, date_time=_date_time())
+        info.compress_type = zipfile.ZIP_DEFLATED
+        self._zip.writestr(info, json.dumps(data, ensure_ascii=False, indent=2))
+        yield self._out.drain()
+
+    def close(self):
+        # Diretório central
+        self._zip.close()
+        yield self._out.drain()
+
+
+def iter_backup():
+    """Cópia completa do site (todas as tabelas e todos os PDFs), em pedaços de bytes"""
+    writer = ArchiveWriter()
+    manifest = {
+        'format': FORMAT,
+        'version': VERSION,
+        'created_at': datetime.utcnow().isoformat(),
+        'tables': {},
+        'blobs': 0,
+        'missing_blobs': []
+    }
+    with _snapshot() as conn:
+        for table in _tables():
+            columns = [column.name for column in table.columns]
+            rows = conn.execute(select(table).execution_options(yield_per=BATCH_SIZE))
+            yield from writer.write_rows(
+                f'tables/{table.name}.ndjson', rows,
+                lambda row: {name: _json_value(value) for name, value in zip(columns, row)})
+            manifest['tables'][table.name] = writer.count
+
+        blobs = conn.execute(select(Blob.sha256, Blob.size, Blob.created_at).order_by(Blob.sha256)
+                             .execution_options(yield_per=BATCH_SIZE))
+        for sha256, size, created_at in blobs:
+            written = yield from writer.write_file(
+                f'blobs/{sha256[:2]}/{sha256}.pdf', blob_store.blob_path(sha256), size, created_at)
+            if written:
+                manifest['blobs'] += 1
+            else:
+                manifest['missing_blobs'].append(sha256)
+
+    yield from writer.write_json('manifest.json', manifest)
+    yield from writer.close()
+
+
+def _export_name(pdf):
+    name = secure_filename(pdf.original_name or '') or 'documento.pdf'
+    if not name.lower().endswith('.pdf'):
+        name += '.pdf'
+    return f'{pdf.id}-{name}'
+
+
+def iter_pdf_export(selection):
+    """ZIP só com os PDFs, com nomes legíveis, e os registros exportados em NDJSON.
+
+    ``selection`` é uma lista de ``(pasta, modelo, ids)``; ``ids`` None exporta
+    todos os registros do modelo.
+    """
+    writer = ArchiveWriter()
+    with _snapshot() as conn, Session(bind=conn) as session:
+        def serialize(pdf):
+            # Fora do mapa de identidade: a memória não cresce com o número de PDFs
+            data = pdf.to_dict()
+            session.expunge(pdf)
+            return data
+
+        for folder, model, ids in selection:
+            query = select(model).where(model.sha256.isnot(None)).order_by(model.id)
+            if ids is not None:
+                query = query.where(model.id.in_(ids))
+            query = query.execution_options(yield_per=BATCH_SIZE)
+            yield from writer.write_rows(f'{folder}.ndjson', session.scalars(query), serialize)
+            for pdf in session.scalars(query):
+                yield from writer.write_file(
+                    f'{folder}/{_export_name(pdf)}', blob_store.blob_path(pdf.sha256), pdf.size, pdf.created_at)
+                session.expunge(pdf)
+    yield from writer.close()
+
+
+def write_archive(chunks, path):
+    """Grava um arquivo gerado por ``iter_backup``/``iter_pdf_export``; retorna o tamanho"""
+    size = 0
+    with open(path, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+            size += len(chunk)
+    return size
+
+
+def _parse_row(table, data):
+    for column in table.columns:
+        value = data.get(column.name)
+        if value is None:
+            continue
+        if isinstance(column.type, DateTime):
+            data[column.name] = datetime.fromisoformat(value)
+        elif isinstance(column.type, Date):
+            data[column.name] = date.fromisoformat(value)
+    return data
+
+
+def _restore_blob(archive, info, sha256):
+    target = blob_store.blob_path(sha256)
+    if os.path.exists(target):
+        return False
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # O mesmo temporário dos uploads: só vira blob depois de conferir o SHA-256
+    tmp = HashingFile(os.path.dirname(target), max_size=info.file_size)
+    try:
+        with archive.open(info) as source:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                tmp.write(chunk)
+        if tmp.sha256 != sha256:
+            raise BackupError(f'Conteúdo de {info.filename} não confere com o SHA-256')
+        tmp.commit(target)
+    finally:
+        tmp.discard()
+    return True
+
+
+def _nonempty_tables(tables):
+    return [table.name for table in tables
+            if db.session.execute(select(func.count()).select_from(table)).scalar()]
+
+
+def restore(path, replace=False, progress=None):
+    """Carrega uma cópia feita por ``iter_backup`` no banco e na pasta de blobs.
+
+    Os blobs são extraídos primeiro (conferindo o SHA-256); depois cada
+    tabela é inserida em lotes de ``BATCH_SIZE`` linhas, um commit por lote.
+    Tabelas com dados só são substituídas com ``replace=True`` (a tabela de
+    admins, que o bootstrap sempre preenche, é substituída sempre).
+    Deve rodar dentro de um ``app_context``.
+    """
+    start = time.perf_counter()
+    progress = progress or (lambda message: None)
+    report = {'tables': {}, 'blobs': 0, 'blobs_existing': 0}
+
+    try:
+        archive = zipfile.ZipFile(path)
+    except (OSError, zipfile.BadZipFile) as e:
+        raise BackupError(f'Não foi possível abrir {path}: {e}')
+    with archive:
+        try:
+            manifest = json.loads(archive.read('manifest.json'))
+        except KeyError:
+            raise BackupError('manifest.json não encontrado: não é uma cópia de segurança')
+        if manifest.get('format') != FORMAT or manifest.get('version') != VERSION:
+            raise BackupError(f"Formato não suportado: {manifest.get('format')} v{manifest.get('version')}")
+
+        tables = [table for table in _tables() if table.name in manifest['tables']]
+        unknown = set(manifest['tables']) - {table.name for table in tables}
+        if unknown:
+            raise BackupError(f"Tabelas desconhecidas nesta versão: {', '.join(sorted(unknown))}")
+        if not replace:
+            occupied = [name for name in _nonempty_tables(tables) if name != 'admin']
+            if occupied:
+                raise BackupError(f"O banco já tem dados em: {', '.join(occupied)} (use --replace)")
+
+        for info in archive.infolist():
+            if not info.filename.startswith('blobs/') or info.is_dir():
+                continue
+            sha256 = os.path.basename(info.filename)[:-len('.pdf')]
+            if _restore_blob(archive, info, sha256):
+                report['blobs'] += 1
+            else:
+                report['blobs_existing'] += 1
+        progress(f"{report['blobs']} PDF(s) extraídos, {report['blobs_existing']} já existiam")
+
+        # Filhas antes das mães ao apagar, mães antes das filhas ao inserir
+        for table in reversed(tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+
+        for table in tables:
+            count = 0
+            with archive.open(f'tables/{table.name}.ndjson') as source:
+                batch = []
+                for line in source:
+                    if not line.strip():
+                        continue
+                    batch.append(_parse_row(table, json.loads(line)))
+                    if len(batch) >= BATCH_SIZE:
+                        db.session.execute(table.insert(), batch)
+                        db.session.commit()
+                        count += len(batch)
+                        batch = []
+                if batch:
+                    db.session.execute(table.insert(), batch)
+                    db.session.commit()
+                    count += len(batch)
+            report['tables'][table.name] = count
+            progress(f'{table.name}: {count} linha(s)')
+
+        if db.engine.dialect.name == 'postgresql':
+            # Os ids vieram explícitos: as sequências precisam continuar depois do maior
+            for table in tables:
+                columns = list(table.primary_key.columns)
+                if len(columns) != 1 or not isinstance(columns[0].type, Integer):
+                    continue
+                name = columns[0].name
+                db.session.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', '{name}'), "
+                    f"COALESCE(MAX({name}), 1)) FROM {table.name}"))
+            db.session.commit()
+
+        # O DELETE não passa pelo ORM (sem lápides) e as linhas restauradas
+        # trazem o updated_at antigo: os clientes do /api/changes recarregam
+        # tudo. Só no fim, com os ids das lápides restauradas já ocupados
+        mark_reset()
+        db.session.commit()
+
+    # Listagens públicas cacheadas nos workers
+    response_cache.invalidate(response_cache.PORTFOLIO_LINKS, response_cache.PORTFOLIO_PDFS)
+    report['seconds'] = round(time.perf_counter() - start, 3)
+    return report
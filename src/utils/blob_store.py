@@ -0,0 +1,157 @@
+"""Armazenamento de PDFs endereçado por conteúdo.
+
+Cada arquivo fica uma única vez em ``uploads/blobs/<aa>/<sha256>.pdf`` e a
+tabela ``blobs`` conta quantos registros (``StandalonePDF``, ``PortfolioPDF``
+e uploads avulsos) apontam para ele. Reenviar um conteúdo já conhecido só
+incrementa o contador; o arquivo só é apagado quando a última referência sai.
+"""
+import hashlib
+import os
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from src.models.blob import Blob
+from src.models.user import db
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
+BLOB_DIR = os.path.join(STATIC_DIR, 'uploads', 'blobs')
+# Pastas usadas antes do armazenamento por conteúdo
+LEGACY_PDF_DIR = os.path.join(STATIC_DIR, 'uploads', 'pdfs')
+LEGACY_PORTFOLIO_DIR = os.path.join(STATIC_DIR, 'uploads', 'portfolio-pdfs')
+
+
+def blob_path(sha256):
+    return os.path.join(BLOB_DIR, sha256[:2], f'{sha256}.pdf')
+
+
+def blob_url(sha256):
+    """URL pública endereçada por conteúdo (pode ser cacheada para sempre)"""
+    return f'/static/uploads/blobs/{sha256[:2]}/{sha256}.pdf' if sha256 else None
+
+
+def _incref(sha256, size):
+    updated = Blob.query.filter_by(sha256=sha256).update(
+        {Blob.ref_count: Blob.ref_count + 1}, synchronize_session=False)
+    if updated:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(Blob(sha256=sha256, size=size, ref_count=1))
+    except IntegrityError:
+        # Outro worker criou o mesmo blob ao mesmo tempo
+        Blob.query.filter_by(sha256=sha256).update(
+            {Blob.ref_count: Blob.ref_count + 1}, synchronize_session=False)
+
+
+def put(file):
+    """Guarda um upload recebido por ``receive_upload(BLOB_DIR)``.
+
+    Incrementa a referência na sessão atual (o chamador faz o commit) e
+    retorna ``(sha256, tamanho)``. Se o conteúdo já existe, o temporário é
+    descartado sem gravar nada.
+    """
+    stream = file.stream
+    sha256, size = stream.sha256, stream.size
+
+    # O incremento vem antes da checagem do arquivo: com a trava de escrita
+    # do banco, um collect() concorrente não apaga o blob no meio do caminho.
+    _incref(sha256, size)
+    path = blob_path(sha256)
+    if os.path.exists(path):
+        stream.discard()
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        stream.commit(path)
+    return sha256, size
+
+
+def put_file(path):
+    """Move um arquivo já existente em disco para o armazenamento"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    sha256, size = digest.hexdigest(), os.path.getsize(path)
+
+    _incref(sha256, size)
+    target = blob_path(sha256)
+    if os.path.exists(target):
+        os.remove(path)
+    else:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+    return sha256, size
+
+
+def retain(sha256):
+    """Nova referência a um blob já guardado; retorna o tamanho ou None"""
+    blob = db.session.get(Blob, sha256) if sha256 else None
+    if blob is None or not os.path.exists(blob_path(sha256)):
+        return None
+    _incref(sha256, blob.size)
+    return blob.size
+
+
+def release(sha256):
+    """Decrementa a referência (o chamador faz o commit e depois ``collect``)"""
+    if sha256:
+        Blob.query.filter_by(sha256=sha256).update(
+            {Blob.ref_count: Blob.ref_count - 1}, synchronize_session=False)
+
+
+def collect(sha256):
+    """Apaga o blob se ninguém mais aponta para ele"""
+    if not sha256:
+        return False
+    deleted = Blob.query.filter(Blob.sha256 == sha256, Blob.ref_count <= 0).delete(synchronize_session=False)
+    if deleted:
+        path = blob_path(sha256)
+        if os.path.exists(path):
+            os.remove(path)
+    db.session.commit()
+    return bool(deleted)
+
+
+def import_legacy_files():
+    """Move os arquivos das pastas antigas para o armazenamento por conteúdo"""
+    from src.routes.pdf_standalone import StandalonePDF
+    from src.routes.portfolio_pdfs import PortfolioPDF
+    from src.routes.pdf_upload import PdfUpload, original_name_from
+
+    imported = 0
+    for model, directory in ((StandalonePDF, LEGACY_PDF_DIR), (PortfolioPDF, LEGACY_PORTFOLIO_DIR)):
+        for pdf in model.query.filter(model.sha256.is_(None)).all():
+            path = os.path.join(directory, pdf.filename)
+            try:
+                pdf.sha256, _ = put_file(path)
+            except FileNotFoundError:
+                # Arquivo sumiu ou outro worker já o importou
+                db.session.rollback()
+                continue
+            db.session.commit()
+            imported += 1
+
+    # O que sobrou na pasta antiga são uploads avulsos
+    if os.path.isdir(LEGACY_PDF_DIR):
+        for entry in os.scandir(LEGACY_PDF_DIR):
+            if not entry.is_file() or not entry.name.lower().endswith('.pdf'):
+                continue
+            try:
+                created_at = entry.stat().st_mtime
+                sha256, size = put_file(entry.path)
+            except FileNotFoundError:
+                # Arquivo sumiu ou outro worker já o importou
+                db.session.rollback()
+                continue
+            db.session.add(PdfUpload(
+                filename=entry.name,
+                original_name=original_name_from(entry.name),
+                sha256=sha256,
+                size=size,
+                created_at=datetime.fromtimestamp(created_at)
+            ))
+            db.session.commit()
+            imported += 1
+
+    return imported
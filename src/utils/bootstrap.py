@@ -0,0 +1,54 @@
+"""Preparação única do banco e dos arquivos, fora do caminho dos workers.
+
+Roda no processo mestre do gunicorn antes do fork (``gunicorn.conf.py``), no
+``init_db.py`` e no ``python src/main.py``. Todos os passos são idempotentes:
+rodar de novo num banco já pronto só faz algumas consultas.
+"""
+import time
+
+from src.models.admin import Admin
+from src.models.schema import upgrade_schema
+from src.models.tombstone import prune_tombstones
+from src.models.user import db
+from src.utils import blob_store
+from src.utils.catalog import inspect_pending
+
+
+def bootstrap(app, verbose=True):
+    """Cria/atualiza o schema, migra PDFs antigos e cria o admin padrão"""
+    start = time.perf_counter()
+    report = {'imported': 0, 'inspected': 0, 'tombstones_pruned': 0, 'admin_created': False}
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
+
+        # Move PDFs das pastas antigas para o armazenamento por conteúdo
+        report['imported'] = blob_store.import_legacy_files()
+
+        # Páginas, versão e título dos PDFs enviados antes do inspetor
+        report['inspected'] = inspect_pending()
+
+        # Lápides além da janela do /api/changes (clientes mais velhos recarregam tudo)
+        report['tombstones_pruned'] = prune_tombstones()
+
+        # Cria admin padrão se não existir
+        if Admin.query.first() is None:
+            admin = Admin(username='diego')
+            admin.set_password('diego123')
+            db.session.add(admin)
+            db.session.commit()
+            report['admin_created'] = True
+
+        # Nenhuma conexão aberta aqui pode ser herdada pelos workers
+        db.session.remove()
+        db.engine.dispose()
+    report['seconds'] = round(time.perf_counter() - start, 3)
+
+    if verbose:
+        if report['imported']:
+            print(f"✅ {report['imported']} PDF(s) movidos para o armazenamento por conteúdo")
+        if report['inspected']:
+            print(f"✅ {report['inspected']} PDF(s) inspecionados")
+        if report['admin_created']:
+            print("✅ Admin criado: diego / diego123")
+    return report
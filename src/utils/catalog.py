@@ -0,0 +1,130 @@
+"""Reconciliação do catálogo de PDFs com o que existe em disco.
+
+Normalmente o catálogo (``pdf_uploads``) e a tabela ``blobs`` são mantidos
+pelas próprias rotas de upload. Depois de restaurar arquivos à mão, perder o
+banco ou um deploy interrompido, ``reconcile_catalog`` refaz tudo a partir
+do disco, em lotes.
+"""
+import os
+from datetime import datetime
+
+from sqlalchemy import func
+
+from src.models.blob import Blob
+from src.models.user import db
+from src.utils import blob_store
+from src.utils.uploads import TEMP_PREFIX
+
+BATCH_SIZE = 500
+
+
+def blob_files():
+    """Gera (sha256, caminho) de cada arquivo do armazenamento"""
+    if not os.path.isdir(blob_store.BLOB_DIR):
+        return
+    for prefix in os.scandir(blob_store.BLOB_DIR):
+        if not prefix.is_dir():
+            continue
+        for entry in os.scandir(prefix.path):
+            name = entry.name
+            if entry.is_file() and name.endswith('.pdf') and not name.startswith(TEMP_PREFIX):
+                yield name[:-len('.pdf')], entry.path
+
+
+def reference_counts():
+    """Quantos registros apontam para cada blob"""
+    from src.routes.pdf_standalone import StandalonePDF
+    from src.routes.portfolio_pdfs import PortfolioPDF
+    from src.routes.pdf_upload import PdfUpload
+
+    counts = {}
+    for model in (PdfUpload, StandalonePDF, PortfolioPDF):
+        rows = db.session.query(model.sha256, func.count()).filter(model.sha256.isnot(None)).group_by(model.sha256)
+        for sha256, count in rows:
+            counts[sha256] = counts.get(sha256, 0) + count
+    return counts
+
+
+def inspect_pending():
+    """Lê as informações (páginas, versão...) dos PDFs ainda não inspecionados"""
+    from src.routes.pdf_standalone import StandalonePDF
+    from src.routes.portfolio_pdfs import PortfolioPDF
+
+    inspected = 0
+    for model in (StandalonePDF, PortfolioPDF):
+        pending = model.query.filter(model.inspected_at.is_(None), model.sha256.isnot(None)).all()
+        for i, pdf in enumerate(pending, 1):
+            pdf.inspect_blob()
+            inspected += 1
+            if i % BATCH_SIZE == 0:
+                db.session.commit()
+        db.session.commit()
+    return inspected
+
+
+def reconcile_catalog(adopt_orphans=True):
+    """Reconstrói o catálogo e as contagens de referência a partir do disco.
+
+    Blobs em disco sem nenhum dono entram no catálogo como uploads avulsos
+    (``adopt_orphans``); entradas do catálogo cujo arquivo sumiu são removidas.
+    Retorna um resumo com o que foi feito.
+    """
+    from src.routes.pdf_upload import PdfUpload
+
+    report = {'imported_legacy': blob_store.import_legacy_files(), 'adopted': 0,
+              'missing_removed': 0, 'refcounts_fixed': 0}
+
+    on_disk = dict(blob_files())
+    counts = reference_counts()
+
+    # Catálogo apontando para arquivos que não existem mais
+    missing = [(upload_id, sha256) for upload_id, sha256 in db.session.query(PdfUpload.id, PdfUpload.sha256)
+               if sha256 not in on_disk]
+    for start in range(0, len(missing), BATCH_SIZE):
+        batch = missing[start:start + BATCH_SIZE]
+        PdfUpload.query.filter(PdfUpload.id.in_([upload_id for upload_id, _ in batch])).delete(synchronize_session=False)
+        db.session.commit()
+        for _, sha256 in batch:
+            counts[sha256] = counts.get(sha256, 1) - 1
+    report['missing_removed'] = len(missing)
+
+    # Arquivos em disco sem dono entram no catálogo
+    if adopt_orphans:
+        for i, (sha256, path) in enumerate(on_disk.items(), 1):
+            if counts.get(sha256, 0) > 0:
+                continue
+            modified = datetime.fromtimestamp(os.path.getmtime(path))
+            # created_at é o momento da adoção, não o do arquivo: a coleta de
+            # órfãos dá o prazo de carência inteiro para ligar o PDF a um link
+            db.session.add(PdfUpload(
+                filename=f"{modified.strftime('%Y%m%d_%H%M%S')}_{sha256[:8]}_recuperado.pdf",
+                original_name='recuperado.pdf',
+                sha256=sha256,
+                size=os.path.getsize(path),
+                created_at=datetime.utcnow()
+            ))
+            counts[sha256] = 1
+            report['adopted'] += 1
+            if i % BATCH_SIZE == 0:
+                db.session.commit()
+        db.session.commit()
+
+    # Tabela blobs: uma linha por arquivo em disco, com a contagem real
+    blobs = {blob.sha256: blob for blob in Blob.query}
+    for i, (sha256, path) in enumerate(on_disk.items(), 1):
+        blob = blobs.get(sha256)
+        if blob is None:
+            blob = Blob(sha256=sha256, size=os.path.getsize(path), ref_count=0)
+            db.session.add(blob)
+        if blob.ref_count != counts.get(sha256, 0):
+            blob.ref_count = counts.get(sha256, 0)
+            report['refcounts_fixed'] += 1
+        if i % BATCH_SIZE == 0:
+            db.session.commit()
+    for sha256, blob in blobs.items():
+        if sha256 not in on_disk and not counts.get(sha256):
+            db.session.delete(blob)
+    db.session.commit()
+
+    report['inspected'] = inspect_pending()
+    return report
@@ -0,0 +1,97 @@
+"""Compressão gzip/brotli das respostas JSON da API, conforme o ``Accept-Encoding``.
+
+Um ``after_request`` comprime as respostas JSON e NDJSON acima de
+``API_COMPRESS_MIN_SIZE`` bytes. PDFs, imagens e ZIPs passam direto (não são
+JSON e já vêm comprimidos). As listas em streaming são comprimidas em
+streaming, um bloco por lote. Se a resposta já tinha um ETag forte, ele vira
+fraco: o corpo muda de bytes, mas um ``If-None-Match`` com ``W/"..."`` ainda
+casa na comparação fraca do ``make_conditional``.
+
+As respostas do ``response_cache`` não passam por aqui: a entrada cacheada
+guarda o corpo já comprimido de cada codificação (``encoded_body``). A
+compressão custa uma vez por alteração, não uma vez por requisição.
+"""
+import os
+import zlib
+
+from flask import request
+
+from src.utils.static_files import available_encodings, brotli, compress
+
+MIN_SIZE = int(os.environ.get('API_COMPRESS_MIN_SIZE', 1024))
+JSON_TYPES = {'application/json', 'application/x-ndjson'}
+
+
+def pick_encoding():
+    """'br', 'gzip' ou None, pela preferência do cliente"""
+    accepted = request.accept_encodings
+    for encoding in available_encodings():
+        if accepted[encoding]:
+            return encoding
+    return None
+
+
+def encoded_body(entry, encoding):
+    """Corpo da entrada cacheada na codificação pedida, comprimido só na primeira vez"""
+    if encoding is None:
+        return entry['body']
+    encoded = entry.setdefault('encoded', {})
+    body = encoded.get(encoding)
+    if body is None:
+        body = encoded[encoding] = compress(entry['body'], encoding)
+    return body
+
+
+def _compressor(encoding):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=5)
+        return compressor.process, compressor.flush, compressor.finish
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31: formato gzip
+    return (compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH),
+            lambda: compressor.flush(zlib.Z_FINISH))
+
+
+def _compress_stream(chunks, encoding):
+    process, flush, finish = _compressor(encoding)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            # Um flush por lote: o cliente recebe cada lote assim que ele sai do banco
+            data = process(chunk) + flush()
+            if data:
+                yield data
+        yield finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def compress_response(response):
+    if (response.status_code != 200 or response.mimetype not in JSON_TYPES
+            or response.content_encoding or response.direct_passthrough):
+        return response
+    if not response.is_streamed and response.calculate_content_length() < MIN_SIZE:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = pick_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        response.set_data(compress(response.get_data(), encoding))
+    response.content_encoding = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    """Liga a compressão nas respostas JSON do app"""
+    app.after_request(compress_response)
@@ -0,0 +1,77 @@
+"""Configuração do banco de dados e do engine do SQLAlchemy.
+
+Sem ``DATABASE_URL`` o app usa o SQLite em ``src/database/app.db``. Cada
+conexão SQLite recebe os pragmas abaixo: com WAL os leitores não esperam o
+escritor (e vice-versa), e o ``busy_timeout`` faz um segundo escritor
+aguardar a vez em vez de falhar com ``database is locked`` quando o
+gunicorn roda com vários workers.
+
+Com ``DATABASE_URL`` (ex.: Postgres no Render) o pool usa ``pool_pre_ping``
+e os tamanhos de ``DB_POOL_SIZE``/``DB_MAX_OVERFLOW``/``DB_POOL_RECYCLE``.
+"""
+import os
+
+from sqlalchemy import event
+
+from src.models.user import db
+
+DATABASE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database')
+SQLITE_PATH = os.path.join(DATABASE_DIR, 'app.db')
+
+BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 15000))
+MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 128 * 1024 * 1024))
+# Negativo = tamanho em KiB (aqui, 16 MB de cache por conexão)
+CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', -16000))
+
+POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+
+
+def database_url():
+    """URL do banco: ``DATABASE_URL`` ou o SQLite local"""
+    url = os.environ.get('DATABASE_URL')
+    if not url:
+        return f"sqlite:///{SQLITE_PATH}"
+    # Render e Heroku ainda entregam o esquema antigo do Postgres
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def engine_options(url):
+    if url.startswith('sqlite'):
+        return {'connect_args': {'timeout': BUSY_TIMEOUT_MS / 1000}}
+    return {
+        'pool_pre_ping': True,
+        'pool_size': POOL_SIZE,
+        'max_overflow': MAX_OVERFLOW,
+        'pool_recycle': POOL_RECYCLE,
+    }
+
+
+def sqlite_pragmas(dbapi_connection, connection_record):
+    """Pragmas aplicados em toda conexão SQLite nova"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+        cursor.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+        cursor.execute(f'PRAGMA cache_size={CACHE_SIZE}')
+        cursor.execute('PRAGMA temp_store=MEMORY')
+    finally:
+        cursor.close()
+
+
+def init_database(app):
+    """Configura o SQLAlchemy no app e registra os pragmas do SQLite"""
+    url = app.config.get('SQLALCHEMY_DATABASE_URI') or database_url()
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(url))
+    db.init_app(app)
+
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, 'connect', sqlite_pragmas)
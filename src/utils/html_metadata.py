@@ -0,0 +1,96 @@
+"""Leitura dos metadados de uma página direto do stream HTTP.
+
+Só o ``<head>`` interessa: o parser é alimentado em pedaços, para assim que
+encontra ``</head>`` (ou ``<body>``) e nunca lê mais que ``MAX_BYTES``.
+"""
+import codecs
+import os
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+MAX_BYTES = int(os.environ.get('METADATA_MAX_BYTES', 512 * 1024))
+CHUNK_SIZE = 8192
+
+# Ordem de preferência de cada campo
+TITLE_KEYS = ('og:title', 'twitter:title')
+DESCRIPTION_KEYS = ('og:description', 'twitter:description', 'description')
+IMAGE_KEYS = ('og:image', 'og:image:url', 'twitter:image', 'twitter:image:src')
+WANTED_KEYS = set(TITLE_KEYS + DESCRIPTION_KEYS + IMAGE_KEYS)
+
+
+class HeadMetadataParser(HTMLParser):
+    """Coleta ``<title>`` e as tags ``<meta>`` relevantes em uma única passada"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta = {}
+        self.title = None
+        self.done = False
+        self._in_title = False
+        self._title_parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'body':
+            self.done = True
+        elif tag == 'title' and self.title is None:
+            self._in_title = True
+        elif tag == 'meta':
+            attrs = dict(attrs)
+            key = (attrs.get('property') or attrs.get('name') or '').strip().lower()
+            content = attrs.get('content')
+            if key in WANTED_KEYS and content and key not in self.meta:
+                self.meta[key] = content.strip()
+
+    def handle_endtag(self, tag):
+        if tag == 'title' and self._in_title:
+            self._in_title = False
+            self.title = ''.join(self._title_parts).strip()
+        elif tag == 'head':
+            self.done = True
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._title_parts.append(data)
+
+    def first(self, keys):
+        for key in keys:
+            if self.meta.get(key):
+                return self.meta[key]
+        return None
+
+
+def _encoding(response):
+    # Sem charset no Content-Type o requests assume ISO-8859-1; a web é UTF-8
+    if 'charset' in response.headers.get('Content-Type', '').lower() and response.encoding:
+        return response.encoding
+    return 'utf-8'
+
+
+def read_metadata(response, url, max_bytes=MAX_BYTES):
+    """Lê o stream de uma resposta (``stream=True``) e devolve os metadados"""
+    try:
+        decoder = codecs.getincrementaldecoder(_encoding(response))(errors='replace')
+    except LookupError:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    parser = HeadMetadataParser()
+    received = 0
+    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+        chunk = chunk[:max_bytes - received]
+        received += len(chunk)
+        parser.feed(decoder.decode(chunk))
+        if parser.done or received >= max_bytes:
+            break
+
+    title = parser.first(TITLE_KEYS) or parser.title
+    description = parser.first(DESCRIPTION_KEYS)
+    image_url = parser.first(IMAGE_KEYS)
+    # Converter URL relativa para absoluta
+    if image_url and not image_url.startswith('http'):
+        image_url = urljoin(url, image_url)
+
+    return {
+        'title': title or 'Sem título',
+        'description': description or 'Sem descrição',
+        'image_url': image_url
+    }
@@ -0,0 +1,64 @@
+"""Sessão HTTP compartilhada para as requisições de saída.
+
+O ``requests`` só é importado na primeira requisição de saída: a maioria dos
+workers nunca busca metadados e não precisa pagar o import no cold start.
+"""
+import os
+import threading
+import time
+
+from src.utils import metrics
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Quantos hosts mantêm pool aberto e quantas conexões keep-alive por host
+POOL_HOSTS = int(os.environ.get('HTTP_POOL_HOSTS', 20))
+POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', 4))
+
+_adapter_class = None
+
+
+def timed_adapter_class():
+    """HTTPAdapter que registra tempo e resultado de cada requisição nas métricas"""
+    global _adapter_class
+    if _adapter_class is None:
+        from requests.adapters import HTTPAdapter
+
+        class TimedHTTPAdapter(HTTPAdapter):
+            def __init__(self, target, **kwargs):
+                self.target = target
+                super().__init__(**kwargs)
+
+            def send(self, request, **kwargs):
+                start = time.perf_counter()
+                try:
+                    response = super().send(request, **kwargs)
+                except Exception:
+                    metrics.observe_outbound(self.target, 'error', time.perf_counter() - start)
+                    raise
+                metrics.observe_outbound(self.target, f'{response.status_code // 100}xx', time.perf_counter() - start)
+                return response
+
+        _adapter_class = TimedHTTPAdapter
+    return _adapter_class
+
+
+_session = None
+_session_pid = None
+_lock = threading.Lock()
+
+
+def get_session():
+    """Retorna a sessão do processo atual, criando-a após o fork se preciso"""
+    global _session, _session_pid
+    with _lock:
+        if _session is None or _session_pid != os.getpid():
+            import requests
+            session = requests.Session()
+            adapter = timed_adapter_class()('metadata', pool_connections=POOL_HOSTS, pool_maxsize=POOL_SIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = USER_AGENT
+            _session = session
+            _session_pid = os.getpid()
+        return _session
@@ -0,0 +1,85 @@
+"""Fila de tarefas em segundo plano executadas por threads do próprio worker."""
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """Fila limitada com um pool fixo de threads e novas tentativas.
+
+    As threads só são criadas no primeiro ``submit`` (e recriadas se o
+    processo mudar), para funcionar depois do fork dos workers do gunicorn.
+    """
+
+    def __init__(self, name, workers=2, max_size=100, retries=2, retry_delay=2.0):
+        self.name = name
+        self.workers = workers
+        self.max_size = max_size
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._queue = queue.Queue(maxsize=max_size)
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._threads = []
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'{self.name}-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def is_full(self):
+        return self._queue.full()
+
+    def pending(self):
+        """Número de tarefas aguardando execução"""
+        return self._queue.qsize()
+
+    def submit(self, func, *args, on_failure=None):
+        """Enfileira ``func(*args)``; retorna False se a fila estiver cheia.
+
+        ``on_failure(*args, error)`` é chamado quando todas as tentativas falham.
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((func, args, on_failure))
+        except queue.Full:
+            return False
+        return True
+
+    def join(self):
+        """Bloqueia até a fila esvaziar (útil em scripts e testes)"""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            func, args, on_failure = self._queue.get()
+            try:
+                self._execute(func, args, on_failure)
+            finally:
+                self._queue.task_done()
+
+    def _execute(self, func, args, on_failure):
+        for attempt in range(self.retries + 1):
+            try:
+                func(*args)
+                return
+            except Exception as e:
+                if attempt < self.retries:
+                    time.sleep(self.retry_delay * (2 ** attempt))
+                    continue
+                logger.warning('Tarefa %s falhou após %d tentativas: %s', self.name, attempt + 1, e)
+                if on_failure is not None:
+                    try:
+                        on_failure(*args, e)
+                    except Exception:
+                        logger.exception('Erro ao registrar falha da tarefa %s', self.name)
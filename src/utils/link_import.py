@@ -0,0 +1,121 @@
+"""Leitura das listas de links para importação em massa.
+
+Formatos aceitos: JSON (lista de URLs ou de objetos com ``url``, ``title``,
+``description``...), CSV (coluna ``url`` ou a primeira coluna) e o HTML de
+favoritos exportado pelos navegadores (Netscape bookmarks).
+"""
+import csv
+import io
+import json
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+from src.models.metadata_cache import normalize_url
+
+FORMATS = ('json', 'csv', 'html')
+FIELDS = ('url', 'title', 'description', 'image_url', 'pdf_url')
+
+
+class BookmarksParser(HTMLParser):
+    """Coleta os <a href> de um arquivo de favoritos, com o texto como título"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.entries = []
+        self._current = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            href = dict(attrs).get('href')
+            self._current = {'url': href, 'title': ''} if href else None
+
+    def handle_data(self, data):
+        if self._current is not None:
+            self._current['title'] += data
+
+    def handle_endtag(self, tag):
+        if tag == 'a' and self._current is not None:
+            self._current['title'] = self._current['title'].strip()
+            self.entries.append(self._current)
+            self._current = None
+
+
+def guess_format(filename=None, content_type=None, text=''):
+    name = (filename or '').lower()
+    content_type = (content_type or '').lower()
+    if name.endswith('.json') or 'json' in content_type:
+        return 'json'
+    if name.endswith('.csv') or 'csv' in content_type:
+        return 'csv'
+    if name.endswith(('.html', '.htm')) or 'html' in content_type:
+        return 'html'
+    stripped = text.lstrip()
+    if stripped.startswith(('[', '{')):
+        return 'json'
+    if stripped.startswith('<'):
+        return 'html'
+    return 'csv'
+
+
+def _from_json(text):
+    data = json.loads(text)
+    if isinstance(data, dict):
+        data = data.get('links') or data.get('urls') or []
+    if not isinstance(data, list):
+        raise ValueError('JSON deve ser uma lista de links')
+    return data
+
+
+def _from_csv(text):
+    rows = list(csv.reader(io.StringIO(text)))
+    if not rows:
+        return []
+    header = [column.strip().lower() for column in rows[0]]
+    if 'url' in header:
+        return [dict(zip(header, row)) for row in rows[1:]]
+    return [{'url': row[0]} for row in rows if row]
+
+
+def _from_html(text):
+    parser = BookmarksParser()
+    parser.feed(text)
+    parser.close()
+    return parser.entries
+
+
+def is_valid_url(url):
+    parts = urlsplit(url)
+    return parts.scheme in ('http', 'https') and bool(parts.netloc)
+
+
+def url_key(url):
+    """Chave de comparação de URLs repetidas (host minúsculo, query ordenada, sem fragmento)"""
+    try:
+        return normalize_url(url)
+    except ValueError:
+        # Porta inválida etc.: compara o texto como veio
+        return url.strip()
+
+
+def normalize_entries(items):
+    """Lista de links (dicts com os campos de ``FIELDS``), sem URLs repetidas.
+
+    Cada item pode ser a URL em texto ou um dict; o resto é ignorado.
+    """
+    entries = {}
+    for item in items:
+        if isinstance(item, str):
+            item = {'url': item}
+        if not isinstance(item, dict):
+            continue
+        entry = {field: (str(item[field]).strip() or None) if item.get(field) else None for field in FIELDS}
+        if entry['url'] and url_key(entry['url']) not in entries:
+            entries[url_key(entry['url'])] = entry
+    return list(entries.values())
+
+
+def parse_entries(text, fmt):
+    """Lê o conteúdo no formato ``fmt`` (json, csv ou html)"""
+    if fmt not in FORMATS:
+        raise ValueError(f'Formato desconhecido: {fmt}')
+    return normalize_entries({'json': _from_json, 'csv': _from_csv, 'html': _from_html}[fmt](text))
@@ -0,0 +1,290 @@
+"""Métricas da aplicação no formato texto do Prometheus.
+
+Cada worker do gunicorn acumula os números em memória e, no máximo a cada
+``METRICS_FLUSH_INTERVAL`` segundos, grava um retrato em
+``METRICS_DIR/<pid>-<início>.json`` (com ``os.replace``, como os arquivos
+de versão do ``response_cache``). O ``/metrics`` soma os arquivos de todos
+os workers, então qualquer worker responde pelo processo inteiro.
+
+O que é medido:
+
+- requisições por blueprint/endpoint/status, com histogramas de latência e
+  de tamanho da requisição e da resposta;
+- consultas SQL por requisição (quantidade e tempo), via eventos do engine;
+- requisições HTTP de saída (busca de metadados), via o adapter da sessão.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+
+from src.models.user import db
+
+METRICS_DIR = os.environ.get('METRICS_DIR') or os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'database', 'metrics')
+FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+# Arquivos de workers que não escrevem há mais tempo que isso são apagados
+RETENTION = float(os.environ.get('METRICS_RETENTION', 7 * 24 * 3600))
+# Se definido, /metrics exige "Authorization: Bearer <token>"
+TOKEN = os.environ.get('METRICS_TOKEN')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# nome -> (tipo, descrição, buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'Requisições atendidas', None),
+    'http_request_duration_seconds': ('histogram', 'Tempo de resposta', LATENCY_BUCKETS),
+    'http_request_size_bytes': ('histogram', 'Tamanho do corpo da requisição', SIZE_BUCKETS),
+    'http_response_size_bytes': ('histogram', 'Tamanho do corpo da resposta', SIZE_BUCKETS),
+    'db_queries_per_request': ('histogram', 'Consultas SQL por requisição', QUERY_BUCKETS),
+    'db_query_seconds_per_request': ('histogram', 'Tempo em SQL por requisição', LATENCY_BUCKETS),
+    'db_queries_total': ('counter', 'Consultas SQL executadas', None),
+    'db_query_seconds_total': ('counter', 'Tempo total em SQL', None),
+    'outbound_requests_total': ('counter', 'Requisições HTTP de saída', None),
+    'outbound_request_duration_seconds': ('histogram', 'Tempo das requisições HTTP de saída', LATENCY_BUCKETS),
+}
+
+
+class Registry:
+    """Contadores e histogramas do processo atual"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, labels, value=1):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * len(buckets), 0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram[0][i] += 1
+                    break
+            histogram[1] += value
+            histogram[2] += 1
+
+    def clear(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(labels), list(h[0]), h[1], h[2]] for (name, labels), h in self.histograms.items()],
+            }
+
+
+registry = Registry()
+_state = {'pid': None, 'path': None, 'flushed_at': 0.0}
+_flush_lock = threading.Lock()
+
+
+def _after_fork():
+    # O worker nasce com os números do mestre (consultas do bootstrap); sem
+    # limpar, o /metrics os somaria uma vez por worker
+    registry.clear()
+    _state['flushed_at'] = 0.0
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def _worker_path():
+    # Recalculado depois do fork: cada worker tem o seu arquivo
+    if _state['pid'] != os.getpid():
+        _state['pid'] = os.getpid()
+        _state['path'] = os.path.join(METRICS_DIR, f'{os.getpid()}-{int(time.time() * 1000)}.json')
+    return _state['path']
+
+
+def flush(force=False):
+    """Grava o retrato deste worker (no máximo a cada FLUSH_INTERVAL)"""
+    now = time.monotonic()
+    if not force and now - _state['flushed_at'] < FLUSH_INTERVAL:
+        return
+    with _flush_lock:
+        if not force and now - _state['flushed_at'] < FLUSH_INTERVAL:
+            return
+        _state['flushed_at'] = now
+        path = _worker_path()
+        try:
+            os.makedirs(METRICS_DIR, exist_ok=True)
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(registry.snapshot(), f)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+
+def collect():
+    """Soma os retratos de todos os workers"""
+    counters, histograms = {}, {}
+    cutoff = time.time() - RETENTION
+    try:
+        entries = list(os.scandir(METRICS_DIR))
+    except FileNotFoundError:
+        entries = []
+    for entry in entries:
+        if not entry.name.endswith('.json'):
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                continue
+            with open(entry.path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, buckets, total, count in snapshot['histograms']:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            merged = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+            merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+            merged[1] += total
+            merged[2] += count
+    return counters, histograms
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs, extra=()):
+    pairs = list(pairs) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (f'{k}="{_escape(v)}"' for k, v in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+def render(counters, histograms):
+    lines = []
+    for name, (kind, description, buckets) in METRICS.items():
+        series = [(key[1], value) for key, value in (counters if kind == 'counter' else histograms).items() if key[0] == name]
+        if not series:
+            continue
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(series):
+            if kind == 'counter':
+                lines.append(f'{name}{_labels(labels)} {value}')
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_bucket{_labels(labels, [("le", "+Inf")])} {count}')
+            lines.append(f'{name}_sum{_labels(labels)} {total}')
+            lines.append(f'{name}_count{_labels(labels)} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+def observe_outbound(target, outcome, seconds):
+    """Registra uma requisição HTTP de saída (``outcome``: 2xx, 4xx, error...)"""
+    labels = {'target': target, 'outcome': outcome}
+    registry.inc('outbound_requests_total', labels)
+    registry.observe('outbound_request_duration_seconds', {'target': target}, seconds)
+
+
+def _before_request():
+    g._metrics = {'start': time.perf_counter(), 'queries': 0, 'query_seconds': 0.0, 'recorded': False}
+
+
+def _record(status, response_size):
+    state = g.get('_metrics')
+    if state is None or state['recorded']:
+        return
+    state['recorded'] = True
+
+    endpoint = request.endpoint or 'unmatched'
+    blueprint = request.blueprint or 'app'
+    labels = {'blueprint': blueprint, 'endpoint': endpoint}
+    registry.inc('http_requests_total', dict(labels, method=request.method, status=str(status)))
+    registry.observe('http_request_duration_seconds', labels, time.perf_counter() - state['start'])
+    registry.observe('http_request_size_bytes', labels, request.content_length or 0)
+    if response_size is not None:
+        registry.observe('http_response_size_bytes', labels, response_size)
+    registry.observe('db_queries_per_request', labels, state['queries'])
+    registry.observe('db_query_seconds_per_request', labels, state['query_seconds'])
+    flush()
+
+
+def _after_request(response):
+    # Respostas em streaming não têm tamanho conhecido aqui
+    size = None if response.is_streamed else response.calculate_content_length()
+    _record(response.status_code, size)
+    return response
+
+
+def _teardown_request(error):
+    if error is not None:
+        _record(500, None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_metrics_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('_metrics_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    state = g.get('_metrics') if has_request_context() else None
+    if state is not None:
+        state['queries'] += 1
+        state['query_seconds'] += elapsed
+    source = 'request' if state is not None else 'background'
+    registry.inc('db_queries_total', {'source': source})
+    registry.inc('db_query_seconds_total', {'source': source}, elapsed)
+
+
+def _handle_error(context):
+    starts = context.connection.info.get('_metrics_start') if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def metrics_view():
+    if TOKEN and request.headers.get('Authorization') != f'Bearer {TOKEN}':
+        return Response('Não autorizado\n', status=401, mimetype='text/plain')
+    flush(force=True)
+    return Response(render(*collect()), mimetype='text/plain; version=0.0.4')
+
+
+def init_app(app):
+    """Liga os hooks do Flask e do SQLAlchemy e registra a rota /metrics"""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(db.engine, 'handle_error', _handle_error)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+    atexit.register(flush, force=True)
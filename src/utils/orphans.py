@@ -0,0 +1,366 @@
+"""Coleta de arquivos sem dono e contabilidade do espaço em disco.
+
+Três tipos de sobra são tratados, em lotes de ``BATCH_SIZE`` com um commit
+por lote (nenhuma trava de escrita fica presa durante a varredura):
+
+- temporários de upload (``.upload-*.part``) abandonados por um worker que
+  morreu no meio do envio: apagados direto;
+- uploads avulsos (``/api/upload/pdf``) que nenhum ``PortfolioLink.pdf_url``
+  usa há mais de ``ORPHAN_GRACE_DAYS``: o registro sai e o blob fica sem dono;
+- blobs sem nenhum registro (``PdfUpload``, ``StandalonePDF``,
+  ``PortfolioPDF`` ou um ``pdf_url`` com a URL do blob), como o arquivo de um
+  upload cujo commit falhou.
+
+Blobs sem dono vão para a quarentena (fora da pasta pública) e só são
+apagados ``ORPHAN_GRACE_DAYS`` depois; até lá ``release`` os devolve.
+
+Cada passada grava o seu relatório em ``REPORT_PATH`` (com ``os.replace``,
+visível para todos os workers). O ``/api/storage`` serve esse relatório em vez
+de varrer o disco dentro da requisição; ``start_rescan`` refaz a medição numa
+thread, com a mesma pausa entre lotes da coleta periódica.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from src.models.blob import Blob
+from src.models.portfolio import PortfolioLink
+from src.models.quarantine import UNLINKED_UPLOAD, UNREFERENCED, QuarantinedFile
+from src.models.user import db
+from src.utils import blob_store
+from src.utils.catalog import blob_files
+from src.utils.database import DATABASE_DIR
+from src.utils.throttle import TokenBucket
+from src.utils.uploads import TEMP_PREFIX, TEMP_SUFFIX
+
+logger = logging.getLogger(__name__)
+
+# Quanto tempo um upload avulso sem link e um arquivo em quarentena esperam
+GRACE_DAYS = float(os.environ.get('ORPHAN_GRACE_DAYS', 7))
+# Coleta periódica em segundo plano (segundos; 0 desliga)
+GC_INTERVAL = float(os.environ.get('ORPHAN_GC_INTERVAL', 0))
+# Arquivos mais novos que isso podem ser de um upload ainda em andamento
+IN_FLIGHT_SECONDS = 3600
+BATCH_SIZE = 200
+QUARANTINE_DIR = os.path.join(DATABASE_DIR, 'quarantine')
+REPORT_PATH = os.path.join(DATABASE_DIR, 'storage-report.json')
+# Espera entre lotes das passadas em segundo plano (divide o banco com as requisições)
+BACKGROUND_PAUSE = 0.05
+
+_lock = threading.Lock()
+_rescan_lock = threading.Lock()
+_state = {'pid': None, 'app': None}
+# Uma coleta por intervalo entre todos os workers
+_schedule = TokenBucket('orphan-gc', 1, GC_INTERVAL or 1)
+# Uma medição pedida pelo painel por minuto entre todos os workers
+rescans = TokenBucket('orphan-rescan', 1, 60)
+
+
+def quarantine_path(sha256):
+    return os.path.join(QUARANTINE_DIR, f'{sha256}.pdf')
+
+
+def _owners():
+    from src.routes.pdf_standalone import StandalonePDF
+    from src.routes.portfolio_pdfs import PortfolioPDF
+    from src.routes.pdf_upload import PdfUpload
+    return (PdfUpload, StandalonePDF, PortfolioPDF)
+
+
+def _new_report():
+    return {
+        'files': 0, 'bytes': 0,
+        'temp_files': 0, 'temp_bytes': 0,
+        'unlinked_uploads': 0, 'unlinked_bytes': 0,
+        'orphans': 0, 'orphan_bytes': 0,
+        'quarantined': 0, 'quarantined_bytes': 0,
+        'purged': 0, 'purged_bytes': 0,
+        'dry_run': False
+    }
+
+
+def linked_references():
+    """(nomes de uploads avulsos, SHA-256 de blobs) citados nos ``pdf_url`` dos links"""
+    filenames, hashes = set(), set()
+    rows = db.session.query(PortfolioLink.pdf_url).filter(PortfolioLink.pdf_url.isnot(None))
+    for pdf_url, in rows.yield_per(BATCH_SIZE):
+        path = urlsplit(pdf_url.strip()).path
+        name = path.rsplit('/', 1)[-1]
+        if '/uploads/pdfs/' in path:
+            filenames.add(name)
+        elif '/uploads/blobs/' in path and name.endswith('.pdf'):
+            hashes.add(name[:-len('.pdf')])
+    return filenames, hashes
+
+
+def _temp_files():
+    directories = [blob_store.BLOB_DIR, blob_store.LEGACY_PDF_DIR, blob_store.LEGACY_PORTFOLIO_DIR]
+    if os.path.isdir(blob_store.BLOB_DIR):
+        directories += [entry.path for entry in os.scandir(blob_store.BLOB_DIR) if entry.is_dir()]
+    for directory in directories:
+        if not os.path.isdir(directory):
+            continue
+        for entry in os.scandir(directory):
+            if entry.is_file() and entry.name.startswith(TEMP_PREFIX) and entry.name.endswith(TEMP_SUFFIX):
+                yield entry
+
+
+def _collect_temp_files(report, now, dry_run):
+    for entry in _temp_files():
+        try:
+            stat = entry.stat()
+            if stat.st_mtime > now.timestamp() - IN_FLIGHT_SECONDS:
+                continue
+            if not dry_run:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            continue
+        report['temp_files'] += 1
+        report['temp_bytes'] += stat.st_size
+
+
+def _collect_unlinked_uploads(report, now, dry_run, linked, pause):
+    """Remove uploads avulsos antigos sem link; retorna {sha256: upload} para a quarentena"""
+    PdfUpload = _owners()[0]
+    cutoff = now - timedelta(days=GRACE_DAYS)
+    removed, last_id = {}, 0
+    while True:
+        batch = PdfUpload.query.filter(PdfUpload.id > last_id, PdfUpload.created_at < cutoff) \
+            .order_by(PdfUpload.id).limit(BATCH_SIZE).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+        for upload in batch:
+            if upload.filename in linked:
+                continue
+            report['unlinked_uploads'] += 1
+            report['unlinked_bytes'] += upload.size
+            if not dry_run:
+                removed[upload.sha256] = (upload.filename, upload.original_name)
+                db.session.delete(upload)
+                blob_store.release(upload.sha256)
+        db.session.commit()
+        time.sleep(pause)
+    return removed
+
+
+def _is_owned(sha256, linked_hashes):
+    if sha256 in linked_hashes:
+        return True
+    return any(db.session.query(model.id).filter(model.sha256 == sha256).first() for model in _owners())
+
+
+def _quarantine(sha256, path, size, reason, upload, now, linked_hashes):
+    # A trava de escrita vem antes de tudo (como no blob_store.collect): um
+    # put() concorrente do mesmo conteúdo termina antes ou começa depois
+    Blob.query.filter(Blob.sha256 == sha256, Blob.ref_count <= 0).delete(synchronize_session=False)
+    still_counted = db.session.query(Blob.sha256).filter(Blob.sha256 == sha256).first()
+    if still_counted or _is_owned(sha256, linked_hashes):
+        db.session.rollback()
+        return False
+    os.makedirs(QUARANTINE_DIR, exist_ok=True)
+    target = quarantine_path(sha256)
+    os.replace(path, target)
+    try:
+        filename, original_name = upload or (None, None)
+        db.session.merge(QuarantinedFile(sha256=sha256, size=size, reason=reason, filename=filename,
+                                         original_name=original_name, quarantined_at=now))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        os.replace(target, path)
+        raise
+    return True
+
+
+def _collect_blobs(report, now, dry_run, removed, linked_hashes, pause):
+    files = list(blob_files())
+    recent = now.timestamp() - IN_FLIGHT_SECONDS
+    for start in range(0, len(files), BATCH_SIZE):
+        batch = dict(files[start:start + BATCH_SIZE])
+        owned = set()
+        for model in _owners():
+            owned.update(sha256 for sha256, in db.session.query(model.sha256).filter(model.sha256.in_(batch)))
+        refs = dict(db.session.query(Blob.sha256, Blob.ref_count).filter(Blob.sha256.in_(batch)))
+        db.session.commit()
+
+        for sha256, path in batch.items():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            report['files'] += 1
+            report['bytes'] += stat.st_size
+            if sha256 in owned or sha256 in linked_hashes or refs.get(sha256, 0) > 0:
+                continue
+            # Sem linha em ``blobs`` e recente: pode ser um upload ainda sem commit
+            if sha256 not in refs and stat.st_mtime > recent:
+                continue
+            reason = UNLINKED_UPLOAD if sha256 in removed else UNREFERENCED
+            if dry_run or _quarantine(sha256, path, stat.st_size, reason, removed.get(sha256), now, linked_hashes):
+                report['orphans'] += 1
+                report['orphan_bytes'] += stat.st_size
+        time.sleep(pause)
+
+
+def _purge_quarantine(report, now, dry_run, pause):
+    cutoff = now - timedelta(days=GRACE_DAYS)
+    last = ''
+    while True:
+        batch = QuarantinedFile.query.filter(QuarantinedFile.sha256 > last) \
+            .order_by(QuarantinedFile.sha256).limit(BATCH_SIZE).all()
+        if not batch:
+            break
+        last = batch[-1].sha256
+        for entry in batch:
+            if entry.quarantined_at >= cutoff:
+                report['quarantined'] += 1
+                report['quarantined_bytes'] += entry.size
+                continue
+            report['purged'] += 1
+            report['purged_bytes'] += entry.size
+            if not dry_run:
+                try:
+                    os.remove(quarantine_path(entry.sha256))
+                except FileNotFoundError:
+                    pass
+                db.session.delete(entry)
+        db.session.commit()
+        time.sleep(pause)
+
+
+def collect_orphans(dry_run=False, pause=0):
+    """Uma passada completa; com ``dry_run`` só mede. Retorna o relatório em bytes.
+
+    ``reclaimable_bytes`` é o que esta passada liberou ou deixou na fila para
+    liberar (quarentena incluída); ``pause`` é a espera entre lotes, usada pela
+    coleta em segundo plano para dividir o banco com as requisições.
+    """
+    start = time.perf_counter()
+    now = datetime.utcnow()
+    report = _new_report()
+    report['dry_run'] = dry_run
+
+    _collect_temp_files(report, now, dry_run)
+    linked, linked_hashes = linked_references()
+    removed = _collect_unlinked_uploads(report, now, dry_run, linked, pause)
+    _collect_blobs(report, now, dry_run, removed, linked_hashes, pause)
+    _purge_quarantine(report, now, dry_run, pause)
+
+    report['reclaimable_bytes'] = report['temp_bytes'] + report['quarantined_bytes'] + report['purged_bytes']
+    if dry_run:
+        # Na simulação nada foi para a quarentena (e os uploads sem link ainda seguram os seus blobs)
+        report['reclaimable_bytes'] += report['unlinked_bytes'] + report['orphan_bytes']
+    report['seconds'] = round(time.perf_counter() - start, 3)
+    report['finished_at'] = datetime.utcnow().isoformat()
+    save_report(report)
+    return report
+
+
+def save_report(report):
+    """Grava o relatório da última passada para todos os workers"""
+    tmp_path = f'{REPORT_PATH}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(os.path.dirname(REPORT_PATH), exist_ok=True)
+        with open(tmp_path, 'w') as f:
+            json.dump(report, f)
+        os.replace(tmp_path, REPORT_PATH)
+    except OSError as e:
+        logger.warning('Falha ao gravar o relatório de armazenamento: %s', e)
+
+
+def last_report():
+    """Relatório da última passada (coleta ou medição), ou None se ainda não houve nenhuma"""
+    try:
+        with open(REPORT_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def release(sha256):
+    """Devolve um arquivo da quarentena ao armazenamento como upload avulso; retorna o upload ou None"""
+    PdfUpload = _owners()[0]
+    entry = db.session.get(QuarantinedFile, sha256)
+    if entry is None or not os.path.exists(quarantine_path(sha256)):
+        return None
+    filename = entry.filename
+    if not filename or PdfUpload.query.filter_by(filename=filename).first():
+        filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{sha256[:8]}_recuperado.pdf"
+    _, size = blob_store.put_file(quarantine_path(sha256))
+    upload = PdfUpload(filename=filename, original_name=entry.original_name or 'recuperado.pdf',
+                       sha256=sha256, size=size)
+    db.session.add(upload)
+    db.session.delete(entry)
+    db.session.commit()
+    return upload
+
+
+def _run():
+    while True:
+        time.sleep(GC_INTERVAL)
+        with _state['app'].app_context():
+            try:
+                if _schedule.take('run'):
+                    continue
+                report = collect_orphans(pause=BACKGROUND_PAUSE)
+                logger.info('Coleta de órfãos: %s', report)
+            except Exception as e:
+                db.session.rollback()
+                logger.warning('Falha na coleta de órfãos: %s', e)
+            finally:
+                db.session.remove()
+
+
+def _rescan(app):
+    try:
+        with app.app_context():
+            try:
+                collect_orphans(dry_run=True, pause=BACKGROUND_PAUSE)
+            except Exception as e:
+                db.session.rollback()
+                logger.warning('Falha na medição do armazenamento: %s', e)
+            finally:
+                db.session.remove()
+    finally:
+        _rescan_lock.release()
+
+
+def scanning():
+    """Se há uma medição em andamento neste worker"""
+    return _rescan_lock.locked()
+
+
+def start_rescan(app):
+    """Dispara uma medição (``dry_run``) numa thread; False se este worker já estiver medindo"""
+    if not _rescan_lock.acquire(blocking=False):
+        return False
+    try:
+        threading.Thread(target=_rescan, args=(app,), name='orphan-rescan', daemon=True).start()
+    except Exception:
+        _rescan_lock.release()
+        raise
+    return True
+
+
+def _ensure_thread():
+    # Recriada depois do fork: cada worker tem a sua, mas só uma coleta por intervalo
+    if _state['pid'] == os.getpid():
+        return
+    with _lock:
+        if _state['pid'] == os.getpid():
+            return
+        _state['pid'] = os.getpid()
+        threading.Thread(target=_run, name='orphan-gc', daemon=True).start()
+
+
+def init_app(app):
+    """Liga a coleta periódica (``ORPHAN_GC_INTERVAL``) nos workers"""
+    if GC_INTERVAL <= 0:
+        return
+    _state['app'] = app
+    app.before_request(_ensure_thread)
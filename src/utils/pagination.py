@@ -0,0 +1,172 @@
+"""Paginação por cursor (keyset) para as rotas de listagem.
+
+Sem ``limit``/``cursor`` na query string a rota devolve a lista completa,
+como sempre fez, mas em streaming: as linhas são lidas do banco em lotes
+(``yield_per``) e escritas na resposta à medida que chegam. Com eles,
+devolve ``{"items": [...], "next_cursor": ...}`` e a próxima página começa
+logo depois da última linha vista, usando o índice da ordenação em vez de
+``OFFSET``.
+
+As consultas trazem só as colunas da tabela (sem montar objetos do ORM); o
+``to_dict`` do modelo é chamado direto sobre cada linha. Com
+``Accept: application/x-ndjson`` cada item sai numa linha e o cursor da
+próxima página vai no cabeçalho ``X-Next-Cursor``.
+"""
+import base64
+import json
+from datetime import datetime
+
+from flask import Response, current_app, jsonify, request, stream_with_context
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+# Linhas lidas do banco por vez e itens por escrita na resposta
+STREAM_BATCH = 500
+WRITE_BATCH = 100
+NDJSON = 'application/x-ndjson'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and 'dt' in value:
+        return datetime.fromisoformat(value['dt'])
+    return value
+
+
+def encode_cursor(values):
+    raw = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = [_decode_value(v) for v in json.loads(raw)]
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if len(values) != size:
+        raise InvalidCursor(cursor)
+    return values
+
+
+def page_params():
+    """Retorna (limit, cursor) ou None se a paginação não foi pedida"""
+    if 'limit' not in request.args and 'cursor' not in request.args:
+        return None
+    limit = request.args.get('limit', DEFAULT_LIMIT, type=int)
+    return max(1, min(limit, MAX_LIMIT)), request.args.get('cursor') or None
+
+
+def order_by(order):
+    return [column.desc() if direction == 'desc' else column.asc() for column, direction in order]
+
+
+def _after(order, values):
+    """Condição 'depois da linha com estes valores' na ordenação dada"""
+    clauses = []
+    for i, (column, direction) in enumerate(order):
+        equal = [order[j][0] == values[j] for j in range(i)]
+        beyond = column < values[i] if direction == 'desc' else column > values[i]
+        clauses.append(and_(*equal, beyond))
+    return or_(*clauses)
+
+
+def keyset_page(query, order, limit, cursor=None):
+    """Uma página da consulta; ``order`` é uma lista de (coluna, 'asc'|'desc')
+    terminando numa coluna única. Retorna (linhas, próximo cursor)."""
+    if cursor:
+        query = query.filter(_after(order, decode_cursor(cursor, len(order))))
+    rows = query.order_by(*order_by(order)).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column, _ in order])
+    return rows, next_cursor
+
+
+def wants_ndjson():
+    return request.accept_mimetypes.best == NDJSON
+
+
+def column_query(query):
+    """A mesma consulta devolvendo só as colunas da tabela (linhas, não objetos)"""
+    model = query.column_descriptions[0]['entity']
+    return query.with_entities(*model.__table__.columns)
+
+
+def model_serializer(query):
+    """``to_dict`` do modelo, aplicado às linhas de ``column_query``"""
+    return query.column_descriptions[0]['entity'].to_dict
+
+
+def stream_items(rows, serialize, ndjson=False):
+    """Gera o corpo (array JSON ou NDJSON) em pedaços de WRITE_BATCH itens"""
+    # Mesmo formato compacto do jsonify fora do modo debug
+    compact = current_app.json.compact
+    options = {} if compact is False or (compact is None and current_app.debug) else {'separators': (',', ':')}
+    dumps = current_app.json.dumps
+
+    def encode(batch):
+        if ndjson:
+            return ''.join(dumps(item, **options) + '\n' for item in batch)
+        # Um dumps por lote, sem os colchetes
+        return dumps(batch, **options)[1:-1]
+
+    batch, prefix = [], '' if ndjson else '['
+    for row in rows:
+        batch.append(serialize(row))
+        if len(batch) >= WRITE_BATCH:
+            yield prefix + encode(batch)
+            batch, prefix = [], '' if ndjson else ','
+    if ndjson:
+        if batch:
+            yield encode(batch)
+    else:
+        # prefix ainda é '[' se a lista veio vazia
+        yield (prefix + encode(batch) if batch else prefix.strip(',')) + ']\n'
+
+
+def stream_response(rows, serialize, headers=None):
+    ndjson = wants_ndjson()
+    response = Response(
+        stream_with_context(stream_items(rows, serialize, ndjson)),
+        mimetype=NDJSON if ndjson else 'application/json',
+        headers=headers
+    )
+    response.vary.add('Accept')
+    return response
+
+
+def list_response(query, order, serialize=None):
+    """Resposta JSON da listagem, paginada se o cliente pediu"""
+    serialize = serialize or model_serializer(query)
+    rows_query = column_query(query)
+    try:
+        params = page_params()
+        if params is None:
+            rows = rows_query.order_by(*order_by(order)).yield_per(STREAM_BATCH)
+            return stream_response(rows, serialize)
+
+        rows, next_cursor = keyset_page(rows_query, order, *params)
+    except InvalidCursor:
+        return jsonify({'error': 'Cursor inválido'}), 400
+
+    if wants_ndjson():
+        return stream_response(rows, serialize, headers={'X-Next-Cursor': next_cursor or ''})
+    response = jsonify({
+        'items': [serialize(row) for row in rows],
+        'next_cursor': next_cursor
+    })
+    response.vary.add('Accept')
+    return response
@@ -0,0 +1,102 @@
+"""Hash de senhas num pool limitado de threads.
+
+O KDF (scrypt por padrão) é caro de propósito. Cada worker calcula no máximo
+``PASSWORD_HASH_WORKERS`` hashes ao mesmo tempo, com até
+``PASSWORD_HASH_QUEUE`` esperando; além disso ``PoolBusy`` é levantado na
+hora, em vez de prender o worker.
+
+``PASSWORD_HASH_METHOD`` escolhe o KDF e o custo no formato do Werkzeug
+(``scrypt:32768:8:1``, ``pbkdf2:sha256:600000``...). Hashes gravados com outro
+método são refeitos no próximo login (``needs_rehash``).
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 1))
+HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 2))
+HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+
+
+class PoolBusy(Exception):
+    """Pool de hash cheio (ou resposta demorou demais); tente de novo depois"""
+
+
+def full_method(method):
+    """Nome do método com os parâmetros padrão explícitos, como fica no hash"""
+    name, *args = method.split(':')
+    if name == 'scrypt' and not args:
+        return 'scrypt:32768:8:1'
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = args[1] if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    return method
+
+
+class HashPool:
+    """Executor com fila limitada; as threads são recriadas depois do fork"""
+
+    def __init__(self, workers, queue_size, timeout):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+                self._pid = os.getpid()
+            return self._executor
+
+    def run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PoolBusy()
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # A vaga só é liberada quando o hash termina, mesmo se quem pediu desistiu
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FuturesTimeout:
+            raise PoolBusy()
+
+
+pool = HashPool(HASH_WORKERS, HASH_QUEUE, HASH_TIMEOUT)
+# Hash de referência para usuários que não existem, calculado no primeiro uso
+_dummy = {}
+
+
+def hash_password(password):
+    return pool.run(generate_password_hash, password, HASH_METHOD)
+
+
+def verify_password(password_hash, password):
+    return pool.run(check_password_hash, password_hash, password)
+
+
+def needs_rehash(password_hash):
+    return password_hash.split('$', 1)[0] != full_method(HASH_METHOD)
+
+
+def verify_dummy(password):
+    """Mesmo custo de um ``verify_password``, para um login com usuário inexistente.
+
+    Sem isso a resposta rápida denunciaria quais usuários existem.
+    """
+    dummy = _dummy.get(HASH_METHOD)
+    if dummy is None:
+        # Gerar o hash custa o mesmo que conferir: a primeira vez não é mais lenta
+        _dummy[HASH_METHOD] = hash_password(password)
+    else:
+        verify_password(dummy, password)
+    return False
@@ -0,0 +1,76 @@
+"""Entrega dos PDFs do armazenamento por conteúdo.
+
+O ETag forte é o próprio SHA-256 do arquivo e os pedidos com ``Range`` são
+atendidos parcialmente, para que os visualizadores de PDF do navegador
+busquem só as páginas que precisam. Com ``PDF_SENDFILE=x-accel`` (nginx) ou
+``PDF_SENDFILE=x-sendfile`` (Apache/lighttpd) o proxy da frente envia os
+bytes e o worker Python fica livre na hora.
+"""
+import os
+
+from flask import Response, request
+from werkzeug.utils import send_file
+
+from src.utils import blob_store
+
+SENDFILE_MODE = os.environ.get('PDF_SENDFILE', '').lower()
+# Location interna do nginx apontando para a pasta de blobs
+ACCEL_PREFIX = os.environ.get('PDF_ACCEL_PREFIX', '/_blobs/')
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def send_pdf(sha256, filename=None, as_attachment=False, immutable=False, public=True):
+    """Resposta com o PDF ``sha256``.
+
+    ``immutable`` vale para URLs que contêm o hash; nas demais o navegador
+    revalida com If-None-Match e recebe 304 enquanto o conteúdo não mudar.
+    """
+    path = blob_store.blob_path(sha256) if sha256 else None
+    if not path or not os.path.exists(path):
+        return "Arquivo não encontrado", 404
+
+    if SENDFILE_MODE == 'x-accel':
+        response = Response(mimetype='application/pdf')
+        response.headers['X-Accel-Redirect'] = f'{ACCEL_PREFIX}{sha256[:2]}/{sha256}.pdf'
+        if filename:
+            disposition = 'attachment' if as_attachment else 'inline'
+            response.headers.set('Content-Disposition', disposition, filename=filename)
+    else:
+        response = send_file(
+            path,
+            request.environ,
+            mimetype='application/pdf',
+            as_attachment=as_attachment,
+            download_name=filename,
+            conditional=False,
+            etag=False,
+            use_x_sendfile=SENDFILE_MODE == 'x-sendfile',
+        )
+
+    response.set_etag(sha256)
+    if immutable:
+        response.cache_control.no_cache = None
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    if public:
+        response.cache_control.public = True
+    else:
+        response.cache_control.private = True
+
+    # Ranges só quando o próprio Python envia os bytes
+    serves_bytes = not SENDFILE_MODE
+    response = response.make_conditional(
+        request,
+        accept_ranges=serves_bytes,
+        complete_length=os.path.getsize(path) if serves_bytes else None,
+    )
+    if serves_bytes and response.status_code == 200:
+        # O make_conditional só anuncia ranges na resposta 206; o visualizador de
+        # PDF decide pelo cabeçalho da primeira resposta se pode pedir pedaços
+        response.headers['Accept-Ranges'] = 'bytes'
+    if response.status_code == 304:
+        response.headers.pop('X-Accel-Redirect', None)
+        response.headers.pop('X-Sendfile', None)
+    return response
@@ -0,0 +1,417 @@
+"""Leitura rápida das informações de um PDF sem carregar o arquivo inteiro.
+
+Só são lidos o cabeçalho (versão e dicionário de linearização), o fim do
+arquivo (``startxref`` e trailer), as tabelas/streams de xref e os poucos
+objetos necessários: catálogo, árvore de páginas e ``/Info``. Cada leitura
+tem tamanho limitado e o total lido também, então um PDF de 16MB custa
+alguns KB de I/O.
+"""
+import re
+import zlib
+
+HEAD_SIZE = 1024
+TAIL_SIZE = 4096
+OBJECT_READ_SIZE = 16 * 1024
+# Janelas tentadas para objetos que não cabem na primeira leitura
+OBJECT_READ_SIZES = (OBJECT_READ_SIZE, 256 * 1024)
+MAX_STREAM_SIZE = 2 * 1024 * 1024
+MAX_TOTAL_READ = 8 * 1024 * 1024
+MAX_XREF_SECTIONS = 32
+# Arrays/dicionários aninhados além disso são recusados (sem estourar a pilha)
+MAX_DEPTH = 64
+
+VERSION_RE = re.compile(rb'%PDF-(\d\.\d)')
+STARTXREF_RE = re.compile(rb'startxref\s+(\d+)')
+OBJ_RE = re.compile(rb'\s*(\d+)\s+(\d+)\s+obj')
+WHITESPACE = b' \t\r\n\f\x00'
+DELIMITERS = b'()<>[]{}/%'
+
+
+class PdfError(ValueError):
+    pass
+
+
+class Ref:
+    """Referência indireta ``n g R``"""
+    __slots__ = ('num', 'gen')
+
+    def __init__(self, num, gen):
+        self.num, self.gen = num, gen
+
+
+class Name(str):
+    pass
+
+
+class Parser:
+    """Parser mínimo de objetos PDF (dicionários, arrays, strings, números)"""
+
+    def __init__(self, data, pos=0):
+        self.data = data
+        self.pos = pos
+        self.depth = 0
+
+    def skip_space(self):
+        data = self.data
+        while self.pos < len(data):
+            c = data[self.pos]
+            if c in WHITESPACE:
+                self.pos += 1
+            elif c == ord('%'):
+                end = data.find(b'\n', self.pos)
+                self.pos = len(data) if end < 0 else end + 1
+            else:
+                break
+
+    def token(self):
+        self.skip_space()
+        start = self.pos
+        while self.pos < len(self.data) and self.data[self.pos] not in WHITESPACE + DELIMITERS:
+            self.pos += 1
+        return self.data[start:self.pos]
+
+    def value(self):
+        self.skip_space()
+        if self.pos >= len(self.data):
+            raise PdfError('fim inesperado')
+        data, c = self.data, self.data[self.pos:self.pos + 2]
+        if c == b'<<' or c[:1] == b'[':
+            self.depth += 1
+            if self.depth > MAX_DEPTH:
+                raise PdfError('objetos aninhados demais')
+            value = self.dictionary() if c == b'<<' else self.array()
+            self.depth -= 1
+            return value
+        if c[:1] == b'/':
+            self.pos += 1
+            return Name(self.token().decode('latin-1'))
+        if c[:1] == b'(':
+            return self.literal_string()
+        if c[:1] == b'<':
+            end = data.index(b'>', self.pos)
+            raw = re.sub(rb'\s', b'', data[self.pos + 1:end])
+            self.pos = end + 1
+            return bytes.fromhex((raw + b'0' * (len(raw) % 2)).decode('ascii'))
+
+        word = self.token()
+        if not word:
+            raise PdfError(f'token inválido na posição {self.pos}')
+        if word == b'true':
+            return True
+        if word == b'false':
+            return False
+        if word == b'null':
+            return None
+        number = float(word) if b'.' in word else int(word)
+        # "n g R" é uma referência
+        saved = self.pos
+        second, third = self.token(), self.token()
+        if isinstance(number, int) and second.isdigit() and third == b'R':
+            return Ref(number, int(second))
+        self.pos = saved
+        return number
+
+    def dictionary(self):
+        self.pos += 2
+        result = {}
+        while True:
+            self.skip_space()
+            if self.data[self.pos:self.pos + 2] == b'>>':
+                self.pos += 2
+                return result
+            key = self.value()
+            result[key] = self.value()
+
+    def array(self):
+        self.pos += 1
+        items = []
+        while True:
+            self.skip_space()
+            if self.data[self.pos:self.pos + 1] == b']':
+                self.pos += 1
+                return items
+            items.append(self.value())
+
+    def literal_string(self):
+        data = self.data
+        self.pos += 1
+        depth, out = 1, bytearray()
+        escapes = {ord('n'): b'\n', ord('r'): b'\r', ord('t'): b'\t', ord('b'): b'\b', ord('f'): b'\f'}
+        while self.pos < len(data):
+            c = data[self.pos]
+            self.pos += 1
+            if c == ord('\\'):
+                nxt = data[self.pos]
+                self.pos += 1
+                if nxt in escapes:
+                    out += escapes[nxt]
+                elif chr(nxt) in '01234567':
+                    digits = bytes([nxt])
+                    while len(digits) < 3 and chr(data[self.pos]) in '01234567':
+                        digits += data[self.pos:self.pos + 1]
+                        self.pos += 1
+                    out.append(int(digits, 8) & 0xFF)
+                elif nxt in b'\r\n':
+                    if nxt == ord('\r') and data[self.pos:self.pos + 1] == b'\n':
+                        self.pos += 1
+                else:
+                    out.append(nxt)
+            elif c == ord('('):
+                depth += 1
+                out.append(c)
+            elif c == ord(')'):
+                depth -= 1
+                if depth == 0:
+                    return bytes(out)
+                out.append(c)
+            else:
+                out.append(c)
+        raise PdfError('string sem fim')
+
+
+def decode_text(value):
+    """Texto de uma string PDF (UTF-16 com BOM ou PDFDocEncoding)"""
+    if not isinstance(value, bytes):
+        return None
+    if value.startswith(b'\xfe\xff'):
+        text = value[2:].decode('utf-16-be', errors='replace')
+    elif value.startswith(b'\xef\xbb\xbf'):
+        text = value[3:].decode('utf-8', errors='replace')
+    else:
+        text = value.decode('latin-1')
+    return text.replace('\x00', '').strip() or None
+
+
+class PdfFile:
+    """Acesso aos objetos do PDF com leituras pontuais e limitadas"""
+
+    def __init__(self, f, size):
+        self.f = f
+        self.size = size
+        self.read_total = 0
+        self.offsets = {}      # num -> deslocamento no arquivo
+        self.compressed = {}   # num -> (stream de objetos, índice)
+        self.trailer = {}
+        self._objstms = {}
+
+    def read_at(self, offset, length):
+        length = max(0, min(length, self.size - offset))
+        self.read_total += length
+        if self.read_total > MAX_TOTAL_READ:
+            raise PdfError('limite de leitura excedido')
+        self.f.seek(offset)
+        return self.f.read(length)
+
+    def load_xref(self):
+        tail = self.read_at(max(0, self.size - TAIL_SIZE), TAIL_SIZE)
+        matches = list(STARTXREF_RE.finditer(tail))
+        if not matches:
+            raise PdfError('startxref não encontrado')
+        offset, seen = int(matches[-1].group(1)), set()
+        while offset is not None and offset not in seen and len(seen) < MAX_XREF_SECTIONS:
+            seen.add(offset)
+            trailer = self._read_xref_section(offset)
+            # Seções mais novas vêm primeiro e têm prioridade
+            for key, value in trailer.items():
+                self.trailer.setdefault(key, value)
+            if isinstance(trailer.get('XRefStm'), int):
+                self._read_xref_section(trailer['XRefStm'])
+            offset = trailer.get('Prev') if isinstance(trailer.get('Prev'), int) else None
+
+    def _read_xref_section(self, offset):
+        data = self.read_at(offset, OBJECT_READ_SIZE)
+        if data.lstrip().startswith(b'xref'):
+            return self._read_xref_table(offset, data)
+        obj = self._parse_object_at(offset)
+        if not isinstance(obj, tuple):
+            raise PdfError('xref inválida')
+        stream_dict, raw = obj
+        self._read_xref_stream(stream_dict, raw)
+        return stream_dict
+
+    def _read_xref_table(self, offset, data):
+        parser = Parser(data, data.index(b'xref') + 4)
+        while True:
+            parser.skip_space()
+            if data[parser.pos:parser.pos + 7] == b'trailer':
+                parser.pos += 7
+                return parser.value()
+            first, count = int(parser.token()), int(parser.token())
+            parser.skip_space()
+            start = offset + parser.pos
+            # Entradas de 20 bytes: lidas direto do arquivo, sem percorrer o texto
+            table = self.read_at(start, count * 20)
+            for i in range(count):
+                entry = table[i * 20:i * 20 + 18].split()
+                if len(entry) == 3 and entry[2] == b'n':
+                    self.offsets.setdefault(first + i, int(entry[0]))
+            data = self.read_at(start + count * 20, OBJECT_READ_SIZE)
+            offset, parser = start + count * 20, Parser(data)
+
+    def _read_xref_stream(self, stream_dict, raw):
+        widths = stream_dict.get('W') or [1, 2, 1]
+        index = stream_dict.get('Index') or [0, stream_dict.get('Size', 0)]
+        data = self._decode_stream(stream_dict, raw)
+        row = sum(widths)
+        pos = 0
+        for first, count in zip(index[0::2], index[1::2]):
+            for num in range(first, first + count):
+                fields, p = [], pos
+                for width in widths:
+                    fields.append(int.from_bytes(data[p:p + width], 'big') if width else None)
+                    p += width
+                pos += row
+                kind = 1 if fields[0] is None else fields[0]
+                if kind == 1:
+                    self.offsets.setdefault(num, fields[1])
+                elif kind == 2:
+                    self.compressed.setdefault(num, (fields[1], fields[2]))
+
+    def _decode_stream(self, stream_dict, raw):
+        filters = stream_dict.get('Filter')
+        filters = filters if isinstance(filters, list) else [filters] if filters else []
+        if filters and filters != ['FlateDecode']:
+            raise PdfError(f'filtro não suportado: {filters}')
+        data = zlib.decompressobj().decompress(raw, MAX_STREAM_SIZE) if filters else raw
+        params = stream_dict.get('DecodeParms') or {}
+        if isinstance(params, list):
+            params = params[0] or {}
+        predictor = params.get('Predictor', 1)
+        if predictor >= 10:
+            columns = params.get('Columns', 1)
+            data = self._png_unpredict(data, columns)
+        return data
+
+    @staticmethod
+    def _png_unpredict(data, columns):
+        out, prev = bytearray(), bytearray(columns)
+        for i in range(0, len(data), columns + 1):
+            kind, row = data[i], bytearray(data[i + 1:i + 1 + columns])
+            for j in range(len(row)):
+                left = row[j - 1] if j else 0
+                if kind == 1:
+                    row[j] = (row[j] + left) & 0xFF
+                elif kind == 2:
+                    row[j] = (row[j] + prev[j]) & 0xFF
+                elif kind == 3:
+                    row[j] = (row[j] + (left + prev[j]) // 2) & 0xFF
+                elif kind == 4:
+                    up_left = prev[j - 1] if j else 0
+                    p = left + prev[j] - up_left
+                    pa, pb, pc = abs(p - left), abs(p - prev[j]), abs(p - up_left)
+                    row[j] = (row[j] + (left if pa <= pb and pa <= pc else prev[j] if pb <= pc else up_left)) & 0xFF
+            out += row
+            prev = row
+        return bytes(out)
+
+    def _parse_object_at(self, offset):
+        """Objeto em ``offset``: o valor ou (dicionário, bytes brutos) para streams"""
+        for read_size in OBJECT_READ_SIZES:
+            data = self.read_at(offset, read_size)
+            match = OBJ_RE.match(data)
+            if not match:
+                raise PdfError(f'objeto inválido em {offset}')
+            parser = Parser(data, match.end())
+            try:
+                value = parser.value()
+                break
+            except (PdfError, IndexError, ValueError):
+                # Objeto maior que a janela lida (ex.: /Kids enorme)
+                if len(data) < read_size or read_size == OBJECT_READ_SIZES[-1]:
+                    raise
+        parser.skip_space()
+        if not (isinstance(value, dict) and data[parser.pos:parser.pos + 6] == b'stream'):
+            return value
+
+        start = parser.pos + 6
+        if data[start:start + 2] == b'\r\n':
+            start += 2
+        elif data[start:start + 1] in (b'\n', b'\r'):
+            start += 1
+        length = self.resolve(value.get('Length'))
+        if not isinstance(length, int) or length > MAX_STREAM_SIZE:
+            raise PdfError('stream grande demais')
+        return value, self.read_at(offset + start, length)
+
+    def _object_stream(self, num):
+        if num not in self._objstms:
+            stream_dict, raw = self._parse_object_at(self.offsets[num])
+            data = self._decode_stream(stream_dict, raw)
+            first = stream_dict['First']
+            header = Parser(data[:first])
+            pairs = [(int(header.token()), int(header.token())) for _ in range(stream_dict['N'])]
+            self._objstms[num] = (data, first, pairs)
+        return self._objstms[num]
+
+    def get(self, num):
+        if num in self.offsets:
+            obj = self._parse_object_at(self.offsets[num])
+            return obj[0] if isinstance(obj, tuple) else obj
+        if num in self.compressed:
+            stream_num, index = self.compressed[num]
+            data, first, pairs = self._object_stream(stream_num)
+            return Parser(data, first + pairs[index][1]).value()
+        return None
+
+    def resolve(self, value):
+        depth = 0
+        while isinstance(value, Ref) and depth < 8:
+            value = self.get(value.num)
+            depth += 1
+        return value
+
+
+def _linearization(head, size):
+    """Dicionário de linearização do cabeçalho, se for válido para este tamanho"""
+    match = re.search(rb'\d+\s+\d+\s+obj\s*<<', head)
+    if not match:
+        return None
+    try:
+        first = Parser(head, head.index(b'<<', match.start())).value()
+    except (PdfError, ValueError, IndexError):
+        return None
+    if isinstance(first, dict) and 'Linearized' in first and first.get('L') == size:
+        return first
+    return None
+
+
+def inspect_pdf(path):
+    """Informações do PDF em ``path``; campos que não puderam ser lidos ficam None"""
+    info = {'page_count': None, 'pdf_version': None, 'pdf_title': None,
+            'pdf_author': None, 'linearized': False, 'encrypted': False}
+    with open(path, 'rb') as f:
+        f.seek(0, 2)
+        size = f.tell()
+        pdf = PdfFile(f, size)
+        head = pdf.read_at(0, HEAD_SIZE)
+        version = VERSION_RE.search(head)
+        if not version:
+            return info
+        info['pdf_version'] = version.group(1).decode('ascii')
+
+        try:
+            linearization = _linearization(head, size)
+            if linearization:
+                info['linearized'] = True
+                info['page_count'] = linearization.get('N')
+
+            pdf.load_xref()
+            trailer = pdf.trailer
+            info['encrypted'] = 'Encrypt' in trailer
+
+            root = pdf.resolve(trailer.get('Root')) or {}
+            # Versão no catálogo sobrepõe a do cabeçalho (PDF 1.4+)
+            if isinstance(root.get('Version'), Name):
+                info['pdf_version'] = str(root['Version'])
+            pages = pdf.resolve(root.get('Pages')) or {}
+            if isinstance(pages.get('Count'), int):
+                info['page_count'] = pages['Count']
+
+            # Strings de PDFs criptografados não podem ser lidas sem a chave
+            if not info['encrypted']:
+                doc_info = pdf.resolve(trailer.get('Info')) or {}
+                info['pdf_title'] = decode_text(pdf.resolve(doc_info.get('Title')))
+                info['pdf_author'] = decode_text(pdf.resolve(doc_info.get('Author')))
+        except (PdfError, ValueError, KeyError, IndexError, TypeError, AttributeError, RecursionError, zlib.error):
+            pass
+    return info
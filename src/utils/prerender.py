@@ -0,0 +1,109 @@
+"""Landing page com os dados do portfólio já embutidos no HTML.
+
+Com ``PRERENDER_INDEX=1`` o ``index.html`` é servido com:
+
+- os JSON públicos do portfólio num ``<script>`` inline, junto de um pequeno
+  interceptador de ``fetch`` que responde a primeira chamada do bundle a
+  essas rotas com os dados embutidos (o bundle já publicado não precisa ser
+  recompilado para aproveitar);
+- ``<link rel="preload">`` para as imagens e fontes com hash que o bundle de
+  entrada referencia, para o navegador buscá-las antes de executar o JS.
+
+O documento gerado fica em memória e só é refeito quando o ``index.html``
+ou os dados do portfólio mudam (as mesmas versões do ``response_cache``).
+"""
+import os
+import re
+import threading
+
+from src.utils import response_cache
+from src.utils.static_files import MemoryFile, send_static_file
+
+ENABLED = os.environ.get('PRERENDER_INDEX', '').lower() in ('1', 'true', 'yes')
+
+ENTRY_SCRIPT_RE = re.compile(r'<script[^>]+type="module"[^>]+src="/(assets/[^"]+\.js)"')
+ASSET_RE = re.compile(r'/assets/[\w.-]+\.(?:jpe?g|png|webp|avif|gif|svg|woff2?)')
+PRELOAD_AS = {'woff': 'font', 'woff2': 'font'}
+
+# Responde uma única vez, com os dados embutidos, ao primeiro GET de cada rota
+FETCH_SHIM = (
+    "(function(){var d=window.__INITIAL_DATA__,f=window.fetch;"
+    "window.fetch=function(u,o){if(typeof u==='string'&&d.hasOwnProperty(u)&&(!o||!o.method||o.method==='GET')){"
+    "var b=d[u];delete d[u];return Promise.resolve(new Response(b,{status:200,headers:{'Content-Type':'application/json'}}));}"
+    "return f.apply(this,arguments);};})();"
+)
+
+
+def _script_json(body):
+    """JSON seguro dentro de <script> (sem '</script>' nem '<!--')"""
+    return body.strip().replace('<', '\\u003c').replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+
+
+def _js_string(text):
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+class PrerenderedIndex:
+    """``index.html`` com dados inline, cacheado por versão do conteúdo.
+
+    ``sources`` mapeia a URL que o frontend busca para ``(chave do cache,
+    função que monta o JSON)``, as mesmas usadas pelas rotas da API.
+    """
+
+    def __init__(self, static_index, sources, relpath='index.html'):
+        self.static_index = static_index
+        self.sources = sources
+        self.relpath = relpath
+        self._key = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def preload_links(self, html):
+        """Hints para os assets referenciados pelos bundles de entrada"""
+        assets = []
+        for entry in ENTRY_SCRIPT_RE.findall(html):
+            static_file = self.static_index.get(entry)
+            if static_file is None:
+                continue
+            for asset in ASSET_RE.findall(static_file.body().decode('utf-8', errors='replace')):
+                if asset not in assets:
+                    assets.append(asset)
+
+        links = []
+        for asset in assets:
+            extension = asset.rsplit('.', 1)[1]
+            kind = PRELOAD_AS.get(extension, 'image')
+            crossorigin = ' crossorigin' if kind == 'font' else ''
+            links.append(f'<link rel="preload" as="{kind}" href="{asset}"{crossorigin}>')
+        return links
+
+    def render(self, html, entries):
+        data = ','.join(f'{_js_string(url)}:{_js_string(_script_json(body))}' for url, body in entries)
+        head = self.preload_links(html)
+        head.append(f'<script>window.__INITIAL_DATA__={{{data}}};{FETCH_SHIM}</script>')
+        # Antes do primeiro <script> para o interceptador existir quando o bundle rodar
+        marker = '<script' if '<script' in html else '</head>'
+        position = html.index(marker)
+        return html[:position] + '\n    '.join(head) + '\n    ' + html[position:]
+
+    def document(self):
+        """O ``MemoryFile`` atual, refeito só quando alguma versão mudou"""
+        index_file = self.static_index.get(self.relpath)
+        if index_file is None:
+            return None
+        entries = [(url, response_cache.get_entry(cache_key, build)) for url, (cache_key, build) in self.sources.items()]
+        key = (index_file.etag,) + tuple(entry['etag'] for _, entry in entries)
+        if key == self._key:
+            return self._file
+
+        with self._lock:
+            if key != self._key:
+                html = index_file.body().decode('utf-8')
+                bodies = [(url, entry['body'].decode('utf-8')) for url, entry in entries]
+                self._file = MemoryFile(self.relpath, self.render(html, bodies).encode('utf-8'))
+                self._key = key
+            return self._file
+
+    def send(self):
+        document = self.document()
+        return send_static_file(document) if document is not None else None
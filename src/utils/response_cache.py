@@ -0,0 +1,93 @@
+"""Cache de respostas JSON das rotas públicas do portfólio.
+
+Cada worker do gunicorn guarda em memória o corpo JSON já serializado, o
+ETag correspondente e, sob demanda, o mesmo corpo em gzip/brotli. A
+invalidação é compartilhada entre os workers por meio de um arquivo de
+versão por chave: as rotas de escrita substituem o arquivo
+(``os.replace``) e as rotas de leitura só fazem um ``os.stat`` para saber se
+o corpo em memória ainda vale, sem nenhuma consulta ao banco.
+"""
+import hashlib
+import os
+import uuid
+
+from flask import Response, current_app, request
+
+from src.utils import compression
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'cache')
+
+# Chaves das respostas cacheadas
+PORTFOLIO_LINKS = 'portfolio_links'
+PORTFOLIO_PDFS = 'portfolio_pdfs'
+
+_entries = {}
+
+
+def _version_path(key):
+    return os.path.join(CACHE_DIR, f'{key}.version')
+
+
+def current_version(key):
+    """Retorna a versão atual de uma chave (muda a cada invalidação)"""
+    try:
+        stat = os.stat(_version_path(key))
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns)
+
+
+def invalidate(*keys):
+    """Invalida as chaves em todos os workers"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    for key in keys:
+        path = _version_path(key)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(uuid.uuid4().hex)
+        os.replace(tmp_path, path)
+        _entries.pop(key, None)
+
+
+def get_entry(key, build):
+    """Retorna a entrada cacheada da chave, reconstruindo-a se estiver velha.
+
+    ``build`` é chamado sem argumentos e deve devolver o objeto a serializar.
+    """
+    version = current_version(key)
+    entry = _entries.get(key)
+    if entry is not None and entry['version'] == version:
+        return entry
+
+    # A versão é lida antes da consulta: se houver uma escrita no meio do
+    # caminho, a entrada nasce velha e é refeita na próxima requisição.
+    body = (current_app.json.dumps(build()) + '\n').encode('utf-8')
+    entry = {
+        'version': version,
+        'body': body,
+        'etag': hashlib.sha256(body).hexdigest(),
+    }
+    _entries[key] = entry
+    return entry
+
+
+def cached_json_response(key, build):
+    """Resposta JSON cacheada com ETag forte e suporte a If-None-Match"""
+    entry = get_entry(key, build)
+
+    # Comprimida direto da entrada (uma vez por versão); o after_request não mexe de novo
+    compressible = len(entry['body']) >= compression.MIN_SIZE
+    encoding = compression.pick_encoding() if compressible else None
+    response = Response(compression.encoded_body(entry, encoding), mimetype='application/json')
+    if encoding:
+        response.content_encoding = encoding
+        response.set_etag(f"{entry['etag']}-{encoding}")
+    else:
+        response.set_etag(entry['etag'])
+    if compressible:
+        response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    # As mesmas rotas respondem NDJSON em streaming conforme o Accept
+    response.vary.add('Accept')
+    return response.make_conditional(request)
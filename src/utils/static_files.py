@@ -0,0 +1,206 @@
+"""Entrega dos arquivos estáticos do frontend a partir de um índice em memória.
+
+O índice da pasta ``static`` é montado uma vez (e refeito quando a pasta
+muda), então cada requisição não faz nenhum ``os.path.exists``. Os arquivos
+de texto são servidos em gzip ou brotli conforme o ``Accept-Encoding``,
+usando os arquivos ``.gz``/``.br`` gerados pelo ``compress_static.py`` ou,
+na falta deles, comprimindo uma única vez em memória. Os bundles com hash
+do Vite (``assets/index-B_fyoeqi.js``) ganham cache imutável de um ano; o
+resto (``index.html``, painéis) é sempre revalidado pelo ETag.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+import time
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele só há gzip
+    brotli = None
+
+# Pastas com conteúdo dinâmico, servidas por outras rotas
+EXCLUDED_DIRS = {'uploads'}
+HASHED_DIR = 'assets'
+HASHED_RE = re.compile(r'-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$')
+COMPRESSIBLE_TYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/javascript', 'application/javascript',
+    'application/json', 'image/svg+xml', 'image/x-icon', 'image/vnd.microsoft.icon',
+}
+MIN_COMPRESS_SIZE = 1024
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+RESCAN_INTERVAL = float(os.environ.get('STATIC_RESCAN_INTERVAL', 30))
+
+# Extensão do arquivo pré-comprimido de cada codificação
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def compress(data, encoding, best=False):
+    if encoding == 'br':
+        return brotli.compress(data, quality=11 if best else 5)
+    return gzip.compress(data, compresslevel=9 if best else 6, mtime=0)
+
+
+def available_encodings():
+    return [encoding for encoding, _ in ENCODINGS if encoding != 'br' or brotli is not None]
+
+
+class StaticFile:
+    """Um arquivo do índice, com o conteúdo carregado sob demanda"""
+
+    def __init__(self, path, relpath):
+        self.path = path
+        self.relpath = relpath
+        self.mimetype = mimetypes.guess_type(relpath)[0] or 'application/octet-stream'
+        self.hashed = relpath.startswith(HASHED_DIR + '/') and bool(HASHED_RE.search(relpath))
+        self.compressible = self.mimetype in COMPRESSIBLE_TYPES
+        self._bodies = {}
+        self._etag = None
+        self._lock = threading.Lock()
+
+    def body(self, encoding=None):
+        """Conteúdo em memória; ``encoding`` é 'br', 'gzip' ou None"""
+        data = self._bodies.get(encoding)
+        if data is not None:
+            return data
+        with self._lock:
+            if encoding not in self._bodies:
+                self._bodies[encoding] = self._load(encoding)
+            return self._bodies[encoding]
+
+    def _load(self, encoding):
+        if encoding is None:
+            with open(self.path, 'rb') as f:
+                return f.read()
+        suffix = dict(ENCODINGS)[encoding]
+        if os.path.exists(self.path + suffix):
+            with open(self.path + suffix, 'rb') as f:
+                return f.read()
+        return compress(self.body(), encoding)
+
+    @property
+    def etag(self):
+        if self._etag is None:
+            self._etag = hashlib.sha256(self.body()).hexdigest()[:32]
+        return self._etag
+
+    def pick_encoding(self, accept_encodings):
+        if not self.compressible or len(self.body()) < MIN_COMPRESS_SIZE:
+            return None
+        for encoding in available_encodings():
+            if accept_encodings[encoding]:
+                return encoding
+        return None
+
+
+class MemoryFile(StaticFile):
+    """Documento gerado em memória, servido como se fosse um arquivo estático"""
+
+    def __init__(self, relpath, body):
+        super().__init__(None, relpath)
+        self._bodies[None] = body
+
+    def _load(self, encoding):
+        return compress(self.body(), encoding)
+
+
+def send_static_file(static_file):
+    """Resposta para um arquivo do índice (ou em memória), com compressão e ETag"""
+    encoding = static_file.pick_encoding(request.accept_encodings)
+    response = Response(static_file.body(encoding), mimetype=static_file.mimetype)
+    if encoding:
+        response.content_encoding = encoding
+        response.set_etag(f'{static_file.etag}-{encoding}')
+    else:
+        response.set_etag(static_file.etag)
+    if static_file.compressible:
+        response.vary.add('Accept-Encoding')
+
+    response.cache_control.public = True
+    if static_file.hashed:
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+class StaticIndex:
+    """Índice em memória dos arquivos de uma pasta estática"""
+
+    def __init__(self, root, rescan_interval=RESCAN_INTERVAL):
+        self.root = root
+        self.rescan_interval = rescan_interval
+        self._files = {}
+        self._signature = None
+        self._checked_at = 0
+        self._lock = threading.Lock()
+        self.scan()
+
+    def _dir_signature(self):
+        # O mtime de uma pasta muda quando entra ou sai um arquivo dela
+        signature = []
+        for dirpath, dirnames, _ in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in EXCLUDED_DIRS]
+            signature.append((dirpath, os.stat(dirpath).st_mtime_ns))
+        return tuple(signature)
+
+    def scan(self):
+        """(Re)monta o índice a partir do disco"""
+        files = {}
+        suffixes = tuple(suffix for _, suffix in ENCODINGS)
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in EXCLUDED_DIRS]
+            for name in filenames:
+                if name.startswith('.') or name.endswith(suffixes):
+                    continue
+                path = os.path.join(dirpath, name)
+                relpath = os.path.relpath(path, self.root).replace(os.sep, '/')
+                files[relpath] = StaticFile(path, relpath)
+        self._files = files
+        self._signature = self._dir_signature()
+        self._checked_at = time.monotonic()
+
+    def _maybe_rescan(self):
+        if not self.rescan_interval or time.monotonic() - self._checked_at < self.rescan_interval:
+            return
+        with self._lock:
+            if time.monotonic() - self._checked_at < self.rescan_interval:
+                return
+            self._checked_at = time.monotonic()
+            if self._dir_signature() != self._signature:
+                self.scan()
+
+    def files(self):
+        return list(self._files.values())
+
+    def get(self, relpath):
+        self._maybe_rescan()
+        return self._files.get(relpath)
+
+    def send(self, relpath):
+        """Resposta para o arquivo, ou None se ele não estiver no índice"""
+        static_file = self.get(relpath)
+        if static_file is None:
+            return None
+        return send_static_file(static_file)
+
+
+def compress_tree(root):
+    """Gera os arquivos .gz/.br (compressão máxima) ao lado dos originais"""
+    index = StaticIndex(root, rescan_interval=0)
+    written = []
+    for static_file in index.files():
+        if not static_file.compressible or len(static_file.body()) < MIN_COMPRESS_SIZE:
+            continue
+        for encoding, suffix in ENCODINGS:
+            if encoding not in available_encodings():
+                continue
+            with open(static_file.path + suffix, 'wb') as f:
+                f.write(compress(static_file.body(), encoding, best=True))
+            written.append(static_file.relpath + suffix)
+    return written
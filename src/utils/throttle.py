@@ -0,0 +1,125 @@
+"""Limite de tentativas por balde de tokens, compartilhado entre workers.
+
+Os baldes ficam na tabela ``rate_limit_buckets``. Consumir um token é um
+único UPDATE condicional: dois workers nunca gastam o mesmo token. Quando um
+balde esvazia, o worker também guarda na memória até quando ele fica vazio.
+Durante esse tempo as tentativas seguintes recebem 429 sem consultar o banco.
+"""
+import threading
+import time
+
+from sqlalchemy import case, update
+from sqlalchemy.exc import IntegrityError
+
+from src.models.rate_limit import RateLimitBucket
+from src.models.user import db
+
+# Acima disso o cache local descarta as entradas vencidas
+LOCAL_BLOCKS_MAX = 10000
+
+
+def parse_rate(value):
+    """"10/60" -> (10 tokens, 60 segundos para recarregar todos)"""
+    capacity, seconds = value.split('/')
+    return float(capacity), float(seconds)
+
+
+class TokenBucket:
+    """``capacity`` tentativas seguidas, recarregadas a ``capacity / seconds`` por segundo"""
+
+    def __init__(self, name, capacity, seconds):
+        self.name = name
+        self.capacity = capacity
+        self.rate = capacity / seconds
+        self._blocked = {}
+        self._lock = threading.Lock()
+
+    def _key(self, key):
+        return f'{self.name}:{key}'[:255]
+
+    def _local_wait(self, key, now):
+        with self._lock:
+            until = self._blocked.get(key)
+            if until is None:
+                return 0
+            if until <= now:
+                del self._blocked[key]
+                return 0
+            return until - now
+
+    def _block(self, key, wait, now):
+        with self._lock:
+            if len(self._blocked) >= LOCAL_BLOCKS_MAX:
+                self._blocked = {k: until for k, until in self._blocked.items() if until > now}
+            self._blocked[key] = now + wait
+
+    def _wait_for(self, tokens):
+        return (1 - tokens) / self.rate
+
+    def _refilled(self, now):
+        column = RateLimitBucket.tokens + (now - RateLimitBucket.updated_at) * self.rate
+        return case((column > self.capacity, self.capacity), else_=column)
+
+    def retry_after(self, key):
+        """Segundos até haver um token livre (0 se já houver), sem consumir"""
+        key, now = self._key(key), time.time()
+        wait = self._local_wait(key, now)
+        if wait:
+            return wait
+        bucket = db.session.get(RateLimitBucket, key, populate_existing=True)
+        if bucket is None:
+            return 0
+        tokens = min(self.capacity, bucket.tokens + (now - bucket.updated_at) * self.rate)
+        if tokens >= 1:
+            return 0
+        wait = self._wait_for(tokens)
+        self._block(key, wait, now)
+        return wait
+
+    def take(self, key):
+        """Consome um token; retorna 0 ou, se o balde estiver vazio, os segundos de espera"""
+        key, now = self._key(key), time.time()
+        wait = self._local_wait(key, now)
+        if wait:
+            return wait
+
+        for _ in range(2):
+            refilled = self._refilled(now)
+            result = db.session.execute(
+                update(RateLimitBucket)
+                .where(RateLimitBucket.key == key, refilled >= 1)
+                .values(tokens=refilled - 1, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                db.session.commit()
+                return 0
+
+            bucket = db.session.get(RateLimitBucket, key, populate_existing=True)
+            if bucket is not None:
+                db.session.commit()
+                wait = self._wait_for(min(self.capacity, bucket.tokens + (now - bucket.updated_at) * self.rate))
+                self._block(key, wait, now)
+                return wait
+
+            try:
+                # Baldes que já recarregaram por completo equivalem a não existir
+                db.session.query(RateLimitBucket).filter(
+                    RateLimitBucket.key.startswith(f'{self.name}:', autoescape=True),
+                    RateLimitBucket.updated_at < now - self.capacity / self.rate
+                ).delete(synchronize_session=False)
+                db.session.add(RateLimitBucket(key=key, tokens=self.capacity - 1, updated_at=now))
+                db.session.commit()
+                return 0
+            except IntegrityError:
+                # Outro worker criou o balde ao mesmo tempo: tenta o UPDATE de novo
+                db.session.rollback()
+        return 0
+
+    def reset(self, key):
+        """Esvazia o registro do balde (ex.: depois de um login correto)"""
+        key = self._key(key)
+        with self._lock:
+            self._blocked.pop(key, None)
+        db.session.query(RateLimitBucket).filter_by(key=key).delete()
+        db.session.commit()
@@ -0,0 +1,104 @@
+"""Recebimento de uploads em streaming.
+
+O multipart é gravado em pedaços direto num arquivo temporário dentro da
+pasta de destino, contando bytes e calculando o SHA-256 no caminho. Passou
+do limite, o upload é abortado na hora; deu certo, o arquivo é renomeado de
+forma atômica para o nome final. Memória e disco temporário ficam constantes.
+"""
+import hashlib
+import os
+import tempfile
+
+from flask import Request, jsonify, request
+from werkzeug.exceptions import RequestEntityTooLarge
+
+MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
+# Folga para os campos de texto e os delimitadores do multipart
+MAX_CONTENT_LENGTH = MAX_FILE_SIZE + 1024 * 1024
+
+TEMP_PREFIX = '.upload-'
+TEMP_SUFFIX = '.part'
+
+
+class HashingFile:
+    """Arquivo temporário que conta bytes e calcula o SHA-256 durante a escrita"""
+
+    def __init__(self, directory, max_size=MAX_FILE_SIZE):
+        fd, self.path = tempfile.mkstemp(dir=directory, prefix=TEMP_PREFIX, suffix=TEMP_SUFFIX)
+        self._file = os.fdopen(fd, 'w+b')
+        self._hash = hashlib.sha256()
+        self.max_size = max_size
+        self.size = 0
+        self.committed = False
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise RequestEntityTooLarge()
+        self._hash.update(data)
+        return self._file.write(data)
+
+    @property
+    def sha256(self):
+        return self._hash.hexdigest()
+
+    def commit(self, final_path):
+        """Move o arquivo recebido para o caminho final"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self.path, final_path)
+        self.path = final_path
+        self.committed = True
+
+    def discard(self):
+        """Remove o temporário se ele não foi aproveitado"""
+        if not self._file.closed:
+            self._file.close()
+        if not self.committed and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+class UploadRequest(Request):
+    """Request que grava os arquivos do multipart em ``upload_dir``"""
+
+    upload_dir = None
+    max_file_size = MAX_FILE_SIZE
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.upload_dir is None:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+        stream = HashingFile(self.upload_dir, self.max_file_size)
+        self.__dict__.setdefault('_upload_streams', []).append(stream)
+        return stream
+
+    def close(self):
+        super().close()
+        for stream in self.__dict__.get('_upload_streams', []):
+            stream.discard()
+
+
+def too_large_response():
+    return jsonify({'error': f'Arquivo muito grande. Máximo {MAX_FILE_SIZE // (1024 * 1024)}MB'}), 413
+
+
+def receive_upload(upload_dir):
+    """Lê o corpo multipart gravando os arquivos em ``upload_dir``.
+
+    Deve ser chamada antes de qualquer acesso a ``request.form``/``request.files``.
+    Retorna ``None`` em caso de sucesso ou a resposta de erro.
+    """
+    if request.content_length is not None and request.content_length > MAX_CONTENT_LENGTH:
+        return too_large_response()
+
+    os.makedirs(upload_dir, exist_ok=True)
+    request.upload_dir = upload_dir
+    try:
+        request.files
+    except RequestEntityTooLarge:
+        return too_large_response()
+    return None
@@ -0,0 +1,67 @@
+"""App de teste com banco SQLite e pastas de upload temporários"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Antes de importar o app: src.main cria o app na importação
+_tmp = tempfile.mkdtemp(prefix='landing-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp, 'app.db')}"
+os.environ['METRICS_DIR'] = os.path.join(_tmp, 'metrics')
+os.environ.setdefault('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+
+from src.main import app as flask_app  # noqa: E402
+from src.models.user import db  # noqa: E402
+from src.utils import blob_store, orphans, response_cache  # noqa: E402
+from src.utils.bootstrap import bootstrap  # noqa: E402
+
+
+def make_pdf(*objects):
+    """PDF mínimo com xref válido; ``objects`` são os corpos dos objetos 1..n"""
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for num, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n%s\nendobj\n' % (num, body)
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<</Size %d /Root 1 0 R>>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+PDF = make_pdf(b'<</Type/Catalog/Pages 2 0 R>>', b'<</Type/Pages/Count 1/Kids[]>>')
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, 'BLOB_DIR', str(tmp_path / 'blobs'))
+    monkeypatch.setattr(blob_store, 'LEGACY_PDF_DIR', str(tmp_path / 'pdfs'))
+    monkeypatch.setattr(blob_store, 'LEGACY_PORTFOLIO_DIR', str(tmp_path / 'portfolio-pdfs'))
+    monkeypatch.setattr(response_cache, 'CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(response_cache, '_entries', {})
+    monkeypatch.setattr(orphans, 'QUARANTINE_DIR', str(tmp_path / 'quarantine'))
+    monkeypatch.setattr(orphans, 'REPORT_PATH', str(tmp_path / 'storage-report.json'))
+    with flask_app.app_context():
+        db.drop_all()
+    bootstrap(flask_app, verbose=False)
+    yield flask_app
+    with flask_app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin(client):
+    """Cliente já logado como o admin padrão"""
+    response = client.post('/api/auth/login', json={'username': 'diego', 'password': 'diego123'})
+    assert response.status_code == 200
+    return client
@@ -0,0 +1,45 @@
+"""Só os acessos que entregam o PDF contam como visualização"""
+import io
+
+import pytest
+
+from src.utils import analytics
+from conftest import PDF
+
+
+@pytest.fixture
+def views(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(analytics, 'record', lambda *key: recorded.append(key))
+    return recorded
+
+
+@pytest.fixture
+def pdf_url(admin):
+    response = admin.post('/api/pdfs/standalone', data={'title': 'Visto', 'pdf': (io.BytesIO(PDF), 'visto.pdf')},
+                          content_type='multipart/form-data')
+    assert response.status_code == 201
+    return f"/static/uploads/pdfs/{response.json['filename']}"
+
+
+def test_get_counts(client, pdf_url, views):
+    assert client.get(pdf_url).status_code == 200
+    assert len(views) == 1
+
+
+def test_revalidation_does_not_count(client, pdf_url, views):
+    etag = client.get(pdf_url).headers['ETag']
+    views.clear()
+    assert client.get(pdf_url, headers={'If-None-Match': etag}).status_code == 304
+    assert views == []
+
+
+def test_head_does_not_count(client, pdf_url, views):
+    assert client.head(pdf_url).status_code == 200
+    assert views == []
+
+
+def test_only_first_range_counts(client, pdf_url, views):
+    assert client.get(pdf_url, headers={'Range': 'bytes=0-9'}).status_code == 206
+    assert client.get(pdf_url, headers={'Range': 'bytes=10-'}).status_code == 206
+    assert len(views) == 1
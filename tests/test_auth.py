@@ -0,0 +1,39 @@
+"""Login: rehash sem 503 e o mesmo custo para usuários inexistentes"""
+from src.models.admin import Admin
+from src.utils import passwords
+
+
+def login(client, username='diego', password='diego123'):
+    return client.post('/api/auth/login', json={'username': username, 'password': password})
+
+
+def test_rehash_is_best_effort(app, client, monkeypatch):
+    with app.app_context():
+        old_hash = Admin.query.filter_by(username='diego').first().password_hash
+
+    def busy(password):
+        raise passwords.PoolBusy()
+    monkeypatch.setattr(passwords, 'HASH_METHOD', 'pbkdf2:sha256:2000')
+    monkeypatch.setattr(passwords, 'hash_password', busy)
+
+    assert login(client).status_code == 200
+    with app.app_context():
+        assert Admin.query.filter_by(username='diego').first().password_hash == old_hash
+
+
+def test_rehash_with_new_method(app, client, monkeypatch):
+    monkeypatch.setattr(passwords, 'HASH_METHOD', 'pbkdf2:sha256:2000')
+    assert login(client).status_code == 200
+    with app.app_context():
+        assert Admin.query.filter_by(username='diego').first().password_hash.startswith('pbkdf2:sha256:2000$')
+
+
+def test_unknown_user_still_hashes(client, monkeypatch):
+    calls = []
+    real_verify, real_hash = passwords.verify_password, passwords.hash_password
+    monkeypatch.setattr(passwords, 'verify_password', lambda *args: calls.append('verify') or real_verify(*args))
+    monkeypatch.setattr(passwords, 'hash_password', lambda *args: calls.append('hash') or real_hash(*args))
+
+    for _ in range(2):
+        assert login(client, username='ninguem').status_code == 401
+    assert len(calls) == 2
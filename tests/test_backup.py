@@ -0,0 +1,116 @@
+"""Cópia de segurança em ZIP e restauração num banco vazio"""
+import io
+import os
+import shutil
+import zipfile
+
+import pytest
+from sqlalchemy import select
+
+from conftest import make_pdf
+from src.models.user import db
+from src.utils import backup, blob_store
+from src.utils.backup import BackupError, restore
+from src.utils.bootstrap import bootstrap
+
+# Todas menos tombstones (o restore grava a sua marca) e as que a cópia pula
+COMPARED_TABLES = ('admin', 'analytics_daily', 'blobs', 'metadata_cache', 'pdf_uploads', 'portfolio_link',
+                   'portfolio_pdfs', 'standalone_pdfs', 'user')
+
+
+def seed(admin):
+    for i in range(3):
+        response = admin.post('/api/portfolio/links', json={
+            'title': f'Link {i}', 'url': f'https://example.com/{i}', 'description': 'd',
+            'image_url': 'https://img.example/x.png'})
+        assert response.status_code == 201
+    for i in range(2):
+        response = admin.post('/api/portfolio/pdfs', content_type='multipart/form-data', data={
+            'title': f'PDF {i}', 'pdf': (io.BytesIO(make_pdf(b'<<>>' * (i + 1))), f'portfolio-{i}.pdf')})
+        assert response.status_code == 201
+    # Mesmo conteúdo de um PDF do portfólio: um único blob para os dois
+    response = admin.post('/api/pdfs/standalone', content_type='multipart/form-data', data={
+        'title': 'Avulso', 'pdf': (io.BytesIO(make_pdf(b'<<>>')), 'avulso.pdf')})
+    assert response.status_code == 201
+
+
+def dump(app):
+    with app.app_context():
+        tables = {table.name: table for table in db.metadata.sorted_tables}
+        return {name: sorted(tuple(row) for row in db.session.execute(select(tables[name])))
+                for name in COMPARED_TABLES}
+
+
+def blob_files():
+    files = {}
+    for folder, _, names in os.walk(blob_store.BLOB_DIR):
+        for name in names:
+            with open(os.path.join(folder, name), 'rb') as f:
+                files[name] = f.read()
+    return files
+
+
+def download(admin, path):
+    response = admin.get('/api/backup')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.headers['Cache-Control'] == 'no-store'
+    path.write_bytes(response.get_data())
+    return path
+
+
+def empty_site(app):
+    with app.app_context():
+        db.drop_all()
+    shutil.rmtree(blob_store.BLOB_DIR)
+    bootstrap(app, verbose=False)
+
+
+def test_backup_restores_into_an_empty_site(app, admin, tmp_path, monkeypatch):
+    # Lotes pequenos: o restore faz vários commits por tabela
+    monkeypatch.setattr(backup, 'BATCH_SIZE', 2)
+    seed(admin)
+    tables, blobs = dump(app), blob_files()
+    archive = download(admin, tmp_path / 'backup.zip')
+
+    with zipfile.ZipFile(archive) as zf:
+        entries = {info.filename: info for info in zf.infolist()}
+        assert zf.testzip() is None
+    pdf_entries = [info for name, info in entries.items() if name.startswith('blobs/')]
+    assert len(pdf_entries) == len(blobs) == 2
+    assert all(info.compress_type == zipfile.ZIP_STORED for info in pdf_entries)
+    assert entries['tables/portfolio_link.ndjson'].compress_type == zipfile.ZIP_DEFLATED
+
+    empty_site(app)
+    with app.app_context():
+        report = restore(str(archive), replace=True)
+    assert report['blobs'] == 2
+    assert report['tables']['portfolio_link'] == 3
+
+    assert dump(app) == tables
+    assert blob_files() == blobs
+    pdfs = admin.get('/api/portfolio/pdfs').json
+    assert [pdf['title'] for pdf in pdfs] == ['PDF 0', 'PDF 1']
+    assert admin.get(pdfs[0]['blob_url']).get_data() == make_pdf(b'<<>>')
+
+
+def test_restore_keeps_existing_data_without_replace(app, admin, tmp_path):
+    seed(admin)
+    archive = download(admin, tmp_path / 'backup.zip')
+    with app.app_context(), pytest.raises(BackupError, match='--replace'):
+        restore(str(archive))
+
+
+def test_restore_rejects_a_tampered_blob(app, admin, tmp_path):
+    seed(admin)
+    archive = download(admin, tmp_path / 'backup.zip')
+    tampered = tmp_path / 'tampered.zip'
+    with zipfile.ZipFile(archive) as source, zipfile.ZipFile(tampered, 'w') as dest:
+        for info in source.infolist():
+            data = source.read(info)
+            dest.writestr(info, data.replace(b'%PDF', b'%XYZ') if info.filename.startswith('blobs/') else data)
+
+    empty_site(app)
+    with app.app_context(), pytest.raises(BackupError, match='SHA-256'):
+        restore(str(tampered), replace=True)
+    assert blob_files() == {}
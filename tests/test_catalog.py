@@ -0,0 +1,54 @@
+"""Reconciliação do catálogo com o disco e a coleta de órfãos logo depois"""
+import hashlib
+import io
+import os
+import time
+
+from conftest import PDF
+from src.models import pdf_info
+from src.routes.pdf_standalone import StandalonePDF
+from src.routes.pdf_upload import PdfUpload
+from src.utils import blob_store, orphans
+from src.utils.catalog import inspect_pending, reconcile_catalog
+
+
+def write_old_blob(days):
+    sha256 = hashlib.sha256(PDF).hexdigest()
+    path = blob_store.blob_path(sha256)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(PDF)
+    old = time.time() - days * 86400
+    os.utime(path, (old, old))
+    return sha256
+
+
+def test_adopted_blob_survives_the_next_collection(app):
+    with app.app_context():
+        sha256 = write_old_blob(orphans.GRACE_DAYS * 3)
+        assert reconcile_catalog()['adopted'] == 1
+
+        report = orphans.collect_orphans()
+        assert report['unlinked_uploads'] == 0
+        assert report['orphans'] == 0
+        assert PdfUpload.query.filter_by(sha256=sha256).count() == 1
+        assert os.path.exists(blob_store.blob_path(sha256))
+
+
+def test_failed_inspection_is_not_retried(admin, app, monkeypatch):
+    calls = []
+
+    def broken(path):
+        calls.append(path)
+        raise ValueError('xref corrompido')
+    monkeypatch.setattr(pdf_info, 'inspect_pdf', broken)
+
+    response = admin.post('/api/pdfs/standalone', data={'title': 'Quebrado', 'pdf': (io.BytesIO(PDF), 'q.pdf')},
+                          content_type='multipart/form-data')
+    assert response.status_code == 201
+    assert response.json['inspect_error'] == 'xref corrompido'
+
+    with app.app_context():
+        assert inspect_pending() == 0
+        assert StandalonePDF.query.one().inspected_at is not None
+    assert len(calls) == 1
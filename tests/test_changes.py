@@ -0,0 +1,34 @@
+"""Feed de alterações: uma restauração de cópia invalida os tokens antigos"""
+from src.utils.backup import iter_backup, restore, write_archive
+
+
+def add_link(client, title):
+    response = client.post('/api/portfolio/links', json={'url': f'https://example.com/{title}', 'title': title,
+                                                         'description': title})
+    assert response.status_code in (201, 202)
+    return response.json['id']
+
+
+def test_sync_across_restore(admin, app, tmp_path):
+    kept = add_link(admin, 'antes')
+    archive = tmp_path / 'backup.zip'
+    with app.app_context():
+        write_archive(iter_backup(), str(archive))
+
+    token = admin.get('/api/changes').json['next']
+    dropped = add_link(admin, 'depois')
+    changes = admin.get('/api/changes', query_string={'since': token}).json
+    assert not changes['reset']
+    assert dropped in [item['id'] for item in changes['changed']['links']]
+
+    with app.app_context():
+        restore(str(archive), replace=True)
+
+    # O link criado depois da cópia sumiu sem lápide: o cliente precisa recarregar
+    changes = admin.get('/api/changes', query_string={'since': token}).json
+    assert changes['reset']
+    assert [item['id'] for item in admin.get('/api/portfolio/links').json] == [kept]
+
+    # O token novo volta a sincronizar normalmente
+    changes = admin.get('/api/changes', query_string={'since': changes['next']}).json
+    assert not changes['reset']
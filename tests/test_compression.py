@@ -0,0 +1,77 @@
+"""Compressão das respostas JSON da API (ETag fraco e Vary)"""
+import gzip
+import json
+
+import pytest
+from flask import Flask, jsonify, request
+
+from src.utils import compression
+from test_pagination import expected_order, seed_links
+
+ITEMS = [{'id': i, 'title': f'Item {i}'} for i in range(200)]
+
+
+@pytest.fixture
+def api():
+    """App mínimo com a compressão ligada e uma rota com ETag forte"""
+    app = Flask(__name__)
+
+    @app.route('/items')
+    def items():
+        response = jsonify(ITEMS)
+        response.set_etag('itens-v1')
+        return response.make_conditional(request)
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    compression.init_app(app)
+    return app.test_client()
+
+
+def test_compressed_json_gets_a_weak_etag_and_vary(api):
+    response = api.get('/items', headers={'Accept-Encoding': 'gzip'})
+    assert response.content_encoding == 'gzip'
+    assert json.loads(gzip.decompress(response.get_data())) == ITEMS
+    assert response.headers['ETag'] == 'W/"itens-v1"'
+    assert 'Accept-Encoding' in response.vary
+
+    # O ETag fraco devolvido pelo cliente ainda casa com o forte da rota
+    response = api.get('/items', headers={'Accept-Encoding': 'gzip', 'If-None-Match': 'W/"itens-v1"'})
+    assert response.status_code == 304
+
+
+def test_identity_keeps_the_strong_etag(api):
+    response = api.get('/items', headers={'Accept-Encoding': 'identity'})
+    assert response.content_encoding is None
+    assert response.headers['ETag'] == '"itens-v1"'
+    # Mesmo sem comprimir: um cache na frente precisa separar as variantes
+    assert 'Accept-Encoding' in response.vary
+
+
+def test_small_responses_are_left_alone(api):
+    response = api.get('/small', headers={'Accept-Encoding': 'gzip'})
+    assert response.content_encoding is None
+    assert 'Accept-Encoding' not in response.vary
+
+
+def test_streamed_list_is_compressed_in_stream(app, admin):
+    seed_links(app, 250)
+    response = admin.get('/api/portfolio/admin/links', headers={'Accept-Encoding': 'gzip'})
+    assert response.is_streamed
+    assert response.content_encoding == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert {'Accept', 'Accept-Encoding'} <= set(response.vary)
+    items = json.loads(gzip.decompress(response.get_data()))
+    assert [item['id'] for item in items] == expected_order(app)
+
+
+def test_cached_list_has_one_etag_per_encoding(app, client):
+    seed_links(app, 30)
+    plain = client.get('/api/portfolio/links', headers={'Accept-Encoding': 'identity'})
+    gzipped = client.get('/api/portfolio/links', headers={'Accept-Encoding': 'gzip'})
+    assert gzipped.content_encoding == 'gzip'
+    assert {'Accept', 'Accept-Encoding'} <= set(plain.vary) & set(gzipped.vary)
+    assert plain.headers['ETag'] != gzipped.headers['ETag']
+    assert json.loads(gzip.decompress(gzipped.get_data())) == plain.json
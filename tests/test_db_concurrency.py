@@ -0,0 +1,93 @@
+"""Vários processos (como os workers do gunicorn) lendo e escrevendo no mesmo SQLite"""
+import multiprocessing
+import os
+import time
+from datetime import datetime
+
+from flask import Flask
+
+from src.models.admin import Admin
+from src.models.portfolio import PortfolioLink
+from src.models.user import db
+from src.utils.database import init_database
+
+READERS = 4
+WRITERS = 2
+SECONDS = 2
+
+
+def make_app(path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    init_database(app)
+    return app
+
+
+def reader(path, results):
+    """Lista os links ativos, como a rota pública"""
+    app = make_app(path)
+    done, errors = 0, []
+    deadline = time.monotonic() + SECONDS
+    with app.app_context():
+        while time.monotonic() < deadline:
+            try:
+                PortfolioLink.query.filter_by(is_active=True).order_by(PortfolioLink.created_at.desc()).all()
+                db.session.commit()
+                done += 1
+            except Exception as e:
+                db.session.rollback()
+                errors.append(str(e))
+    results.put(('reader', done, errors))
+
+
+def writer(path, results):
+    """Cria e altera links e atualiza o last_login, como o painel admin"""
+    app = make_app(path)
+    done, errors = 0, []
+    deadline = time.monotonic() + SECONDS
+    with app.app_context():
+        while time.monotonic() < deadline:
+            try:
+                admin = Admin.query.first()
+                admin.last_login = datetime.utcnow()
+                link = PortfolioLink(title=f'Link {os.getpid()}-{done}', url='https://example.com')
+                db.session.add(link)
+                db.session.commit()
+                link.is_active = not link.is_active
+                db.session.commit()
+                done += 1
+            except Exception as e:
+                db.session.rollback()
+                errors.append(str(e))
+    results.put(('writer', done, errors))
+
+
+def test_parallel_readers_and_writers(tmp_path):
+    path = str(tmp_path / 'concurrency.db')
+    app = make_app(path)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Admin(username='teste', password_hash='x'))
+        db.session.commit()
+        assert db.session.execute(db.text('PRAGMA journal_mode')).scalar() == 'wal'
+        db.engine.dispose()
+
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    processes = [context.Process(target=reader, args=(path, results)) for _ in range(READERS)]
+    processes += [context.Process(target=writer, args=(path, results)) for _ in range(WRITERS)]
+    for process in processes:
+        process.start()
+    outcomes = [results.get(timeout=SECONDS + 30) for _ in processes]
+    for process in processes:
+        process.join()
+
+    # Com WAL e busy_timeout nenhuma operação falha (nem com "database is locked")
+    errors = [error for _, _, process_errors in outcomes for error in process_errors]
+    assert errors == []
+    for kind in ('reader', 'writer'):
+        assert all(done > 0 for outcome_kind, done, _ in outcomes if outcome_kind == kind)
+
+    with app.app_context():
+        written = sum(done for kind, done, _ in outcomes if kind == 'writer')
+        assert PortfolioLink.query.count() == written
@@ -0,0 +1,98 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import ROOT, flask_app
+from src.models.metadata_cache import MetadataCache
+from src.models.portfolio import PortfolioLink
+from src.routes.link_import import iter_import
+from src.utils.link_import import normalize_entries
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.end_headers()
+        if self.path.startswith('/slow'):
+            # Goteja para sempre: o timeout de leitura nunca vence sozinho
+            try:
+                while True:
+                    self.wfile.write(b' ')
+                    self.wfile.flush()
+                    time.sleep(0.1)
+            except OSError:
+                return
+        self.wfile.write(b'<html><head><title>Pagina</title></head><body></body></html>')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site(monkeypatch):
+    monkeypatch.setenv('NO_PROXY', '127.0.0.1')
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def link(url):
+    return {'url': url, 'title': 'T', 'description': 'D', 'image_url': 'https://img.example/x.png'}
+
+
+def test_normalize_entries_merges_equivalent_urls():
+    entries = normalize_entries(['https://Example.com/a?b=2&a=1', 'https://example.com/a?a=1&b=2#top'])
+    assert len(entries) == 1
+
+
+def test_import_skips_existing_url_written_differently(admin):
+    admin.post('/api/portfolio/links/import', json={'links': [link('https://Example.com:443/page?b=2&a=1')]})
+    response = admin.post('/api/portfolio/links/import', json={'links': [link('https://example.com/page?a=1&b=2')]})
+    assert response.json['summary']['skipped'] == 1
+    with flask_app.app_context():
+        assert PortfolioLink.query.count() == 1
+
+
+def test_cli_help_does_not_touch_database(tmp_path):
+    db_path = tmp_path / 'cli.db'
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_path}', METRICS_DIR=str(tmp_path / 'metrics'))
+    result = subprocess.run([sys.executable, os.path.join(ROOT, 'import_links.py'), '--help'],
+                            env=env, capture_output=True, text=True)
+    assert result.returncode == 0
+    assert not db_path.exists()
+
+
+def test_metadata_cache_written_by_request_thread(admin, site, monkeypatch):
+    writers = []
+    store = MetadataCache.store.__func__
+    monkeypatch.setattr(MetadataCache, 'store',
+                        classmethod(lambda cls, *args, **kwargs: writers.append(threading.current_thread())
+                                    or store(cls, *args, **kwargs)))
+
+    response = admin.post('/api/portfolio/links/import', json={'links': [f'{site}/a', f'{site}/b']})
+    assert response.json['summary']['created'] == 2
+    assert [result['error'] for result in response.json['results']] == [None, None]
+    assert writers == [threading.current_thread()] * 2
+    with flask_app.app_context():
+        assert {link.title for link in PortfolioLink.query} == {'Pagina'}
+        assert MetadataCache.query.count() == 2
+
+
+def test_timeout_stops_fetches_still_running(app, site):
+    start = time.monotonic()
+    with app.app_context():
+        results = list(iter_import([{'url': f'{site}/slow', 'title': None, 'description': None,
+                                     'image_url': None, 'pdf_url': None}], timeout=1))
+    assert time.monotonic() - start < 3
+    assert results[0]['status'] == 'created'
+    assert results[0]['error'] == 'Tempo esgotado'
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith('link-import')]
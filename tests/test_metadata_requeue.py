@@ -0,0 +1,57 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.portfolio import METADATA_DONE, METADATA_PENDING, PortfolioLink, db
+from src.routes import portfolio
+
+
+@pytest.fixture
+def submitted(monkeypatch):
+    calls = []
+    monkeypatch.setattr(portfolio.metadata_jobs, 'submit', lambda func, *args, on_failure=None: calls.append(args) or True)
+    monkeypatch.setitem(portfolio._sweeper, 'pid', None)
+    return calls
+
+
+def add_link(age, status=METADATA_PENDING):
+    link = PortfolioLink(title='https://example.com', url='https://example.com', metadata_status=status)
+    db.session.add(link)
+    db.session.commit()
+    PortfolioLink.query.filter_by(id=link.id).update({PortfolioLink.updated_at: datetime.utcnow() - age})
+    db.session.commit()
+    return link.id
+
+
+def test_stale_pending_links_are_requeued_once(app, submitted):
+    with app.app_context():
+        stale = add_link(timedelta(hours=1))
+        add_link(timedelta(seconds=5))
+        add_link(timedelta(hours=1), status=METADATA_DONE)
+
+        assert portfolio.requeue_stale_metadata() == 1
+        assert [args[1] for args in submitted] == [stale]
+        # O prazo foi renovado: outro worker (ou a próxima varredura) não pega de novo
+        assert portfolio.requeue_stale_metadata() == 0
+
+
+def test_requests_never_sweep(client, app, submitted):
+    with app.app_context():
+        add_link(timedelta(hours=1))
+    client.get('/api/portfolio/links')
+    assert submitted == []
+
+
+def test_sweeper_thread_requeues_after_fork(app, submitted):
+    with app.app_context():
+        stale = add_link(timedelta(hours=1))
+    portfolio.start_metadata_sweeper(app)
+    # Uma thread por processo: chamar de novo não cria outra
+    portfolio.start_metadata_sweeper(app)
+
+    deadline = time.monotonic() + 5
+    while not submitted:
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    assert [args[1] for args in submitted] == [stale]
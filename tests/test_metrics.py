@@ -0,0 +1,72 @@
+"""/metrics somando os retratos de vários workers"""
+import multiprocessing
+import os
+import re
+import time
+
+import pytest
+
+from src.models.user import db
+from src.utils import metrics
+
+LINKS = '/api/portfolio/links'
+WORKERS = 3
+REQUESTS_PER_WORKER = 4
+
+
+@pytest.fixture
+def metrics_dir(tmp_path, monkeypatch):
+    path = tmp_path / 'metrics'
+    monkeypatch.setattr(metrics, 'METRICS_DIR', str(path))
+    monkeypatch.setattr(metrics, 'registry', metrics.Registry())
+    monkeypatch.setitem(metrics._state, 'pid', None)
+    return path
+
+
+def worker(app):
+    """Um worker do gunicorn: atende algumas requisições e grava o retrato"""
+    with app.app_context():
+        db.engine.dispose(close=False)
+    client = app.test_client()
+    for _ in range(REQUESTS_PER_WORKER):
+        assert client.get(LINKS).status_code == 200
+    metrics.flush(force=True)
+
+
+def sample(text, name, **labels):
+    wanted = ','.join(f'{key}="{value}"' for key, value in sorted(labels.items()))
+    match = re.search(rf'^{name}\{{{re.escape(wanted)}\}} (\S+)$', text, re.M)
+    return float(match.group(1)) if match else None
+
+
+def test_metrics_sum_every_worker(app, client, metrics_dir):
+    # O "mestre" já atendeu uma requisição antes do fork
+    assert client.get(LINKS).status_code == 200
+
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=worker, args=(app,)) for _ in range(WORKERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert len(list(metrics_dir.glob('*.json'))) == WORKERS + 1
+    expected = 1 + WORKERS * REQUESTS_PER_WORKER
+    endpoint = {'blueprint': 'portfolio', 'endpoint': 'portfolio.get_portfolio_links'}
+    assert sample(text, 'http_requests_total', method='GET', status='200', **endpoint) == expected
+    assert sample(text, 'http_request_duration_seconds_count', **endpoint) == expected
+    assert sample(text, 'http_request_duration_seconds_bucket', le='+Inf', **endpoint) == expected
+
+
+def test_stale_worker_files_are_dropped(app, client, metrics_dir):
+    metrics_dir.mkdir()
+    stale = metrics_dir / '1-1.json'
+    stale.write_text('{"counters": [["db_queries_total", [["source", "request"]], 1000]], "histograms": []}')
+    old = time.time() - metrics.RETENTION - 60
+    os.utime(stale, (old, old))
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert not stale.exists()
+    assert (sample(text, 'db_queries_total', source='request') or 0) < 1000
@@ -0,0 +1,68 @@
+"""Paginação por cursor (keyset) nas listagens"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.portfolio import PortfolioLink, db
+from src.utils import pagination
+
+
+def seed_links(app, count, created_at=None):
+    """Links com vários created_at repetidos: o desempate é pelo id"""
+    base = created_at or datetime(2026, 1, 1)
+    with app.app_context():
+        links = [PortfolioLink(title=f'Link {i}', url=f'https://example.com/{i}', description='d',
+                               image_url='https://img.example/x.png', created_at=base + timedelta(minutes=i // 3))
+                 for i in range(count)]
+        db.session.add_all(links)
+        db.session.commit()
+        return [link.id for link in links]
+
+
+def expected_order(app):
+    with app.app_context():
+        return [link.id for link in PortfolioLink.query.order_by(PortfolioLink.created_at.desc(),
+                                                                 PortfolioLink.id.desc())]
+
+
+def walk(client, path, limit, cursor=None):
+    ids = []
+    while True:
+        params = {'limit': limit, **({'cursor': cursor} if cursor else {})}
+        page = client.get(path, query_string=params).json
+        assert len(page['items']) <= limit
+        ids += [item['id'] for item in page['items']]
+        cursor = page['next_cursor']
+        if not cursor:
+            return ids
+
+
+@pytest.mark.parametrize('path', ['/api/portfolio/links', '/api/portfolio/admin/links'])
+def test_pages_cover_everything_once_in_order(admin, app, path):
+    seed_links(app, 23)
+    assert walk(admin, path, 5) == expected_order(app)
+
+
+def test_insert_between_pages_does_not_repeat_items(admin, app):
+    seed_links(app, 10)
+    first = admin.get('/api/portfolio/admin/links', query_string={'limit': 4}).json
+    # Um link novo entra no topo: com OFFSET a página seguinte repetiria um item
+    seed_links(app, 1, created_at=datetime(2030, 1, 1))
+    ids = [item['id'] for item in first['items']]
+    ids += walk(admin, '/api/portfolio/admin/links', 4, first['next_cursor'])
+    assert len(ids) == len(set(ids)) == 10
+
+
+def test_limit_is_clamped(admin, app, monkeypatch):
+    monkeypatch.setattr(pagination, 'MAX_LIMIT', 3)
+    seed_links(app, 5)
+    page = admin.get('/api/portfolio/admin/links', query_string={'limit': 1000}).json
+    assert len(page['items']) == 3
+    assert page['next_cursor']
+
+
+def test_invalid_cursor_is_400(admin):
+    response = admin.get('/api/portfolio/admin/links', query_string={'cursor': 'nao-e-um-cursor'})
+    assert response.status_code == 400
+    assert admin.get('/api/portfolio/admin/links',
+                     query_string={'cursor': pagination.encode_cursor([1])}).status_code == 400
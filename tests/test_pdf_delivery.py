@@ -0,0 +1,75 @@
+"""Entrega dos PDFs: ETag pelo SHA-256, Range e offload para o proxy"""
+import hashlib
+import io
+
+import pytest
+
+from conftest import PDF
+from src.utils import pdf_delivery
+
+SHA256 = hashlib.sha256(PDF).hexdigest()
+
+
+@pytest.fixture
+def pdf(admin):
+    response = admin.post('/api/portfolio/pdfs', data={'title': 'Relatório', 'pdf': (io.BytesIO(PDF), 'r.pdf')},
+                          content_type='multipart/form-data')
+    assert response.status_code == 201
+    return response.json
+
+
+def test_etag_is_the_content_hash(client, pdf):
+    response = client.get(pdf['blob_url'])
+    assert response.status_code == 200
+    assert response.headers['ETag'] == f'"{SHA256}"'
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert response.data == PDF
+
+    assert client.get(pdf['blob_url'], headers={'If-None-Match': f'"{SHA256}"'}).status_code == 304
+
+
+def test_legacy_name_revalidates(client, pdf):
+    url = f"/static/uploads/portfolio-pdfs/{pdf['filename']}"
+    response = client.get(url)
+    assert response.headers['ETag'] == f'"{SHA256}"'
+    assert 'no-cache' in response.headers['Cache-Control']
+    assert client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+
+def test_range_returns_partial_content(client, pdf):
+    response = client.get(pdf['blob_url'], headers={'Range': 'bytes=0-9'})
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == f'bytes 0-9/{len(PDF)}'
+    assert response.data == PDF[:10]
+
+    tail = client.get(pdf['blob_url'], headers={'Range': 'bytes=-5'})
+    assert tail.status_code == 206
+    assert tail.data == PDF[-5:]
+
+    assert client.get(pdf['blob_url'], headers={'Range': f'bytes={len(PDF) + 10}-'}).status_code == 416
+
+
+def test_if_range_with_another_etag_sends_everything(client, pdf):
+    response = client.get(pdf['blob_url'], headers={'Range': 'bytes=0-9', 'If-Range': '"outro"'})
+    assert response.status_code == 200
+    assert response.data == PDF
+
+    response = client.get(pdf['blob_url'], headers={'Range': 'bytes=0-9', 'If-Range': f'"{SHA256}"'})
+    assert response.status_code == 206
+
+
+def test_x_accel_hands_the_file_to_nginx(client, pdf, monkeypatch):
+    monkeypatch.setattr(pdf_delivery, 'SENDFILE_MODE', 'x-accel')
+    response = client.get(pdf['blob_url'])
+    assert response.status_code == 200
+    assert response.headers['X-Accel-Redirect'] == f'{pdf_delivery.ACCEL_PREFIX}{SHA256[:2]}/{SHA256}.pdf'
+    assert response.data == b''
+
+    revalidated = client.get(pdf['blob_url'], headers={'If-None-Match': f'"{SHA256}"'})
+    assert revalidated.status_code == 304
+    assert 'X-Accel-Redirect' not in revalidated.headers
+
+
+def test_missing_file_is_404(client):
+    assert client.get(f'/static/uploads/blobs/{"0" * 2}/{"0" * 64}.pdf').status_code == 404
@@ -0,0 +1,26 @@
+"""URLs públicas dos PDFs guardados no armazenamento por conteúdo"""
+import io
+
+from conftest import PDF
+
+
+def test_upload_url_serves_the_pdf(admin):
+    response = admin.post('/api/upload/pdf', data={'pdf_file': (io.BytesIO(PDF), 'avulso.pdf')},
+                          content_type='multipart/form-data')
+    assert response.status_code == 200
+
+    served = admin.get(response.json['pdf_url'])
+    assert served.status_code == 200
+    assert served.mimetype == 'application/pdf'
+    assert served.data == PDF
+
+
+def test_listing_url_serves_the_pdf(admin):
+    admin.post('/api/upload/pdf', data={'pdf_file': (io.BytesIO(PDF), 'listado.pdf')},
+               content_type='multipart/form-data')
+    listing = admin.get('/api/uploads/pdfs').json
+    assert admin.get(listing[0]['url']).data == PDF
+
+
+def test_unknown_name_is_404(client):
+    assert client.get('/uploads/pdfs/nao-existe.pdf').status_code == 404
@@ -0,0 +1,45 @@
+import io
+
+from conftest import PDF, make_pdf
+from src.utils.pdf_inspect import PdfError, Parser, inspect_pdf
+
+NESTED = b'[' * 5000 + b']' * 5000
+DEEP_PDF = make_pdf(b'<</Type/Catalog/Pages 2 0 R/Deep ' + NESTED + b'>>', b'<</Type/Pages/Count 1/Kids[]>>')
+
+
+def test_parser_rejects_deep_nesting():
+    try:
+        Parser(NESTED).value()
+    except PdfError:
+        pass
+    else:
+        raise AssertionError('PdfError esperado')
+
+
+def test_inspect_pdf_reads_simple_pdf(tmp_path):
+    path = tmp_path / 'a.pdf'
+    path.write_bytes(PDF)
+    info = inspect_pdf(str(path))
+    assert info['pdf_version'] == '1.4'
+    assert info['page_count'] == 1
+
+
+def test_inspect_pdf_survives_deep_nesting(tmp_path):
+    path = tmp_path / 'deep.pdf'
+    path.write_bytes(DEEP_PDF)
+    info = inspect_pdf(str(path))
+    assert info['pdf_version'] == '1.4'
+    assert info['page_count'] is None
+
+
+def test_linearization_header_with_deep_nesting(tmp_path):
+    path = tmp_path / 'lin.pdf'
+    path.write_bytes(b'%PDF-1.4\n1 0 obj<</Linearized 1/X ' + NESTED[:1000] + b'>>endobj\n%%EOF\n')
+    assert inspect_pdf(str(path))['linearized'] is False
+
+
+def test_upload_of_deeply_nested_pdf(admin):
+    response = admin.post('/api/pdfs/standalone', data={'title': 'Fundo', 'pdf': (io.BytesIO(DEEP_PDF), 'deep.pdf')},
+                          content_type='multipart/form-data')
+    assert response.status_code == 201
+    assert response.json['page_count'] is None
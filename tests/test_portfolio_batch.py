@@ -0,0 +1,64 @@
+"""Lote de operações em PDFs e links (POST /api/portfolio/batch)"""
+import io
+
+from conftest import make_pdf
+from src.models.portfolio import PortfolioLink
+from src.routes.portfolio_pdfs import PortfolioPDF
+
+BATCH = '/api/portfolio/batch'
+
+
+def upload_pdfs(admin, count):
+    ids = []
+    for i in range(count):
+        # Conteúdos diferentes: cada PDF com o seu blob
+        data = {'title': f'PDF {i}', 'pdf': (io.BytesIO(make_pdf(b'<<>>' * (i + 1))), f'{i}.pdf')}
+        response = admin.post('/api/portfolio/pdfs', data=data, content_type='multipart/form-data')
+        assert response.status_code == 201
+        ids.append(response.json['id'])
+    return ids
+
+
+def order_of(app):
+    with app.app_context():
+        return [(pdf.id, pdf.order_index) for pdf in PortfolioPDF.query.order_by(PortfolioPDF.order_index)]
+
+
+def test_failing_operation_rolls_back_the_whole_batch(app, admin):
+    pdf_ids = upload_pdfs(admin, 2)
+    response = admin.post(BATCH, json={'operations': [
+        {'op': 'create', 'type': 'link', 'data': {'url': 'https://example.com', 'title': 'Novo',
+                                                  'description': 'd', 'image_url': 'https://img.example/x.png'}},
+        {'op': 'delete', 'type': 'pdf', 'id': pdf_ids[0]},
+        {'op': 'toggle', 'type': 'pdf', 'id': 9999},
+    ]})
+    assert response.status_code == 404
+    assert response.json['index'] == 2
+
+    with app.app_context():
+        assert PortfolioLink.query.count() == 0
+        assert PortfolioPDF.query.count() == 2
+
+    response = admin.post(BATCH, json={'operations': [{'op': 'rename', 'type': 'pdf', 'id': pdf_ids[1]}]})
+    assert response.status_code == 400
+    assert response.json['index'] == 0
+
+
+def test_reorder_is_only_for_pdfs(app, admin):
+    response = admin.post(BATCH, json={'operations': [{'op': 'reorder', 'type': 'link', 'ids': [1]}]})
+    assert response.status_code == 400
+    assert response.json['index'] == 0
+
+
+def test_order_index_stays_dense(app, admin):
+    first, second, third, fourth = upload_pdfs(admin, 4)
+    response = admin.post(BATCH, json={'operations': [
+        {'op': 'delete', 'type': 'pdf', 'id': second},
+        {'op': 'reorder', 'type': 'pdf', 'ids': [fourth, first]},
+    ]})
+    assert response.status_code == 200
+    assert order_of(app) == [(fourth, 1), (first, 2), (third, 3)]
+
+    response = admin.post(BATCH, json={'operations': [{'op': 'delete', 'type': 'pdf', 'id': first}]})
+    assert response.status_code == 200
+    assert order_of(app) == [(fourth, 1), (third, 2)]
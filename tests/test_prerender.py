@@ -0,0 +1,99 @@
+"""index.html com os dados do portfólio embutidos (PRERENDER_INDEX)"""
+import json
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from src.routes.portfolio import public_links
+from src.routes.portfolio_pdfs import public_pdfs
+from src.utils import response_cache
+from src.utils.prerender import PrerenderedIndex
+from src.utils.static_files import StaticIndex
+
+LINKS = '/api/portfolio/links'
+INDEX_HTML = ('<!doctype html><html><head><title>Diego</title>'
+              '<script type="module" crossorigin src="/assets/index-Dk3a9x.js"></script>'
+              '</head><body><div id="root"></div></body></html>')
+INITIAL_DATA_RE = re.compile(r'<script>window\.__INITIAL_DATA__=(\{.*?\});(.*?)</script>')
+
+
+@pytest.fixture
+def index_page(app, tmp_path):
+    (tmp_path / 'assets').mkdir()
+    (tmp_path / 'index.html').write_text(INDEX_HTML)
+    (tmp_path / 'assets' / 'index-Dk3a9x.js').write_text(
+        'const a="/assets/hero-Q1w2e3.webp",b="/assets/inter-Z9y8x7.woff2";fetch("/api/portfolio/links")')
+    return PrerenderedIndex(StaticIndex(str(tmp_path)), {
+        LINKS: (response_cache.PORTFOLIO_LINKS, public_links),
+        '/api/portfolio/pdfs': (response_cache.PORTFOLIO_PDFS, public_pdfs),
+    })
+
+
+def render(app, index_page):
+    with app.test_request_context():
+        return index_page.send().get_data(as_text=True)
+
+
+def initial_data(html):
+    data, shim = INITIAL_DATA_RE.search(html).groups()
+    return {url: json.loads(body) for url, body in json.loads(data).items()}, shim
+
+
+def create_link(admin, title):
+    response = admin.post(LINKS, json={'title': title, 'url': 'https://example.com', 'description': 'd',
+                                       'image_url': 'https://img.example/x.png'})
+    assert response.status_code == 201
+
+
+def test_data_matches_the_api_and_runs_before_the_bundle(app, admin, index_page):
+    create_link(admin, 'Fim de </script><script>alert(1)</script>')
+    html = render(app, index_page)
+
+    data, _ = initial_data(html)
+    assert data[LINKS] == admin.get(LINKS).json
+    assert data['/api/portfolio/pdfs'] == []
+    # O título não fecha o <script> embutido
+    assert html.count('</script>') == 2
+    assert html.index('__INITIAL_DATA__') < html.index('type="module"')
+    assert '<link rel="preload" as="image" href="/assets/hero-Q1w2e3.webp">' in html
+    assert '<link rel="preload" as="font" href="/assets/inter-Z9y8x7.woff2" crossorigin>' in html
+
+
+def test_document_is_rebuilt_only_when_data_changes(app, admin, index_page):
+    create_link(admin, 'Primeiro')
+    with app.test_request_context():
+        first = index_page.document()
+        assert index_page.document() is first
+
+    create_link(admin, 'Segundo')
+    data, _ = initial_data(render(app, index_page))
+    assert [link['title'] for link in data[LINKS]] == ['Segundo', 'Primeiro']
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node não instalado')
+def test_shim_answers_the_first_get_only(app, admin, index_page):
+    create_link(admin, 'Embutido')
+    match = INITIAL_DATA_RE.search(render(app, index_page))
+    script = f'''
+        window = globalThis;
+        const calls = [];
+        window.fetch = (url, options) => {{
+            calls.push([url, (options && options.method) || 'GET']);
+            return Promise.resolve(new Response('"rede"'));
+        }};
+        window.__INITIAL_DATA__ = {match.group(1)};
+        {match.group(2)}
+        (async () => {{
+            const first = await (await fetch('{LINKS}')).json();
+            const second = await (await fetch('{LINKS}')).json();
+            const posted = await (await fetch('/api/portfolio/pdfs', {{method: 'POST'}})).json();
+            console.log(JSON.stringify({{first, second, posted, calls}}));
+        }})();
+    '''
+    result = json.loads(subprocess.run(['node', '-e', script], capture_output=True, text=True,
+                                       check=True, timeout=30).stdout)
+    assert [link['title'] for link in result['first']] == ['Embutido']
+    assert result['second'] == result['posted'] == 'rede'
+    assert result['calls'] == [[LINKS, 'GET'], ['/api/portfolio/pdfs', 'POST']]
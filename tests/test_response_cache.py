@@ -0,0 +1,72 @@
+"""Listas públicas cacheadas: 304 por ETag e invalidação a cada escrita"""
+import io
+
+from sqlalchemy import event
+
+from conftest import PDF
+from src.models.user import db
+
+
+def add_link(client, title):
+    response = client.post('/api/portfolio/links', json={'url': f'https://example.com/{title}', 'title': title,
+                                                         'description': title, 'image_url': 'https://img.example/x.png'})
+    assert response.status_code == 201
+    return response.json['id']
+
+
+def titles(client, path='/api/portfolio/links'):
+    return [item['title'] for item in client.get(path).json]
+
+
+def test_if_none_match_returns_304(admin):
+    add_link(admin, 'um')
+    first = admin.get('/api/portfolio/links')
+    assert first.status_code == 200
+    assert first.headers['ETag']
+
+    again = admin.get('/api/portfolio/links', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+    assert again.data == b''
+
+
+def test_unchanged_list_does_not_query_the_database(app, admin):
+    add_link(admin, 'um')
+    admin.get('/api/portfolio/links')
+
+    statements = []
+    with app.app_context():
+        engine = db.engine
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        assert titles(admin) == ['um']
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+    assert statements == []
+
+
+def test_writes_invalidate_the_links(admin):
+    link_id = add_link(admin, 'um')
+    etag = admin.get('/api/portfolio/links').headers['ETag']
+
+    add_link(admin, 'dois')
+    response = admin.get('/api/portfolio/links', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert sorted(item['title'] for item in response.json) == ['dois', 'um']
+
+    assert admin.put(f'/api/portfolio/links/{link_id}', json={'title': 'um editado'}).status_code == 200
+    assert sorted(titles(admin)) == ['dois', 'um editado']
+
+    assert admin.delete(f'/api/portfolio/links/{link_id}').status_code == 200
+    assert titles(admin) == ['dois']
+
+
+def test_writes_invalidate_the_pdfs(admin):
+    assert titles(admin, '/api/portfolio/pdfs') == []
+    response = admin.post('/api/portfolio/pdfs', data={'title': 'Relatório', 'pdf': (io.BytesIO(PDF), 'r.pdf')},
+                          content_type='multipart/form-data')
+    assert response.status_code == 201
+    assert titles(admin, '/api/portfolio/pdfs') == ['Relatório']
+
+    assert admin.delete(f"/api/portfolio/pdfs/{response.json['id']}").status_code == 200
+    assert titles(admin, '/api/portfolio/pdfs') == []
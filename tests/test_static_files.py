@@ -0,0 +1,85 @@
+"""Frontend servido do índice em memória, com variantes comprimidas"""
+import gzip
+import time
+
+import pytest
+
+from conftest import flask_app
+from src.utils import static_files
+from src.utils.static_files import StaticIndex
+
+TEXT = b'body { color: #333; }\n' * 200
+
+
+@pytest.fixture
+def static_root(tmp_path):
+    (tmp_path / 'assets').mkdir()
+    (tmp_path / 'assets' / 'index-B_fyoeqi.css').write_bytes(TEXT)
+    (tmp_path / 'painel.html').write_bytes(b'<html>' + TEXT + b'</html>')
+    (tmp_path / 'mini.css').write_bytes(b'a{}')
+    (tmp_path / 'uploads').mkdir()
+    (tmp_path / 'uploads' / 'privado.pdf').write_bytes(b'%PDF')
+    return tmp_path
+
+
+def send(index, relpath, **headers):
+    with flask_app.test_request_context(headers=headers):
+        return index.send(relpath)
+
+
+def test_encoding_follows_accept_encoding(static_root):
+    index = StaticIndex(str(static_root))
+    response = send(index, 'painel.html', **{'Accept-Encoding': 'gzip, br'})
+    if static_files.brotli is not None:
+        assert response.content_encoding == 'br'
+        assert static_files.brotli.decompress(response.get_data()) == b'<html>' + TEXT + b'</html>'
+
+    response = send(index, 'painel.html', **{'Accept-Encoding': 'gzip'})
+    assert response.content_encoding == 'gzip'
+    assert gzip.decompress(response.get_data()) == b'<html>' + TEXT + b'</html>'
+    assert 'Accept-Encoding' in response.vary
+    assert response.get_etag()[0].endswith('-gzip')
+
+    response = send(index, 'painel.html')
+    assert response.content_encoding is None
+    assert response.get_data().startswith(b'<html>')
+
+    # Pequeno demais para compensar a compressão
+    assert send(index, 'mini.css', **{'Accept-Encoding': 'gzip'}).content_encoding is None
+
+
+def test_precompressed_variant_is_used(static_root):
+    precompressed = gzip.compress(TEXT, mtime=0)
+    (static_root / 'assets' / 'index-B_fyoeqi.css.gz').write_bytes(precompressed)
+    index = StaticIndex(str(static_root))
+    assert index.get('assets/index-B_fyoeqi.css.gz') is None
+    assert send(index, 'assets/index-B_fyoeqi.css', **{'Accept-Encoding': 'gzip'}).get_data() == precompressed
+
+
+def test_hashed_assets_are_immutable(static_root):
+    index = StaticIndex(str(static_root))
+    hashed = send(index, 'assets/index-B_fyoeqi.css')
+    assert hashed.cache_control.immutable
+    assert hashed.cache_control.max_age == static_files.IMMUTABLE_MAX_AGE
+
+    page = send(index, 'painel.html')
+    assert not page.cache_control.immutable
+    assert page.cache_control.no_cache
+    assert send(index, 'painel.html', **{'If-None-Match': page.get_etag()[0]}).status_code == 304
+
+
+def test_index_skips_uploads_and_picks_up_new_files(static_root):
+    index = StaticIndex(str(static_root), rescan_interval=0.01)
+    assert index.get('uploads/privado.pdf') is None
+    assert index.get('novo.js') is None
+
+    (static_root / 'novo.js').write_bytes(b'console.log(1)')
+    time.sleep(0.05)
+    assert send(index, 'novo.js').get_data() == b'console.log(1)'
+
+
+def test_app_serves_hashed_bundle(client):
+    response = client.get('/assets/index-B_fyoeqi.js', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.content_encoding == 'gzip'
+    assert response.cache_control.immutable
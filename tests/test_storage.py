@@ -0,0 +1,41 @@
+"""Relatório de armazenamento: servido do disco, medido em segundo plano"""
+import time
+
+from src.utils import orphans
+
+
+def wait_scan(timeout=10):
+    deadline = time.monotonic() + timeout
+    while orphans.scanning():
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test_report_does_not_scan(admin, monkeypatch):
+    def scan(*args, **kwargs):
+        raise AssertionError('varredura dentro da requisição')
+    monkeypatch.setattr(orphans, 'collect_orphans', scan)
+
+    response = admin.get('/api/storage')
+    assert response.status_code == 200
+    assert response.get_json()['report'] is None
+
+
+def test_rescan_runs_in_background(admin, app):
+    with app.app_context():
+        orphans.rescans.reset('rescan')
+    assert admin.post('/api/storage/rescan').status_code == 202
+    wait_scan()
+
+    report = admin.get('/api/storage').get_json()['report']
+    assert report['dry_run'] is True
+    assert report['finished_at']
+
+    # Uma por minuto entre todos os workers
+    assert admin.post('/api/storage/rescan').status_code == 429
+
+
+def test_collection_updates_report(app):
+    with app.app_context():
+        orphans.collect_orphans()
+    assert orphans.last_report()['dry_run'] is False
@@ -0,0 +1,50 @@
+"""Listagens completas em streaming (array JSON e NDJSON)"""
+import json
+
+from src.utils import pagination
+from test_pagination import expected_order, seed_links, walk
+
+ADMIN_LINKS = '/api/portfolio/admin/links'
+
+
+def test_full_list_streams_a_json_array(app, admin):
+    # Mais linhas que um lote de escrita: o array sai em vários pedaços
+    seed_links(app, pagination.WRITE_BATCH * 2 + 50)
+    response = admin.get(ADMIN_LINKS)
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'application/json'
+    assert 'Accept' in response.vary
+    ids = [item['id'] for item in json.loads(response.get_data())]
+    assert ids == expected_order(app) == walk(admin, ADMIN_LINKS, 60)
+
+
+def test_empty_list_streams_an_empty_array(admin):
+    response = admin.get(ADMIN_LINKS)
+    assert response.is_streamed
+    assert json.loads(response.get_data()) == []
+
+
+def test_ndjson_sends_one_item_per_line(app, admin):
+    seed_links(app, pagination.WRITE_BATCH + 5)
+    response = admin.get(ADMIN_LINKS, headers={'Accept': pagination.NDJSON})
+    assert response.is_streamed
+    assert response.mimetype == pagination.NDJSON
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line)['id'] for line in lines] == expected_order(app)
+
+
+def test_paged_ndjson_puts_the_cursor_in_a_header(app, admin):
+    seed_links(app, 7)
+    headers = {'Accept': pagination.NDJSON}
+    ids, cursor = [], None
+    while True:
+        params = {'limit': 3, **({'cursor': cursor} if cursor else {})}
+        response = admin.get(ADMIN_LINKS, query_string=params, headers=headers)
+        lines = response.get_data(as_text=True).splitlines()
+        assert len(lines) <= 3
+        ids += [json.loads(line)['id'] for line in lines]
+        cursor = response.headers['X-Next-Cursor']
+        if not cursor:
+            break
+    assert ids == expected_order(app)
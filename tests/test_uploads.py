@@ -0,0 +1,47 @@
+"""Uploads em streaming: limite aplicado durante a leitura, sem temporários sobrando"""
+import io
+import os
+
+from conftest import PDF
+from src.utils import blob_store, uploads
+from src.utils.uploads import TEMP_PREFIX
+
+
+def temp_files():
+    if not os.path.isdir(blob_store.BLOB_DIR):
+        return []
+    return [name for name in os.listdir(blob_store.BLOB_DIR) if name.startswith(TEMP_PREFIX)]
+
+
+def upload(client, data):
+    return client.post('/api/upload/pdf', data={'pdf_file': (io.BytesIO(data), 'grande.pdf')},
+                       content_type='multipart/form-data')
+
+
+def test_oversized_file_is_rejected_mid_stream(admin, monkeypatch):
+    written = []
+    write = uploads.HashingFile.write
+    monkeypatch.setattr(uploads.UploadRequest, 'max_file_size', 4096)
+    monkeypatch.setattr(uploads.HashingFile, 'write', lambda self, data: written.append(len(data)) or write(self, data))
+
+    response = upload(admin, PDF + b'%' * 64 * 1024)
+    assert response.status_code == 413
+    # Parou logo depois do limite, sem ler o arquivo inteiro para o disco
+    assert sum(written) < 64 * 1024
+    assert temp_files() == []
+    assert admin.get('/api/uploads/pdfs').json == []
+
+
+def test_declared_length_is_rejected_before_reading(admin, monkeypatch):
+    monkeypatch.setattr(uploads, 'MAX_CONTENT_LENGTH', 1024)
+    response = upload(admin, PDF + b'%' * 4096)
+    assert response.status_code == 413
+    assert 'muito grande' in response.json['error']
+    assert temp_files() == []
+
+
+def test_accepted_upload_leaves_no_temp_file(admin):
+    response = upload(admin, PDF)
+    assert response.status_code == 200
+    assert temp_files() == []
+    assert admin.get(response.json['pdf_url']).data == PDF